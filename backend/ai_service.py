@@ -446,13 +446,22 @@ class AIService:
                     pair = tuple(sorted([item_names[i], item_names[j]]))
                     pair_counts[pair] += 1
         
+        return self.combos_from_counts(pair_counts, item_counts, total_orders, min_support)
+
+    def combos_from_counts(self, pair_counts: Dict, item_counts: Dict, total_orders: int, min_support: float = 0.1) -> List[Dict]:
+        """
+        Rank item pairs by frequency from precomputed counts (e.g. the columnar analytics store).
+        """
+        if total_orders == 0:
+            return []
+        
         # Calculate support and confidence
         combos = []
         for (item1, item2), count in pair_counts.items():
             support = count / total_orders
             if support >= min_support:
-                confidence1 = count / item_counts[item1] if item_counts[item1] > 0 else 0
-                confidence2 = count / item_counts[item2] if item_counts[item2] > 0 else 0
+                confidence1 = count / item_counts[item1] if item_counts.get(item1, 0) > 0 else 0
+                confidence2 = count / item_counts[item2] if item_counts.get(item2, 0) > 0 else 0
                 
                 combos.append({
                     "item1": item1,
@@ -542,9 +551,31 @@ class AIService:
                     "suggestion": f"Increase staff during {peak_hour} to handle demand efficiently."
                 })
         
+        # Forecast-driven predictions (demand vs. stock, next hour's prep list)
+        stock_alerts = []
+        for item in analytics_data.get('demand_forecast', []):
+            if item.get('stock_qty') is not None and item['forecast'] > item['stock_qty']:
+                stock_alerts.append(
+                    f"Low stock warning: {item['item_name']} "
+                    f"(forecast {item['forecast']:.0f} in next 24h, {item['stock_qty']} in stock)"
+                )
+        prep_next_hour = analytics_data.get('prep_next_hour', [])
+        if prep_next_hour:
+            prep_list = ", ".join(f"{p['item_name']} x{p['quantity']:.0f}" for p in prep_next_hour[:5])
+            recommendations.append({
+                "priority": "high",
+                "category": "operations",
+                "title": "Pre-prep For Next Hour",
+                "suggestion": f"Expected demand next hour: {prep_list}. Batch-prep these ahead of the rush."
+            })
+        
         return {
             "insights": insights,
             "recommendations": recommendations,
+            "predictions": {
+                "stock_alerts": stock_alerts,
+                "prep_next_hour": prep_next_hour
+            },
             "summary": f"Analyzed {total_orders} orders. {len(recommendations)} actionable recommendations generated."
         }
 
@@ -570,6 +601,12 @@ class AIService:
             except:
                 continue
         
+        return self.summarize_peak_hours(hour_counts)
+
+    def summarize_peak_hours(self, hour_counts: Dict[int, int]) -> Dict:
+        """
+        Format an hour -> order count histogram (e.g. from the columnar analytics store).
+        """
         # Format for display
         peak_hours = {}
         for hour, count in hour_counts.items():
@@ -0,0 +1,380 @@
+"""
+Columnar in-memory store of recent COMPLETED orders for the management dashboard.
+
+Orders are kept as NumPy arrays instead of dicts:
+
+    orders        structured array (canteen code, UTC hour, UTC day number,
+                  created_at epoch seconds, total paise)
+    item_offsets  CSR row pointers: order i owns item rows item_offsets[i]:item_offsets[i + 1]
+    item_codes    item dictionary code per line item
+    item_qty      quantity per line item
+    item_paise    line revenue (quantity x unit price, paise) per line item
+    pair_offsets  CSR row pointers into pair_lo / pair_hi, the distinct item pairs of
+                  each order (precomputed at ingest for the combos analysis)
+
+Group-bys (hour of day, day, item, item pairs) are `bincount` calls over these
+arrays. Every worker keeps its own store, fed by the status-update hook for
+orders it completes itself and by an incremental `updated_at` poll for the rest.
+"""
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from line_items import to_paise, from_paise
+from storage import parse_timestamp, utcnow
+
+ANALYTICS_WINDOW_DAYS = int(os.environ.get('ANALYTICS_WINDOW_DAYS', os.environ.get('ARCHIVE_AFTER_DAYS', 30)))
+ANALYTICS_REFRESH_SECONDS = int(os.environ.get('ANALYTICS_REFRESH_SECONDS', 15))
+
+# Re-read this much before the last refresh so writes from other workers are not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+ORDER_DTYPE = np.dtype([
+    ("canteen", np.int16),
+    ("hour", np.uint8),
+    ("day", np.int32),
+    ("ts", np.int64),
+    ("paise", np.int64)
+])
+
+STORE_PROJECTION = {
+    "_id": 0,
+    "order_id": 1,
+    "canteen_id": 1,
+    "created_at": 1,
+    "total_amount": 1,
+    "total_paise": 1,
+    "items.item_id": 1,
+    "items.item_name": 1,
+    "items.quantity": 1,
+    "items.unit_price_paise": 1,
+    "items.price_at_order": 1
+}
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+# Count pairs with a dense bincount up to this many (item x item) cells, np.unique beyond
+PAIR_BINCOUNT_LIMIT = 1 << 22
+
+
+def _grow(array: np.ndarray, needed: int) -> np.ndarray:
+    """Return `array` with capacity for at least `needed` rows (amortized doubling)"""
+    if needed <= len(array):
+        return array
+    grown = np.zeros(max(needed, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _day_iso(day: int) -> str:
+    return datetime.fromtimestamp(day * SECONDS_PER_DAY, tz=timezone.utc).date().isoformat()
+
+
+class OrderAnalyticsStore:
+    """Columnar COMPLETED-order store with vectorized group-bys"""
+
+    # CSR row pointer array -> the columns it indexes
+    _CSR = {
+        "_item_offsets": ("_item_codes", "_item_qty", "_item_paise"),
+        "_pair_offsets": ("_pair_lo", "_pair_hi")
+    }
+
+    def __init__(self, window_days: int = ANALYTICS_WINDOW_DAYS, capacity: int = 1024):
+        self.window_days = window_days
+        self._orders = np.zeros(capacity, dtype=ORDER_DTYPE)
+        self._item_offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._item_codes = np.zeros(4 * capacity, dtype=np.int32)
+        self._item_qty = np.zeros(4 * capacity, dtype=np.int32)
+        self._item_paise = np.zeros(4 * capacity, dtype=np.int64)
+        self._pair_offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._pair_lo = np.zeros(4 * capacity, dtype=np.int32)
+        self._pair_hi = np.zeros(4 * capacity, dtype=np.int32)
+        self._n = 0
+        self._order_ids: List[str] = []
+        self._seen = set()
+        # Dictionaries for the integer codes stored in the arrays
+        self._canteen_codes: Dict[str, int] = {}
+        self._item_index: Dict[str, int] = {}
+        self._item_ids: List[str] = []
+        self._item_names: List[str] = []
+        self.watermark: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return self._n
+
+    # ---------- ingest ----------
+
+    def _canteen_code(self, canteen_id: str) -> int:
+        code = self._canteen_codes.get(canteen_id)
+        if code is None:
+            code = self._canteen_codes[canteen_id] = len(self._canteen_codes)
+        return code
+
+    def _item_code(self, item: Dict) -> int:
+        item_id = item.get("item_id") or item.get("item_name", "")
+        code = self._item_index.get(item_id)
+        if code is None:
+            code = self._item_index[item_id] = len(self._item_ids)
+            self._item_ids.append(item_id)
+            self._item_names.append(item.get("item_name") or item_id)
+        return code
+
+    def _append_csr(self, offsets_attr: str, counts: List[int], columns: Dict[str, List]) -> None:
+        """Append rows for the new orders to one CSR group (offsets + its columns)"""
+        n, k = self._n, len(counts)
+        start = int(getattr(self, offsets_attr)[n])
+        size = len(next(iter(columns.values())))
+        offsets = _grow(getattr(self, offsets_attr), n + k + 1)
+        offsets[n + 1:n + k + 1] = start + np.cumsum(counts)
+        setattr(self, offsets_attr, offsets)
+        for attr, values in columns.items():
+            column = _grow(getattr(self, attr), start + size)
+            column[start:start + size] = values
+            setattr(self, attr, column)
+
+    def add_many(self, orders: Iterable[Dict]) -> int:
+        """Append COMPLETED orders (already-seen order ids are skipped). Returns rows added."""
+        rows, ids = [], []
+        item_counts, codes, qty, line_paise = [], [], [], []
+        pair_counts, pair_lo, pair_hi = [], [], []
+        for order in orders:
+            order_id = order.get("order_id")
+            if order_id in self._seen:
+                continue
+            items = order.get("items", [])
+            total = order.get("total_paise")
+            ts = int(parse_timestamp(order["created_at"]).timestamp())
+            rows.append((
+                self._canteen_code(order.get("canteen_id")),
+                (ts // SECONDS_PER_HOUR) % 24,
+                ts // SECONDS_PER_DAY,
+                ts,
+                int(total) if total is not None else to_paise(order.get("total_amount", 0))
+            ))
+            order_codes = []
+            for item in items:
+                quantity = int(item.get("quantity", 1))
+                unit = item.get("unit_price_paise")
+                unit = int(unit) if unit is not None else to_paise(item.get("price_at_order", 0))
+                order_codes.append(self._item_code(item))
+                qty.append(quantity)
+                line_paise.append(quantity * unit)
+            codes.extend(order_codes)
+            item_counts.append(len(order_codes))
+
+            pairs = 0
+            for i, a in enumerate(order_codes):
+                for b in order_codes[i + 1:]:
+                    if a != b:
+                        pair_lo.append(min(a, b))
+                        pair_hi.append(max(a, b))
+                        pairs += 1
+            pair_counts.append(pairs)
+            ids.append(order_id)
+            self._seen.add(order_id)
+
+        if not rows:
+            return 0
+
+        n, k = self._n, len(rows)
+        self._orders = _grow(self._orders, n + k)
+        self._orders[n:n + k] = np.array(rows, dtype=ORDER_DTYPE)
+        self._append_csr("_item_offsets", item_counts, {"_item_codes": codes, "_item_qty": qty, "_item_paise": line_paise})
+        self._append_csr("_pair_offsets", pair_counts, {"_pair_lo": pair_lo, "_pair_hi": pair_hi})
+        self._order_ids.extend(ids)
+        self._n += k
+        return k
+
+    def add(self, order: Dict) -> bool:
+        """Status-update hook: record one order that just became COMPLETED"""
+        return self.add_many([order]) == 1
+
+    def evict(self, cutoff: datetime) -> int:
+        """Drop orders created before `cutoff` (they belong to the archive). Returns rows dropped."""
+        n = self._n
+        keep = self._orders["ts"][:n] >= int(cutoff.timestamp())
+        kept = int(keep.sum())
+        if kept == n:
+            return 0
+
+        for offsets_attr, column_attrs in self._CSR.items():
+            offsets = getattr(self, offsets_attr)
+            counts = np.diff(offsets[:n + 1])
+            size = int(offsets[n])
+            row_keep = np.repeat(keep, counts)
+            for attr in column_attrs:
+                column = getattr(self, attr)
+                column[:int(row_keep.sum())] = column[:size][row_keep]
+            offsets[1:kept + 1] = np.cumsum(counts[keep])
+
+        self._orders[:kept] = self._orders[:n][keep]
+        for order_id, kept_order in zip(self._order_ids, keep):
+            if not kept_order:
+                self._seen.discard(order_id)
+        self._order_ids = [oid for oid, kept_order in zip(self._order_ids, keep) if kept_order]
+        self._n = kept
+        return n - kept
+
+    async def refresh(self, db, batch_size: int = 5000) -> int:
+        """
+        Load COMPLETED orders changed since the last refresh (everything in the window
+        on the first call) and evict orders that aged out of the window.
+        """
+        started = utcnow()
+        cutoff = started - timedelta(days=self.window_days)
+        query = {"status": "COMPLETED", "created_at": {"$gte": cutoff}}
+        if self.watermark:
+            query["updated_at"] = {"$gt": self.watermark - REFRESH_OVERLAP}
+
+        added, batch = 0, []
+        async for order in db.orders.find(query, STORE_PROJECTION).batch_size(batch_size):
+            batch.append(order)
+            if len(batch) >= batch_size:
+                added += self.add_many(batch)
+                batch = []
+        added += self.add_many(batch)
+
+        self.evict(cutoff)
+        if self.watermark is None:
+            logging.info(f"Analytics store loaded {self._n} completed orders")
+        self.watermark = started
+        return added
+
+    # ---------- raw columns (forecasting) ----------
+
+    @property
+    def canteen_ids(self) -> List[str]:
+        """Canteen ids indexed by their code"""
+        return sorted(self._canteen_codes, key=self._canteen_codes.get)
+
+    @property
+    def item_ids(self) -> List[str]:
+        return list(self._item_ids)
+
+    @property
+    def item_names(self) -> List[str]:
+        return list(self._item_names)
+
+    def order_events(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Per order: (canteen code, created_at epoch seconds)"""
+        return self._orders["canteen"][:self._n].copy(), self._orders["ts"][:self._n].copy()
+
+    def item_events(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Per line item: (canteen code, created_at epoch seconds, item code, quantity)"""
+        counts = np.diff(self._item_offsets[:self._n + 1])
+        rows = self._csr_rows("_item_offsets", None)
+        return (
+            np.repeat(self._orders["canteen"][:self._n], counts),
+            np.repeat(self._orders["ts"][:self._n], counts),
+            self._item_codes[rows].copy(),
+            self._item_qty[rows].copy()
+        )
+
+    # ---------- queries ----------
+
+    def _mask(self, canteen_id: Optional[str] = None, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> Optional[np.ndarray]:
+        """Boolean mask over the orders, or None when no filter applies (all rows)"""
+        if not (canteen_id or start or end):
+            return None
+        orders = self._orders[:self._n]
+        conditions = []
+        if canteen_id:
+            code = self._canteen_codes.get(canteen_id)
+            if code is None:
+                return np.zeros(self._n, dtype=bool)
+            conditions.append(orders["canteen"] == code)
+        if start:
+            conditions.append(orders["ts"] >= int(start.timestamp()))
+        if end:
+            conditions.append(orders["ts"] < int(end.timestamp()))
+        mask = conditions[0]
+        for condition in conditions[1:]:
+            mask &= condition
+        return mask
+
+    def _column(self, name: str, mask: Optional[np.ndarray]) -> np.ndarray:
+        column = self._orders[name][:self._n]
+        return column if mask is None else column[mask]
+
+    def _csr_rows(self, offsets_attr: str, mask: Optional[np.ndarray]) -> slice:
+        """Expand an order mask to the rows of one CSR group (a slice when unfiltered)"""
+        offsets = getattr(self, offsets_attr)
+        if mask is None:
+            return slice(0, int(offsets[self._n]))
+        return np.repeat(mask, np.diff(offsets[:self._n + 1]))
+
+    def summary(self, canteen_id=None, start=None, end=None) -> Tuple[int, int]:
+        """(order count, revenue in paise)"""
+        paise = self._column("paise", self._mask(canteen_id, start, end))
+        return len(paise), int(paise.sum())
+
+    def hour_histogram(self, canteen_id=None, start=None, end=None) -> np.ndarray:
+        """Orders per UTC hour of day (length 24)"""
+        return np.bincount(self._column("hour", self._mask(canteen_id, start, end)), minlength=24)
+
+    def daily_totals(self, canteen_id=None, start=None, end=None) -> Dict[str, Dict[str, int]]:
+        """Orders and revenue (paise) per UTC day, same shape as OrderArchive.daily_totals"""
+        mask = self._mask(canteen_id, start, end)
+        days = self._column("day", mask)
+        if not len(days):
+            return {}
+        first = int(days.min())
+        offset = days - first
+        counts = np.bincount(offset)
+        revenue = np.bincount(offset, weights=self._column("paise", mask))
+        return {
+            _day_iso(first + d): {"orders": int(counts[d]), "revenue_paise": int(round(revenue[d]))}
+            for d in np.flatnonzero(counts).tolist()
+        }
+
+    def item_sales(self, canteen_id=None, start=None, end=None, sort_by: str = "quantity", limit: int = 10) -> List[Dict]:
+        """Top items by quantity or revenue"""
+        rows = self._csr_rows("_item_offsets", self._mask(canteen_id, start, end))
+        codes = self._item_codes[rows]
+        quantity = np.bincount(codes, weights=self._item_qty[rows], minlength=len(self._item_ids))
+        revenue = np.bincount(codes, weights=self._item_paise[rows], minlength=len(self._item_ids))
+
+        key = revenue if sort_by == "revenue_paise" else quantity
+        top = [c for c in np.argsort(-key, kind="stable")[:limit].tolist() if quantity[c] > 0]
+        return [{
+            "item_id": self._item_ids[c],
+            "item_name": self._item_names[c],
+            "quantity": int(quantity[c]),
+            "revenue": from_paise(int(round(revenue[c])))
+        } for c in top]
+
+    def item_pairs(self, canteen_id=None, start=None, end=None) -> Tuple[Dict[Tuple[str, str], int], Dict[str, int], int]:
+        """
+        Co-occurrence counts for item pairs ordered together, per-item line counts and the
+        number of orders - the inputs of `ai_service.combos_from_counts`.
+        """
+        mask = self._mask(canteen_id, start, end)
+        total_orders = self._n if mask is None else int(mask.sum())
+        n_items = len(self._item_ids)
+
+        pair_rows = self._csr_rows("_pair_offsets", mask)
+        keys = self._pair_lo[pair_rows].astype(np.int64) * n_items + self._pair_hi[pair_rows]
+        if n_items * n_items <= PAIR_BINCOUNT_LIMIT:
+            freq = np.bincount(keys, minlength=n_items * n_items)
+            unique = np.flatnonzero(freq)
+            freq = freq[unique]
+        else:
+            unique, freq = np.unique(keys, return_counts=True)
+
+        # Combos are reported by name, so items sharing a name are counted together
+        pair_counts = defaultdict(int)
+        for k, f in zip(unique.tolist(), freq.tolist()):
+            pair_counts[tuple(sorted((self._item_names[k // n_items], self._item_names[k % n_items])))] += f
+        item_counts = defaultdict(int)
+        lines = np.bincount(self._item_codes[self._csr_rows("_item_offsets", mask)], minlength=n_items)
+        for c in np.flatnonzero(lines).tolist():
+            item_counts[self._item_names[c]] += int(lines[c])
+        return dict(pair_counts), dict(item_counts), total_orders
+
+
+# Module-level instance shared by the server's analytics endpoints
+analytics_store = OrderAnalyticsStore()
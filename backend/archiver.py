@@ -0,0 +1,283 @@
+"""
+Cold storage for aged orders.
+
+COMPLETED and CANCELLED orders older than ARCHIVE_AFTER_DAYS are moved out of the
+hot `orders` collection into gzip-compressed NDJSON files on local disk, partitioned
+by UTC creation date and canteen:
+
+    <ORDER_ARCHIVE_DIR>/date=2026-09-01/canteen_id=sopanam/part-<batch>.ndjson.gz
+
+Each partition directory carries a `_manifest.json` with per-part row counts,
+created_at bounds and per-status totals. Scans prune partitions by directory name,
+skip parts whose bounds miss the predicate, and answer whole-part aggregates from
+the manifest without decompressing anything.
+
+Run once from the command line with `python archiver.py`.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+import orjson
+from line_items import to_paise
+from storage import parse_timestamp, utcnow
+
+ROOT_DIR = Path(__file__).parent
+
+ARCHIVE_DIR = Path(os.environ.get('ORDER_ARCHIVE_DIR', ROOT_DIR / 'archive' / 'orders'))
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 30))
+ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('ARCHIVE_INTERVAL_SECONDS', 3600))
+ARCHIVE_BATCH_SIZE = 5000
+
+# Only terminal orders are archived; anything else stays hot
+ARCHIVE_STATUSES = ["COMPLETED", "CANCELLED"]
+
+MANIFEST_NAME = "_manifest.json"
+_TIMESTAMP_FIELDS = ("created_at", "updated_at", "expires_at")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write to a temp file, fsync and rename so readers never see a partial file"""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _order_paise(order: Dict) -> int:
+    if order.get("total_paise") is not None:
+        return int(order["total_paise"])
+    return to_paise(order.get("total_amount", 0))
+
+
+class OrderArchive:
+    """Date/canteen partitioned order files plus the scan API over them"""
+
+    def __init__(self, root: Path = ARCHIVE_DIR):
+        self.root = Path(root)
+
+    # ---------- layout ----------
+
+    def partition_dir(self, day: date, canteen_id: str) -> Path:
+        return self.root / f"date={day.isoformat()}" / f"canteen_id={quote(str(canteen_id), safe='')}"
+
+    @staticmethod
+    def partition_key(order: Dict) -> Tuple[date, str]:
+        return parse_timestamp(order["created_at"]).date(), order.get("canteen_id") or "unknown"
+
+    def _read_manifest(self, partition: Path) -> Dict:
+        path = partition / MANIFEST_NAME
+        if not path.exists():
+            return {"parts": {}}
+        return json.loads(path.read_text())
+
+    # ---------- writing ----------
+
+    def write_part(self, day: date, canteen_id: str, batch_id: str, orders: List[Dict]) -> bool:
+        """
+        Write one batch's orders for a partition. Returns False when the part is already
+        in the manifest (a resumed batch), so re-running a batch never duplicates rows.
+        """
+        partition = self.partition_dir(day, canteen_id)
+        partition.mkdir(parents=True, exist_ok=True)
+        manifest = self._read_manifest(partition)
+        name = f"part-{batch_id}.ndjson.gz"
+        if name in manifest["parts"]:
+            return False
+
+        body = b"".join(orjson.dumps(order) + b"\n" for order in orders)
+        _write_atomic(partition / name, gzip.compress(body))
+
+        created = [parse_timestamp(o["created_at"]) for o in orders]
+        stats = defaultdict(lambda: {"orders": 0, "revenue_paise": 0})
+        for order in orders:
+            bucket = stats[order.get("status")]
+            bucket["orders"] += 1
+            bucket["revenue_paise"] += _order_paise(order)
+
+        # The manifest is the commit point: a part it does not list is ignored by scans
+        manifest["parts"][name] = {
+            "rows": len(orders),
+            "min_created_at": min(created).isoformat(),
+            "max_created_at": max(created).isoformat(),
+            "stats": dict(stats)
+        }
+        _write_atomic(partition / MANIFEST_NAME, json.dumps(manifest, indent=1).encode("utf-8"))
+        return True
+
+    # ---------- reading ----------
+
+    def partitions(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   canteen_id: Optional[str] = None) -> Iterator[Tuple[date, str, Path]]:
+        """Yield (day, canteen_id, dir) for partitions that can hold rows in [start, end)"""
+        if not self.root.exists():
+            return
+        for date_dir in sorted(self.root.glob("date=*")):
+            day = date.fromisoformat(date_dir.name.split("=", 1)[1])
+            if start and day < start.date():
+                continue
+            if end and day > end.date():
+                continue
+            for canteen_dir in sorted(date_dir.glob("canteen_id=*")):
+                canteen = unquote(canteen_dir.name.split("=", 1)[1])
+                if canteen_id and canteen != canteen_id:
+                    continue
+                yield day, canteen, canteen_dir
+
+    def _parts(self, start, end, canteen_id, statuses) -> Iterator[Tuple[Path, Dict]]:
+        """Yield (path, manifest entry) for parts whose bounds and statuses overlap the predicate"""
+        for _, _, partition in self.partitions(start, end, canteen_id):
+            for name, part in self._read_manifest(partition)["parts"].items():
+                if start and parse_timestamp(part["max_created_at"]) < start:
+                    continue
+                if end and parse_timestamp(part["min_created_at"]) >= end:
+                    continue
+                if statuses and not set(statuses) & set(part["stats"]):
+                    continue
+                yield partition / name, part
+
+    def scan(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        canteen_id: Optional[str] = None,
+        statuses: Optional[Iterable[str]] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> Iterator[Dict]:
+        """
+        Yield archived orders created in [start, end), optionally restricted to a canteen
+        and statuses, with only `fields` kept. Timestamps come back as UTC datetimes.
+        """
+        statuses = set(statuses) if statuses else None
+        fields = list(fields) if fields else None
+        for path, _ in self._parts(start, end, canteen_id, statuses):
+            for order in self._scan_part(path):
+                created_at = order["created_at"]
+                if (start and created_at < start) or (end and created_at >= end):
+                    continue
+                if statuses and order.get("status") not in statuses:
+                    continue
+                yield {k: order.get(k) for k in fields} if fields else order
+
+    def daily_totals(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        canteen_id: Optional[str] = None,
+        statuses: Iterable[str] = ("COMPLETED",)
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Orders and revenue (paise) per UTC day. Parts entirely inside the range are
+        answered from manifest stats; only parts straddling a bound are decompressed.
+        """
+        statuses = set(statuses)
+        totals = defaultdict(lambda: {"orders": 0, "revenue_paise": 0})
+        for path, part in self._parts(start, end, canteen_id, statuses):
+            inside = (not start or parse_timestamp(part["min_created_at"]) >= start) and \
+                     (not end or parse_timestamp(part["max_created_at"]) < end)
+            if inside:
+                day = path.parent.parent.name.split("=", 1)[1]
+                for status, stat in part["stats"].items():
+                    if status in statuses:
+                        totals[day]["orders"] += stat["orders"]
+                        totals[day]["revenue_paise"] += stat["revenue_paise"]
+                continue
+            for order in self._scan_part(path):
+                created_at = order["created_at"]
+                if (start and created_at < start) or (end and created_at >= end):
+                    continue
+                if order.get("status") not in statuses:
+                    continue
+                day = created_at.date().isoformat()
+                totals[day]["orders"] += 1
+                totals[day]["revenue_paise"] += _order_paise(order)
+        return dict(totals)
+
+    def _scan_part(self, path: Path) -> Iterator[Dict]:
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                order = orjson.loads(line)
+                for key in _TIMESTAMP_FIELDS:
+                    if order.get(key) is not None:
+                        order[key] = parse_timestamp(order[key])
+                yield order
+
+
+# Module-level instance shared by the server and the CLI
+order_archive = OrderArchive()
+
+
+async def _archive_batch(db, archive: OrderArchive, batch_id: str) -> int:
+    """Write every order tagged with `batch_id` to its partition, then delete them"""
+    orders = await db.orders.find({"archive_batch": batch_id}, {"_id": 0, "archive_batch": 0}).to_list(None)
+    by_partition = defaultdict(list)
+    for order in orders:
+        by_partition[archive.partition_key(order)].append(order)
+
+    for (day, canteen_id), rows in by_partition.items():
+        await asyncio.to_thread(archive.write_part, day, canteen_id, batch_id, rows)
+
+    # Only after every part is durable and listed in its manifest
+    await db.orders.delete_many({"archive_batch": batch_id})
+    return len(orders)
+
+
+async def archive_orders(
+    db,
+    archive: OrderArchive = order_archive,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """
+    Move aged COMPLETED/CANCELLED orders into cold storage. Orders are first tagged
+    with a batch id, so a run interrupted between writing and deleting is finished
+    by the next run instead of archiving the same orders twice.
+    """
+    archived = 0
+    for batch_id in await db.orders.distinct("archive_batch"):
+        archived += await _archive_batch(db, archive, batch_id)
+
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    query = {
+        "status": {"$in": ARCHIVE_STATUSES},
+        "created_at": {"$lt": cutoff},
+        "archive_batch": {"$exists": False}
+    }
+    while True:
+        ids = [doc["_id"] async for doc in db.orders.find(query, {"_id": 1}).limit(batch_size)]
+        if not ids:
+            break
+        batch_id = f"{utcnow().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        await db.orders.update_many({"_id": {"$in": ids}}, {"$set": {"archive_batch": batch_id}})
+        archived += await _archive_batch(db, archive, batch_id)
+
+    if archived:
+        logging.info(f"Archived {archived} orders older than {older_than_days} days to {archive.root}")
+    return archived
+
+
+async def main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+
+    print(f"📦 Archiving orders older than {ARCHIVE_AFTER_DAYS} days to {order_archive.root}")
+    count = await archive_orders(db)
+    print(f"✅ Archived {count} orders")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
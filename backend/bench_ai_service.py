@@ -0,0 +1,319 @@
+"""
+Micro-benchmarks for the recommendation, analytics and knapsack hot paths.
+
+Cases run over synthetic menus (100 - 5,000 items) and order histories
+(1k - 100k orders, 1M with --full) built by synthetic_data.CampusModel, so
+every run times the same inputs:
+
+  symptom_keyword / symptom_fuzzy   AIService.get_symptom_recommendations
+  collaborative                     AIService.get_collaborative_recommendations
+  weekly_diet_plan                  AIService.generate_weekly_diet_plan
+  order_combos                      AIService.analyze_order_combos
+  peak_hours                        AIService.predict_peak_hours
+  management_insights               AIService.generate_management_insights
+  protein_knapsack                  knapsack.protein_combo (the endpoint without Mongo)
+
+Each case is warmed up once, then repeated until it has run for --min-time
+seconds (at least 5 rounds) with the garbage collector off, as timeit does;
+min / median / mean / stddev are reported in ms.
+A case that raises is recorded with its error instead of a timing (the diet
+plan's recursive subset search cannot handle large menus, for example).
+
+`run --save` stores the results as a JSON baseline; `compare` re-runs the
+baseline's cases (or loads --current) and exits 1 when a case's fastest round
+got slower by more than --threshold, or a case that used to pass now fails.
+The minimum is compared rather than the median because it is far less
+sensitive to other load on the machine. Baselines are
+machine specific: compare warns when the machine differs.
+
+Symptom recommendations switch to caffeine-free suggestions late at night,
+so compare runs made at similar times of day.
+
+Usage: python bench_ai_service.py run [--full] [-k order_combos] [--save [PATH]]
+       python bench_ai_service.py compare [--baseline PATH] [--current PATH] [--threshold 0.15]
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from ai_service import ai_service
+from knapsack import protein_combo
+from synthetic_data import CampusModel
+
+DEFAULT_BASELINE = Path(__file__).parent / "benchmarks" / "ai_service.json"
+DEFAULT_THRESHOLD = 0.15
+# Changes below this are timer noise, whatever the ratio
+MIN_DELTA_MS = 0.1
+MIN_ROUNDS = 5
+MAX_ROUNDS = 1000
+
+MENU_SIZES = (100, 1000, 5000)
+ORDER_SIZES = (1_000, 10_000, 100_000)
+FULL_ORDER_SIZES = ORDER_SIZES + (1_000_000,)
+
+CANTEENS = ["sopanam", "mba", "samudra"]
+CATEGORIES = ["Beverages", "Desserts", "Main Course", "Meals", "Biryani", "Snacks", "Soups", "Healthy Options"]
+# Names the rule tables look for, so the matching paths do real work
+DISHES = ["Chicken Biryani", "Veg Biryani", "Masala Dosa", "Idli", "Vada", "Fried Rice", "Meals", "Burger",
+          "Coffee", "Filter Coffee", "Cold Coffee", "Ginger Tea", "Green Tea", "Badam Milk", "Chocolate",
+          "Ice Cream", "Coke", "Pepsi", "Raita", "Lime Soda", "Paneer Butter Masala", "Gobi Manchurian",
+          "Omelette", "Fish Fry", "French Fries", "Milkshake", "Fruit Juice", "Fruit Bowl", "Boiled Eggs",
+          "Protein Shake", "Chicken Salad", "Pepper Rasam", "Soup"]
+HISTORY_END = datetime(2026, 3, 2, 20, 0, tzinfo=timezone.utc)
+SEED = 7
+
+
+def make_menu(size: int, seed: int = SEED) -> List[Dict]:
+    """`size` menu items spread over the canteens, dish names repeated with variants"""
+    rng = random.Random(seed)
+    menu = []
+    for i in range(size):
+        dish = DISHES[i % len(DISHES)]
+        menu.append({
+            "item_id": f"bench_item_{i:05d}",
+            "canteen_id": CANTEENS[i % len(CANTEENS)],
+            "name": dish if i < len(DISHES) else f"{dish} {i // len(DISHES)}",
+            "category": rng.choice(CATEGORIES),
+            "price": float(rng.randrange(20, 250, 5)),
+            "image_url": f"https://img.example/{i}.jpg",
+            "prep_time": rng.randint(3, 20),
+            "available": True,
+            "nutrition": {"calories": rng.randint(50, 900), "protein": round(rng.uniform(0, 40), 1),
+                          "carbs": rng.randint(0, 120), "fat": rng.randint(0, 40)}
+        })
+    return menu
+
+
+def make_orders(count: int, menu_size: int = 200, seed: int = SEED) -> List[Dict]:
+    menus: Dict[str, List[Dict]] = {}
+    for item in make_menu(menu_size, seed):
+        menus.setdefault(item["canteen_id"], []).append(item)
+    model = CampusModel(menus, students=max(100, count // 20), seed=seed)
+    return list(itertools.islice(model.orders(max(50, count // 20), 40, HISTORY_END), count))
+
+
+def analytics_payload(size: int, seed: int = SEED) -> Dict:
+    rng = random.Random(seed)
+    menu = make_menu(size, seed)
+    return {
+        "total_orders": 50_000,
+        "total_revenue": 4_250_000.0,
+        "average_order_value": 85.0,
+        "top_items": [{"item_name": item["name"], "quantity": size - rank} for rank, item in enumerate(menu)],
+        "peak_hours": {f"{hour:02d}:00 - {hour:02d}:59": rng.randint(0, 900) for hour in range(7, 22)},
+        "demand_forecast": [{"item_name": item["name"], "forecast": rng.uniform(0, 80),
+                             "stock_qty": rng.randint(0, 60)} for item in menu],
+        "prep_next_hour": [{"item_name": item["name"], "quantity": rng.uniform(1, 30)} for item in menu[:10]]
+    }
+
+
+# Case name -> (sizes, full sizes, setup(size) -> zero-argument callable or coroutine function)
+Setup = Callable[[int], Callable]
+
+
+def _symptom(query: str) -> Setup:
+    def setup(size):
+        menu = make_menu(size)
+        return lambda: ai_service.get_symptom_recommendations(query, menu)
+    return setup
+
+
+def _collaborative(size):
+    menu = make_menu(size)
+    history = [{"item_name": "Masala Dosa"}, {"item_name": "Burger"}, {"item_name": "Chicken Biryani"}]
+    return lambda: ai_service.get_collaborative_recommendations(history, menu)
+
+
+def _diet_plan(size):
+    menu = make_menu(size)
+    return lambda: ai_service.generate_weekly_diet_plan("muscle_gain", 70, 75, menu, protein_goal=60)
+
+
+def _combos(size):
+    orders = make_orders(size)
+    return lambda: ai_service.analyze_order_combos(orders)
+
+
+def _peak_hours(size):
+    orders = make_orders(size)
+    return lambda: ai_service.predict_peak_hours(orders)
+
+
+def _insights(size):
+    payload = analytics_payload(size)
+    return lambda: ai_service.generate_management_insights(payload)
+
+
+def _knapsack(size):
+    menu = make_menu(size)
+    return lambda: protein_combo(menu, 150)
+
+
+CASES: Dict[str, Tuple[Tuple[int, ...], Tuple[int, ...], str, Setup]] = {
+    "symptom_keyword": (MENU_SIZES, MENU_SIZES, "menu", _symptom("I have a terrible headache")),
+    "symptom_fuzzy": (MENU_SIZES, MENU_SIZES, "menu", _symptom("feeling really stresed and tird today")),
+    "collaborative": (MENU_SIZES, MENU_SIZES, "menu", _collaborative),
+    "weekly_diet_plan": (MENU_SIZES, MENU_SIZES, "menu", _diet_plan),
+    "order_combos": (ORDER_SIZES, FULL_ORDER_SIZES, "orders", _combos),
+    "peak_hours": (ORDER_SIZES, FULL_ORDER_SIZES, "orders", _peak_hours),
+    "management_insights": (MENU_SIZES, MENU_SIZES, "items", _insights),
+    "protein_knapsack": (MENU_SIZES, MENU_SIZES, "menu", _knapsack),
+}
+
+
+def case_names(full: bool = False, pattern: Optional[str] = None) -> List[Tuple[str, str, int]]:
+    """(case id, case, size) for every selected case, e.g. ('order_combos[orders=1000]', 'order_combos', 1000)"""
+    selected = []
+    for name, (sizes, full_sizes, unit, _) in CASES.items():
+        for size in (full_sizes if full else sizes):
+            case_id = f"{name}[{unit}={size}]"
+            if pattern is None or pattern in case_id:
+                selected.append((case_id, name, size))
+    return selected
+
+
+def measure(fn: Callable, loop: asyncio.AbstractEventLoop, min_time: float) -> Dict:
+    def call():
+        result = fn()
+        if asyncio.iscoroutine(result):
+            loop.run_until_complete(result)
+
+    random.seed(SEED)
+    call()  # warm-up
+    timings = []
+    # Collections triggered by the big synthetic inputs would land in random rounds
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(timings) < MAX_ROUNDS and (len(timings) < MIN_ROUNDS or time.perf_counter() - started < min_time):
+            random.seed(SEED)
+            t = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - t) * 1000)
+    finally:
+        gc.enable()
+    return {
+        "min_ms": round(min(timings), 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "stddev_ms": round(statistics.stdev(timings), 4) if len(timings) > 1 else 0.0,
+        "rounds": len(timings)
+    }
+
+
+def machine() -> Dict:
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "cpu_count": os.cpu_count()}
+
+
+def run_suite(cases: List[Tuple[str, str, int]], min_time: float = 0.5, full: bool = False) -> Dict:
+    results = {}
+    loop = asyncio.new_event_loop()
+    try:
+        for case_id, name, size in cases:
+            try:
+                fn = CASES[name][3](size)
+                results[case_id] = measure(fn, loop, min_time)
+                stats = results[case_id]
+                print(f"  {case_id:<40} median {stats['median_ms']:11.3f} ms  min {stats['min_ms']:11.3f} ms  "
+                      f"± {stats['stddev_ms']:9.3f}  ({stats['rounds']} rounds)")
+            except Exception as e:
+                results[case_id] = {"error": f"{type(e).__name__}: {e}"[:200]}
+                print(f"  {case_id:<40} ERROR {results[case_id]['error']}")
+    finally:
+        loop.close()
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "profile": "full" if full else "quick",
+        "machine": machine(),
+        "results": results
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Print the change in the fastest round per case; returns the regressed case ids"""
+    regressions = []
+    if baseline.get("machine") != current.get("machine"):
+        print("WARNING: baseline was recorded on a different machine; timings may not be comparable")
+    for case_id, before in baseline["results"].items():
+        after = current["results"].get(case_id)
+        if after is None:
+            print(f"  {case_id:<40} missing from current run")
+            continue
+        if "error" in after:
+            status = "still failing" if "error" in before else "REGRESSION (now fails)"
+            if "error" not in before:
+                regressions.append(case_id)
+            print(f"  {case_id:<40} {status}: {after['error']}")
+            continue
+        if "error" in before:
+            print(f"  {case_id:<40} fixed (min {after['min_ms']:.3f} ms)")
+            continue
+        ratio = after["min_ms"] / before["min_ms"] if before["min_ms"] else 1.0
+        slower = ratio > 1 + threshold and after["min_ms"] - before["min_ms"] > MIN_DELTA_MS
+        if slower:
+            regressions.append(case_id)
+        print(f"  {case_id:<40} {before['min_ms']:11.3f} -> {after['min_ms']:11.3f} ms  "
+              f"{(ratio - 1) * 100:+7.1f}%{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AI service / knapsack micro-benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite")
+    run.add_argument("--full", action="store_true", help="include the 1M-order histories")
+    run.add_argument("-k", dest="pattern", help="only cases whose id contains this")
+    run.add_argument("--min-time", type=float, default=0.5, help="seconds of timed rounds per case")
+    run.add_argument("--save", nargs="?", const=str(DEFAULT_BASELINE), help="write results as a JSON baseline")
+
+    cmp = commands.add_parser("compare", help="fail on regressions against a baseline")
+    cmp.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    cmp.add_argument("--current", help="results JSON to compare (default: run the baseline's cases now)")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown of the fastest round (0.15 = 15%%)")
+    cmp.add_argument("--min-time", type=float, default=0.5)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.command == "run":
+        results = run_suite(case_names(args.full, args.pattern), args.min_time, args.full)
+        if args.save:
+            path = Path(args.save)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2) + "\n")
+            print(f"Saved {len(results['results'])} results to {path}")
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    if args.current:
+        current = json.loads(Path(args.current).read_text())
+    else:
+        wanted = set(baseline["results"])
+        cases = [case for case in case_names(full=baseline.get("profile") == "full") if case[0] in wanted]
+        print(f"Running {len(cases)} baseline cases:")
+        current = run_suite(cases, args.min_time, baseline.get("profile") == "full")
+    print(f"\nFastest round vs {args.baseline} (threshold {args.threshold:.0%}):")
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
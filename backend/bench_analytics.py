@@ -0,0 +1,67 @@
+"""
+Analytics benchmark: dashboard group-bys over the columnar store vs the dict loops.
+
+Builds N synthetic COMPLETED orders and times peak hours, top items, daily totals
+and item-pair combos on both paths.
+
+Usage: python bench_analytics.py [orders]
+"""
+import asyncio
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import List
+from ai_service import ai_service
+from analytics_store import OrderAnalyticsStore
+
+
+def make_orders(n: int) -> List[dict]:
+    rng = random.Random(42)
+    menu = [(f"item_{i:03d}", f"Item {i}", 2000 + 250 * i) for i in range(80)]
+    now = datetime.now(timezone.utc)
+    orders = []
+    for i in range(n):
+        picks = rng.sample(menu, rng.randint(1, 4))
+        items = [{"item_id": item_id, "item_name": name, "quantity": rng.randint(1, 3),
+                  "price_at_order": paise / 100, "unit_price_paise": paise} for item_id, name, paise in picks]
+        orders.append({
+            "order_id": f"order_{i:012d}",
+            "canteen_id": rng.choice(["sopanam", "mba", "samudra"]),
+            "items": items,
+            "total_paise": sum(it["unit_price_paise"] * it["quantity"] for it in items),
+            "created_at": (now - timedelta(seconds=rng.randint(0, 30 * 86400))).isoformat()
+        })
+    return orders
+
+
+def bench(label: str, fn, repeats: int) -> float:
+    seconds = min(timeit.repeat(fn, number=1, repeat=repeats))
+    print(f"  {label:<34} {seconds * 1000:9.3f} ms")
+    return seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    orders = make_orders(n)
+    store = OrderAnalyticsStore()
+    load = timeit.timeit(lambda: store.add_many(orders), number=1)
+    print(f"Loaded {len(store)} orders into the columnar store in {load:.2f} s\n")
+
+    print("Dict loops (previous path):")
+    old_peak = bench("predict_peak_hours", lambda: asyncio.run(ai_service.predict_peak_hours(orders)), 1)
+    old_combos = bench("analyze_order_combos", lambda: asyncio.run(ai_service.analyze_order_combos(orders)), 1)
+
+    print("Columnar store:")
+    new_peak = bench("hour_histogram", lambda: store.hour_histogram(), 20)
+    bench("hour_histogram (one canteen)", lambda: store.hour_histogram("mba"), 20)
+    bench("summary", lambda: store.summary(), 20)
+    bench("daily_totals", lambda: store.daily_totals(), 20)
+    bench("item_sales", lambda: store.item_sales(sort_by="revenue_paise"), 20)
+    new_combos = bench("item_pairs", lambda: store.item_pairs(), 5)
+
+    print(f"\nPeak hours speedup: {old_peak / new_peak:.0f}x, combos speedup: {old_combos / new_combos:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
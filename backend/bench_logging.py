@@ -0,0 +1,112 @@
+"""
+Logging overhead benchmark at a steady request rate.
+
+Simulates 2k req/s on the event loop. Each request logs what the crew endpoints
+log (one access line plus three chatty lines) through:
+
+  - the previous setup: basicConfig-style StreamHandler, f-strings at INFO
+  - the queue pipeline (log_pipeline.py) at INFO: access line queued, chatty lines at DEBUG
+  - the queue pipeline at DEBUG: chatty lines rate limited to 20/s
+
+The sink simulates a stalling stdout (every Nth write blocks for a few ms). The
+report shows time spent in logging calls per request and the event-loop lag
+the stalls cause.
+
+Usage: python bench_logging.py [rate] [seconds] [stall_ms]
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from log_pipeline import setup_logging, shutdown_logging
+
+STALL_EVERY = 500
+
+
+class StallingStream:
+    """Writes to /dev/null, blocking for `stall_ms` on every STALL_EVERY-th write"""
+
+    def __init__(self, stall_ms: float):
+        self.sink = open(os.devnull, "w")
+        self.stall = stall_ms / 1000
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        if self.writes % STALL_EVERY == 0:
+            time.sleep(self.stall)
+        return self.sink.write(text)
+
+    def flush(self):
+        self.sink.flush()
+
+
+def old_request(i: int):
+    logging.info(f"REQUEST: GET /api/orders/recent/sopanam - Status: 200 - Time: {0.0123:.4f}s")
+    logging.info("Fetching recent orders for canteen: 'sopanam' Requesting User: crew-sopanam@campusbites.com")
+    logging.info(f"Found {i % 40} active orders for sopanam")
+    logging.info(f"Returning total {i % 40 + 20} orders for sopanam")
+
+
+access_logger = logging.getLogger("access")
+crew_logger = logging.getLogger("server.crew")
+
+
+def new_request(i: int):
+    crew_logger.debug("Fetching recent orders for canteen %s (user %s)", "sopanam", "crew-sopanam@campusbites.com")
+    crew_logger.debug("Found %d active orders for %s", i % 40, "sopanam")
+    crew_logger.debug("Returning %d orders for %s", i % 40 + 20, "sopanam")
+    access_logger.info("%s %s %s %.1fms", "GET", "/api/orders/recent/sopanam", 200, 12.3,
+                       extra={"method": "GET", "path": "/api/orders/recent/sopanam", "status": 200, "duration_ms": 12.3})
+
+
+async def drive(rate: int, seconds: float, log_request):
+    loop = asyncio.get_running_loop()
+    interval = 1 / rate
+    spent, lags = [], []
+    start = loop.time()
+    for i in range(int(rate * seconds)):
+        due = start + i * interval
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lags.append(max(0.0, loop.time() - due))
+        t = time.perf_counter()
+        log_request(i)
+        spent.append(time.perf_counter() - t)
+    return np.asarray(spent) * 1e6, np.asarray(lags) * 1000
+
+
+def run(label: str, rate: int, seconds: float, log_request):
+    spent, lags = asyncio.run(drive(rate, seconds, log_request))
+    p50, p99 = np.percentile(spent, [50, 99])
+    print(f"  {label:<32} log/request p50 {p50:7.1f} us  p99 {p99:8.1f} us  max {spent.max() / 1000:6.2f} ms  "
+          f"loop lag p99 {np.percentile(lags, 99):6.2f} ms")
+
+
+def main():
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    stall_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+    print(f"{rate} req/s for {seconds:g} s, sink stalls {stall_ms:g} ms every {STALL_EVERY} writes:")
+
+    root = logging.getLogger()
+    handler = logging.StreamHandler(StallingStream(stall_ms))
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    root.handlers, root.level = [handler], logging.INFO
+    run("basicConfig stream handler", rate, seconds, old_request)
+
+    setup_logging("INFO", "json", stream=StallingStream(stall_ms))
+    run("queue pipeline (INFO)", rate, seconds, new_request)
+
+    setup_logging("DEBUG", "json", stream=StallingStream(stall_ms))
+    run("queue pipeline (DEBUG, limited)", rate, seconds, new_request)
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
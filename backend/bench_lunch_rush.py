@@ -0,0 +1,386 @@
+"""
+Lunch-rush load harness: boots the full app (FastAPI + socket.io) in-process and
+drives a scripted mix of students and crews against it.
+
+Students log in, browse canteens and a menu, place an order, verify the payment,
+then track it over socket.io until it is READY. Each canteen's crew polls its
+dashboard, accepts new orders one by one and marks cooked orders ready /
+completed in bulk, like the crew dashboard does. The report gives per-endpoint
+throughput and p50/p95/p99 latency, plus socket event delivery latency
+(student pays -> crew sees the order, crew marks ready -> student is told).
+
+The server runs in a background thread with its own event loop against a local
+Mongo (MONGO_URL). Unless --db is given a scratch database is created and
+dropped afterwards. Pass --max-p95-ms / --max-error-rate to use the run as a
+release gate (exit status 1 when exceeded).
+
+Usage: MONGO_URL=mongodb://localhost:27017 python bench_lunch_rush.py [--students 300] [--orders-per-student 2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import socketio
+import uvicorn
+
+CANTEENS = ["sopanam", "mba", "samudra"]
+MENU_SIZE = 12
+STUDENT_PASSWORD = "lunch123"
+CREW_PASSWORD = "crew123"
+
+
+class Recorder:
+    """Latency samples per endpoint label and per socket event"""
+
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.events: Dict[str, List[float]] = defaultdict(list)
+        self.missed: Dict[str, int] = defaultdict(int)
+        # (order_id, status) -> perf_counter() when the triggering request was sent
+        self.sent: Dict[Tuple[str, str], float] = {}
+        self.started = self.finished = None
+
+    def mark(self, order_id: str, status: str) -> None:
+        self.sent[(order_id, status)] = time.perf_counter()
+
+    def delivered(self, event: str, order_id: str, status: str) -> None:
+        sent = self.sent.pop((order_id, status), None)
+        if sent is not None:
+            self.events[event].append(time.perf_counter() - sent)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latency[label].append(time.perf_counter() - start)
+        if response is None or response.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return response
+
+
+def percentiles(samples: List[float]) -> Tuple[float, float, float]:
+    if not samples:
+        return (0.0, 0.0, 0.0)
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return float(p50), float(p95), float(p99)
+
+
+# ---------- fixture ----------
+
+async def seed(db) -> Dict[str, List[Dict]]:
+    from auth_utils import hash_password
+    from models import MenuItem, Nutrition
+    from storage import to_document, utcnow
+
+    await db.canteens.insert_many([
+        {"canteen_id": canteen_id, "name": f"{canteen_id.title()} Canteen", "description": "",
+         "operating_hours": "7:00 AM - 10:00 PM", "image_url": ""}
+        for canteen_id in CANTEENS
+    ])
+    rng = random.Random(1)
+    menus = {}
+    for canteen_id in CANTEENS:
+        items = [to_document(MenuItem(
+            name=f"Item {i}", canteen_id=canteen_id, price=20 + 5 * rng.randint(0, 20),
+            nutrition=Nutrition(calories=300, carbs=40, protein=10, fat=10, fiber=3, vitamins="B", sodium=200),
+            ingredients="", allergens="", stock_qty=100_000, category="Main Course", image_url="",
+            veg_type="veg", prep_time=rng.randint(2, 15)
+        )) for i in range(MENU_SIZE)]
+        await db.menu_items.insert_many(items)
+        menus[canteen_id] = items
+    await db.users.insert_many([{
+        "user_id": f"loadtest_crew_{canteen_id}",
+        "email": f"loadtest-crew-{canteen_id}@campusbites.com",
+        "password_hash": hash_password(CREW_PASSWORD),
+        "name": f"{canteen_id} crew",
+        "role": "crew",
+        "canteen_id": canteen_id,
+        "created_at": utcnow()
+    } for canteen_id in CANTEENS])
+    return menus
+
+
+async def seed_students(db, count: int) -> List[str]:
+    from auth_utils import hash_password
+    from storage import utcnow
+
+    password_hash = hash_password(STUDENT_PASSWORD)
+    roll_numbers = [f"LT{i:06d}" for i in range(count)]
+    await db.users.insert_many([{
+        "user_id": f"loadtest_student_{i:06d}",
+        "roll_number": roll_number,
+        "password_hash": password_hash,
+        "name": f"Load Student {i}",
+        "role": "student",
+        "created_at": utcnow()
+    } for i, roll_number in enumerate(roll_numbers)])
+    return roll_numbers
+
+
+# ---------- actors ----------
+
+async def connect_socket(url: str, room: str, handlers: Dict) -> socketio.AsyncClient:
+    sio = socketio.AsyncClient(reconnection=False)
+    for event, handler in handlers.items():
+        sio.on(event, handler)
+    await sio.connect(url, transports=["websocket"])
+    await sio.emit("join_room", {"room": room})
+    return sio
+
+
+async def student(url: str, roll_number: str, menus: Dict[str, List[Dict]], orders: int, rec: Recorder,
+                  rng: random.Random, event_timeout: float) -> None:
+    async with httpx.AsyncClient(base_url=f"{url}/api", timeout=60) as client:
+        response = await rec.call(client, "POST /auth/student/login", "POST", "/auth/student/login",
+                                  json={"roll_number": roll_number, "password": STUDENT_PASSWORD})
+        if response is None:
+            return
+        body = response.json()
+        user_id = body["user"]["user_id"]
+        client.headers["Authorization"] = f"Bearer {body['token']}"
+
+        ready: Dict[str, asyncio.Event] = {}
+
+        async def on_updates(data):
+            for update in data.get("updates", []):
+                if update["status"] == "READY" and update["order_id"] in ready:
+                    rec.delivered("crew READY -> student (order_updates)", update["order_id"], "READY")
+                    ready[update["order_id"]].set()
+
+        try:
+            sio = await connect_socket(url, user_id, {"order_updates": on_updates})
+        except Exception:
+            rec.errors["socket connect"] += 1
+            return
+        try:
+            for _ in range(orders):
+                await rec.call(client, "GET /canteens", "GET", "/canteens")
+                canteen_id = rng.choice(CANTEENS)
+                await rec.call(client, "GET /menu/{canteen_id}", "GET", f"/menu/{canteen_id}")
+                await asyncio.sleep(rng.uniform(0.2, 1.0))  # browsing
+
+                picks = rng.sample(menus[canteen_id], rng.randint(1, 3))
+                items = [{"item_id": item["item_id"], "item_name": item["name"], "quantity": rng.randint(1, 2),
+                          "price_at_order": item["price"]} for item in picks]
+                total = sum(item["price_at_order"] * item["quantity"] for item in items)
+                response = await rec.call(client, "POST /orders", "POST", "/orders",
+                                          json={"items": items, "canteen_id": canteen_id, "total_amount": total})
+                if response is None:
+                    continue
+                order_id = response.json()["order_id"]
+                ready[order_id] = asyncio.Event()
+
+                rec.mark(order_id, "REQUESTED")
+                response = await rec.call(client, "POST /orders/{order_id}/verify-payment", "POST",
+                                          f"/orders/{order_id}/verify-payment",
+                                          json={"payment_id": f"pay_{uuid.uuid4().hex[:12]}", "signature": "loadtest"})
+                if response is None:
+                    continue
+                await rec.call(client, "GET /orders/my", "GET", "/orders/my")
+                try:
+                    await asyncio.wait_for(ready[order_id].wait(), event_timeout)
+                except asyncio.TimeoutError:
+                    rec.missed["crew READY -> student (order_updates)"] += 1
+                await rec.call(client, "GET /orders/my", "GET", "/orders/my")
+        finally:
+            await sio.disconnect()
+
+
+async def crew(url: str, canteen_id: str, rec: Recorder, stop: asyncio.Event, poll_seconds: float,
+               cook_seconds: float, pickup_seconds: float) -> None:
+    async with httpx.AsyncClient(base_url=f"{url}/api", timeout=60) as client:
+        response = await rec.call(client, "POST /auth/crew/login", "POST", "/auth/crew/login",
+                                  json={"email": f"loadtest-crew-{canteen_id}@campusbites.com", "password": CREW_PASSWORD})
+        if response is None:
+            return
+        client.headers["Authorization"] = f"Bearer {response.json()['token']}"
+
+        async def on_update(data):
+            if data.get("status") == "REQUESTED":
+                rec.delivered("student pays -> crew (order_update)", data["order_id"], "REQUESTED")
+
+        try:
+            sio = await connect_socket(url, canteen_id, {"order_update": on_update})
+        except Exception:
+            rec.errors["socket connect"] += 1
+            return
+        since: Dict[str, float] = {}
+        try:
+            while not stop.is_set():
+                response = await rec.call(client, "GET /orders/recent/{canteen_id}", "GET", f"/orders/recent/{canteen_id}")
+                await rec.call(client, "GET /orders/stats/{canteen_id}", "GET", f"/orders/stats/{canteen_id}")
+                await rec.call(client, "GET /orders/alerts/{canteen_id}", "GET", f"/orders/alerts/{canteen_id}")
+                orders = response.json() if response is not None else []
+                now = time.perf_counter()
+                to_ready, to_complete = [], []
+                for order in orders:
+                    order_id, status = order["order_id"], order["status"]
+                    if status == "REQUESTED":
+                        await rec.call(client, "PATCH /orders/{order_id}/status", "PATCH",
+                                       f"/orders/{order_id}/status", json={"status": "PREPARING"})
+                        since[order_id] = time.perf_counter()
+                    elif status == "PREPARING" and now - since.setdefault(order_id, now) >= cook_seconds:
+                        to_ready.append(order_id)
+                    elif status == "READY" and now - since.setdefault(order_id, now) >= pickup_seconds:
+                        to_complete.append(order_id)
+                if to_ready:
+                    for order_id in to_ready:
+                        rec.mark(order_id, "READY")
+                        since[order_id] = time.perf_counter()
+                    await rec.call(client, "POST /orders/status/bulk", "POST", "/orders/status/bulk",
+                                   json={"updates": [{"order_id": o, "status": "READY"} for o in to_ready]})
+                if to_complete:
+                    await rec.call(client, "POST /orders/status/bulk", "POST", "/orders/status/bulk",
+                                   json={"updates": [{"order_id": o, "status": "COMPLETED"} for o in to_complete]})
+                    for order_id in to_complete:
+                        since.pop(order_id, None)
+                try:
+                    await asyncio.wait_for(stop.wait(), poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await sio.disconnect()
+
+
+# ---------- server ----------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port: int) -> Tuple[uvicorn.Server, threading.Thread]:
+    """Run the ASGI app on its own event loop in a background thread"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                           log_config=None, access_log=False, lifespan="on"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        if not thread.is_alive() or time.time() > deadline:
+            raise RuntimeError("Server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+# ---------- report ----------
+
+def report(rec: Recorder, max_p95_ms: Optional[float], max_error_rate: Optional[float]) -> bool:
+    duration = rec.finished - rec.started
+    print(f"\n{'endpoint':<40} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    ok = True
+    total = errors = 0
+    for label in sorted(set(rec.latency) | set(rec.errors)):
+        samples = rec.latency[label]
+        p50, p95, p99 = percentiles(samples)
+        total += len(samples)
+        errors += rec.errors[label]
+        flag = ""
+        if max_p95_ms is not None and p95 > max_p95_ms:
+            ok, flag = False, "  <- p95 over budget"
+        print(f"{label:<40} {len(samples):>7} {len(samples) / duration:>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} "
+              f"{rec.errors[label]:>7}{flag}")
+
+    print(f"\n{'socket event':<40} {'count':>7} {'missed':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for event in sorted(set(rec.events) | set(rec.missed)):
+        p50, p95, p99 = percentiles(rec.events[event])
+        print(f"{event:<40} {len(rec.events[event]):>7} {rec.missed[event]:>8} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+
+    error_rate = errors / total if total else 0.0
+    print(f"\n{total} requests in {duration:.1f} s ({total / duration:.1f} req/s), error rate {error_rate:.2%}")
+    if max_error_rate is not None and error_rate > max_error_rate:
+        ok = False
+        print(f"Error rate over budget ({max_error_rate:.2%})")
+    return ok
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Lunch-rush load test against an in-process server")
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--orders-per-student", type=int, default=1)
+    parser.add_argument("--ramp-seconds", type=float, default=20, help="Spread student arrivals over this window")
+    parser.add_argument("--poll-seconds", type=float, default=2, help="Crew dashboard poll interval")
+    parser.add_argument("--cook-seconds", type=float, default=3, help="Simulated kitchen time before READY")
+    parser.add_argument("--pickup-seconds", type=float, default=2, help="Simulated time before pickup")
+    parser.add_argument("--event-timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="Use this database instead of a scratch one (not dropped)")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if any endpoint's p95 exceeds this")
+    parser.add_argument("--max-error-rate", type=float, help="Fail if the error rate exceeds this fraction")
+    return parser.parse_args(argv)
+
+
+async def drive(args, url: str, db) -> Recorder:
+    rec = Recorder()
+    menus = await seed(db)
+    roll_numbers = await seed_students(db, args.students)
+    rng = random.Random(args.seed)
+    stop = asyncio.Event()
+
+    crews = [asyncio.create_task(crew(url, canteen_id, rec, stop, args.poll_seconds, args.cook_seconds,
+                                      args.pickup_seconds)) for canteen_id in CANTEENS]
+
+    async def arrive(roll_number: str, delay: float):
+        await asyncio.sleep(delay)
+        await student(url, roll_number, menus, args.orders_per_student, rec,
+                      random.Random(rng.random()), args.event_timeout)
+
+    rec.started = time.perf_counter()
+    await asyncio.gather(*(arrive(roll_number, rng.uniform(0, args.ramp_seconds)) for roll_number in roll_numbers))
+    rec.finished = time.perf_counter()
+    stop.set()
+    await asyncio.gather(*crews)
+    return rec
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    from dotenv import load_dotenv
+    from pathlib import Path
+    load_dotenv(Path(__file__).parent / '.env')
+    scratch = args.db is None
+    os.environ["DB_NAME"] = args.db or f"loadtest_{uuid.uuid4().hex[:8]}"
+
+    import server  # reads MONGO_URL / DB_NAME at import
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    print(f"Booting server on {url} (database {os.environ['DB_NAME']})")
+    app_server, thread = start_server(server.socket_app, port)
+
+    async def run() -> Recorder:
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+        try:
+            print(f"Driving {args.students} students x {args.orders_per_student} orders and {len(CANTEENS)} crews...")
+            return await drive(args, url, client[os.environ["DB_NAME"]])
+        finally:
+            if scratch:
+                await client.drop_database(os.environ["DB_NAME"])
+            client.close()
+
+    try:
+        rec = asyncio.run(run())
+    finally:
+        app_server.should_exit = True
+        thread.join(timeout=10)
+    return 0 if report(rec, args.max_p95_ms, args.max_error_rate) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
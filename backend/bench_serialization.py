@@ -0,0 +1,98 @@
+"""
+Serialization benchmark: per-request encode time for a 100-item menu and a 500-order history.
+
+Compares the old path (Pydantic response_model validation + jsonable_encoder + json.dumps)
+with the orjson / TypeAdapter path the list endpoints use (their views.py ListView adapters).
+
+Usage: python bench_serialization.py [repeats]
+"""
+import json
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from serialization import encode_raw
+from views import MENU_VIEW, STUDENT_ORDER_VIEW
+
+
+def make_menu(n: int = 100) -> List[dict]:
+    return [{
+        "item_id": f"item_{i:012d}",
+        "name": f"Item {i}",
+        "canteen_id": "sopanam",
+        "price": 40.0 + i % 50,
+        "nutrition": {"calories": 300, "carbs": 40.0, "protein": 8.5, "fat": 10.0,
+                      "fiber": 3.0, "vitamins": "B1, C", "sodium": 420.0},
+        "ingredients": "Rice, lentils, spices",
+        "allergens": "None",
+        "stock_qty": 50,
+        "category": "Breakfast",
+        "image_url": "https://images.unsplash.com/photo-1589301760557-01db1b4aff85?w=500&q=80",
+        "veg_type": "veg",
+        "prep_time": 10,
+        "available": True,
+        "created_at": datetime.utcnow().isoformat()
+    } for i in range(n)]
+
+
+def make_orders(n: int = 500) -> List[dict]:
+    now = datetime.utcnow()
+    return [{
+        "order_id": f"order_{uuid.uuid4().hex[:12]}",
+        "student_id": "user_bench",
+        "items": [
+            {"item_id": "item_1", "item_name": "Masala Dosa", "quantity": 2, "price_at_order": 60.0},
+            {"item_id": "item_2", "item_name": "Filter Coffee", "quantity": 1, "price_at_order": 20.0}
+        ],
+        "item_count": 3,  # computed by the view's projection
+        "canteen_id": "sopanam",
+        "token_number": 1000000 + i,
+        "status": "COMPLETED",
+        "payment_id": None,
+        "razorpay_order_id": f"order_test_{i}",
+        "razorpay_payment_id": f"pay_{i}",
+        "total_amount": 140.0,
+        "created_at": (now - timedelta(minutes=i)).isoformat(),
+        "updated_at": (now - timedelta(minutes=i)).isoformat(),
+        "expires_at": (now - timedelta(minutes=i) + timedelta(minutes=10)).isoformat()
+    } for i in range(n)]
+
+
+def old_response_model_path(adapter: TypeAdapter, docs: List[dict]) -> bytes:
+    # FastAPI < orjson: validate into models, jsonable_encoder, then stdlib json
+    return json.dumps(jsonable_encoder(adapter.validate_python(docs))).encode("utf-8")
+
+
+def old_raw_dict_path(docs: List[dict]) -> bytes:
+    return json.dumps(jsonable_encoder(docs)).encode("utf-8")
+
+
+def report(label: str, fn, repeats: int) -> float:
+    per_call = min(timeit.repeat(fn, number=1, repeat=repeats)) * 1000
+    print(f"  {label:<42} {per_call:8.3f} ms")
+    return per_call
+
+
+def main(repeats: int = 50):
+    menu = make_menu(100)
+    orders = make_orders(500)
+    cached_menu = MENU_VIEW.encode(menu)
+
+    print("Menu (100 items):")
+    base = report("response_model + jsonable_encoder", lambda: old_response_model_path(MENU_VIEW.adapter, menu), repeats)
+    report("validated TypeAdapter.dump_json", lambda: MENU_VIEW.encode(menu), repeats)
+    cached = report("cached pre-encoded bytes", lambda: bytes(cached_menu), repeats)
+    print(f"  speedup (cached vs old): {base / max(cached, 1e-6):.0f}x")
+
+    print("Order history (500 orders):")
+    base = report("jsonable_encoder + json.dumps (raw dicts)", lambda: old_raw_dict_path(orders), repeats)
+    report("validated TypeAdapter.dump_json", lambda: STUDENT_ORDER_VIEW.encode(orders), repeats)
+    fast = report("orjson (raw dicts)", lambda: encode_raw(orders), repeats)
+    print(f"  speedup (orjson vs old): {base / max(fast, 1e-6):.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,92 @@
+"""
+Crew status benchmark: moving a batch of orders through the kitchen with one
+PATCH per order vs one POST /orders/status/bulk.
+
+Runs the real handlers against MONGO_URL with a scratch DB_NAME (the orders it
+creates are deleted afterwards) and reports wall time and socket messages sent
+per batch.
+
+Usage: MONGO_URL=mongodb://localhost:27017 DB_NAME=bench_status python bench_status_bulk.py [batch] [rounds]
+"""
+import asyncio
+import sys
+import time
+from datetime import timedelta
+
+import server
+from models import OrderStatusBulkUpdate
+from storage import utcnow
+
+CREW = {"user_id": "bench_crew", "role": "crew", "email": "bench@example.com"}
+CANTEEN_ID = "bench_canteen"
+FLOW = ["PREPARING", "READY", "COMPLETED"]
+
+
+async def seed(n: int):
+    now = utcnow()
+    orders = [{
+        "order_id": f"bench_order_{i:05d}",
+        "student_id": f"bench_student_{i % 10}",
+        "canteen_id": CANTEEN_ID,
+        "token_number": 9000 + i,
+        "status": "REQUESTED",
+        "items": [{"item_id": "bench_dosa", "item_name": "Dosa", "quantity": 1, "price_at_order": 60.0}],
+        "total_amount": 60.0,
+        "created_at": now - timedelta(minutes=n - i),
+        "updated_at": now,
+        "requested_at": now
+    } for i in range(n)]
+    await server.db.orders.delete_many({"canteen_id": CANTEEN_ID})
+    await server.db.orders.insert_many(orders)
+    return [order["order_id"] for order in orders]
+
+
+async def per_order(order_ids, status):
+    for order_id in order_ids:
+        await server.update_order_status(order_id, {"status": status}, CREW)
+
+
+async def bulk(order_ids, status):
+    batch = OrderStatusBulkUpdate(updates=[{"order_id": order_id, "status": status} for order_id in order_ids])
+    await server.bulk_update_order_status(batch, CREW)
+
+
+async def run(label, fn, n, rounds, emitted):
+    timings = []
+    for _ in range(rounds):
+        order_ids = await seed(n)
+        emitted.clear()
+        start = time.perf_counter()
+        for status in FLOW:
+            await fn(order_ids, status)
+        timings.append((time.perf_counter() - start) / len(FLOW))
+    messages = len(emitted) / len(FLOW)
+    best = min(timings)
+    print(f"  {label:<10} {best * 1000:9.2f} ms per batch  {messages:6.0f} socket messages per batch")
+    return best
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    emitted = []
+    original_emit = server.sio.emit
+
+    async def counting_emit(event, data=None, **kwargs):
+        emitted.append(event)
+        return await original_emit(event, data, **kwargs)
+
+    server.sio.emit = counting_emit
+    print(f"{n}-order batches, best of {rounds} rounds (REQUESTED -> PREPARING -> READY -> COMPLETED):")
+    try:
+        old = await run("per-order", per_order, n, rounds, emitted)
+        new = await run("bulk", bulk, n, rounds, emitted)
+    finally:
+        server.sio.emit = original_emit
+        await server.db.orders.delete_many({"canteen_id": CANTEEN_ID})
+    print(f"\nBulk speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
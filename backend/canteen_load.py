@@ -0,0 +1,113 @@
+"""
+Live load index per canteen and least-busy canteen suggestions.
+
+A snapshot is taken whenever a canteen's orders change state (and periodically, so
+the recent-throughput figure decays on an idle kitchen):
+
+    active_orders             REQUESTED + PREPARING orders
+    outstanding_units         units still to cook across them
+    outstanding_prep_minutes  those units weighted by their menu prep_time
+    recent_throughput         orders finished (READY/COMPLETED) in the last hour
+    service_rate              orders/hour the queue drains at: the historical rate for
+                              this hour of day or the recent throughput, whichever is higher
+    queue_minutes             minutes to clear the current queue at that rate
+
+Snapshots are stored in `canteen_load` (one document per canteen) so every worker
+serves the same figures on /api/canteens, and pushed to clients as `canteen_load`.
+"""
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+import numpy as np
+from eta import estimate, service_rate, ETA_MIN_THROUGHPUT
+from kitchen import DEFAULT_PREP_MINUTES, outstanding_units
+
+LOAD_REFRESH_SECONDS = int(os.environ.get('LOAD_REFRESH_SECONDS', 60))
+
+RECENT_WINDOW = timedelta(hours=1)
+
+# queue_minutes upper bounds for each level (anything above is "swamped")
+LOAD_LEVELS = [(10, "quiet"), (25, "busy")]
+
+
+def load_level(queue_minutes: float) -> str:
+    for limit, level in LOAD_LEVELS:
+        if queue_minutes < limit:
+            return level
+    return "swamped"
+
+
+def measure_load(canteen_id: str, orders: List[Dict], prep_times: Dict[str, int], throughput: np.ndarray,
+                 recent_throughput: int, now: datetime) -> Dict:
+    """Load snapshot for a canteen from its active orders"""
+    units = prep_minutes = 0
+    for order in orders:
+        for item_id, qty in outstanding_units(order).items():
+            units += qty
+            prep_minutes += qty * (prep_times.get(item_id) or DEFAULT_PREP_MINUTES)
+    rate = max(service_rate(throughput, now), float(recent_throughput))
+    queue_minutes = round(len(orders) * 60 / rate, 1)
+    return {
+        "canteen_id": canteen_id,
+        "active_orders": len(orders),
+        "outstanding_units": units,
+        "outstanding_prep_minutes": prep_minutes,
+        "recent_throughput": recent_throughput,
+        "service_rate": round(rate, 1),
+        "queue_minutes": queue_minutes,
+        "level": load_level(queue_minutes),
+        "updated_at": now
+    }
+
+
+def _name_key(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def name_pattern(names: Iterable[str]) -> str:
+    """
+    Anchored regex matching any of `names` the way _name_key compares them; use
+    with the "i" option so Mongo finds the same items rank_canteens will match.
+    """
+    alternatives = sorted({r"\s+".join(re.escape(word) for word in _name_key(name).split()) for name in names})
+    return r"^\s*(?:" + "|".join(alternatives) + r")\s*$"
+
+
+def rank_canteens(cart: Dict[str, int], menus: Dict[str, List[Dict]], loads: Dict[str, Dict],
+                  now: datetime) -> List[Dict]:
+    """
+    Rank canteens by how soon they could hand over `cart` ({item name: quantity}).
+    Items are matched by name since every canteen has its own item ids; a canteen
+    that lacks an item, has it switched off or has too little stock cannot serve
+    the cart and is ranked after the ones that can.
+    """
+    wanted = {}
+    for name, qty in cart.items():
+        first, total = wanted.get(_name_key(name), (name, 0))
+        wanted[_name_key(name)] = (first, total + qty)
+    ranked = []
+    for canteen_id, menu in menus.items():
+        by_name = {_name_key(item["name"]): item for item in menu}
+        units, prep_times, missing = {}, {}, []
+        for key, (name, qty) in wanted.items():
+            item = by_name.get(key)
+            if not item or not item.get("available", True) or item.get("stock_qty", 0) < qty:
+                missing.append(name)
+                continue
+            units[item["item_id"]] = qty
+            prep_times[item["item_id"]] = item.get("prep_time")
+
+        load = loads.get(canteen_id) or {}
+        rate = load.get("service_rate") or ETA_MIN_THROUGHPUT
+        eta = estimate(load.get("active_orders", 0), units, prep_times, rate, now)
+        ranked.append({
+            "canteen_id": canteen_id,
+            "can_serve": not missing,
+            "missing_items": missing,
+            "eta_minutes": eta["minutes"],
+            "ready_at": eta["ready_at"],
+            "load": load or None
+        })
+    ranked.sort(key=lambda c: (not c["can_serve"], len(c["missing_items"]), c["eta_minutes"], c["canteen_id"]))
+    return ranked
@@ -0,0 +1,181 @@
+"""
+Push-based delay alerts for orders in the kitchen.
+
+Every REQUESTED/PREPARING order gets one timer, due at
+
+    requested_at + prep_factor x (slowest item's prep_time) + grace_minutes
+
+where prep_factor and grace_minutes come from the canteen document
+(`delay_alert_prep_factor`, `delay_alert_grace_minutes`) or the defaults below.
+When a timer fires the alert is pushed to the canteen's crew as `order_delayed`;
+when the order leaves the kitchen its timer (or alert) is dropped.
+
+Timers live in a hierarchical timer wheel: three wheels of 64 slots with 1 s,
+64 s and 4096 s resolution. Arming and cancelling are O(1) and each tick only
+touches the slot that is due, so thousands of armed orders cost nothing between
+deadlines.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from kitchen import DEFAULT_PREP_MINUTES, ordered_units
+
+DELAY_ALERT_PREP_FACTOR = float(os.environ.get('DELAY_ALERT_PREP_FACTOR', 1.5))
+DELAY_ALERT_GRACE_MINUTES = float(os.environ.get('DELAY_ALERT_GRACE_MINUTES', 5))
+DELAY_ALERT_SYNC_SECONDS = int(os.environ.get('DELAY_ALERT_SYNC_SECONDS', 60))
+
+WHEEL_SLOTS = 64
+WHEEL_LEVELS = 3
+TICK_SECONDS = 1
+
+
+class TimerWheel:
+    """Hierarchical hashed timer wheel with integer ticks"""
+
+    def __init__(self, start_tick: int, slots: int = WHEEL_SLOTS, levels: int = WHEEL_LEVELS):
+        self.slots = slots
+        self.levels = levels
+        self.now = start_tick
+        self._wheels = [[set() for _ in range(slots)] for _ in range(levels)]
+        self._deadlines: Dict[Hashable, int] = {}
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def _place(self, key: Hashable, deadline: int) -> None:
+        delta = deadline - self.now
+        for level in range(self.levels):
+            span = self.slots ** (level + 1)
+            if delta < span or level == self.levels - 1:
+                # Beyond the top wheel's span: park in its furthest slot and re-place on cascade
+                tick = deadline if delta < span else self.now + span - 1
+                index = (tick // self.slots ** level) % self.slots
+                self._wheels[level][index].add(key)
+                self._where[key] = (level, index)
+                return
+
+    def add(self, key: Hashable, deadline: int) -> None:
+        """Arm (or re-arm) a timer; deadlines not in the future fire on the next tick"""
+        self.cancel(key)
+        deadline = max(deadline, self.now + 1)
+        self._deadlines[key] = deadline
+        self._place(key, deadline)
+
+    def cancel(self, key: Hashable) -> bool:
+        if self._deadlines.pop(key, None) is None:
+            return False
+        level, index = self._where.pop(key)
+        self._wheels[level][index].discard(key)
+        return True
+
+    def advance(self, tick: int) -> List[Hashable]:
+        """Move time forward to `tick` and return the keys whose timers fired"""
+        fired = []
+        while self.now < tick:
+            self.now += 1
+            # Cascade higher wheels whose slot just came due, top wheel first
+            for level in range(self.levels - 1, 0, -1):
+                size = self.slots ** level
+                if self.now % size == 0:
+                    index = (self.now // size) % self.slots
+                    bucket, self._wheels[level][index] = self._wheels[level][index], set()
+                    for key in bucket:
+                        self._place(key, self._deadlines[key])
+            index = self.now % self.slots
+            bucket, self._wheels[0][index] = self._wheels[0][index], set()
+            for key in bucket:
+                del self._deadlines[key]
+                del self._where[key]
+                fired.append(key)
+        return fired
+
+
+def delay_config(canteen: Optional[Dict]) -> Tuple[float, float]:
+    """(prep_factor, grace_minutes) for a canteen document"""
+    canteen = canteen or {}
+    return (
+        float(canteen.get('delay_alert_prep_factor') or DELAY_ALERT_PREP_FACTOR),
+        float(canteen.get('delay_alert_grace_minutes') or DELAY_ALERT_GRACE_MINUTES)
+    )
+
+
+def order_deadline(order: Dict, prep_times: Dict[str, int], config: Tuple[float, float]) -> datetime:
+    """When an order counts as delayed"""
+    prep_factor, grace = config
+    slowest = max((prep_times.get(item_id) or DEFAULT_PREP_MINUTES for item_id in ordered_units(order)), default=0)
+    start = order.get("requested_at") or order["created_at"]
+    return start + timedelta(minutes=prep_factor * slowest + grace)
+
+
+class DelayAlertEngine:
+    """One timer per active kitchen order; fired timers become alerts for the crew"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.wheel = TimerWheel(int(clock()) // TICK_SECONDS)
+        self._armed: Dict[str, Dict] = {}
+        self._alerts: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+        self.ready = False
+
+    def sync(self, canteen_id: str, orders: List[Dict], prep_times: Dict[str, int],
+             config: Tuple[float, float]) -> None:
+        """Reconcile timers with a canteen's current kitchen orders"""
+        current = {order["order_id"] for order in orders}
+        for order_id, info in list(self._armed.items()):
+            if info["canteen_id"] == canteen_id and order_id not in current:
+                self.wheel.cancel(order_id)
+                del self._armed[order_id]
+        alerts = self._alerts[canteen_id]
+        for order_id in [order_id for order_id in alerts if order_id not in current]:
+            del alerts[order_id]
+
+        for order in orders:
+            order_id = order["order_id"]
+            if order_id in self._armed or order_id in alerts:
+                continue
+            deadline = order_deadline(order, prep_times, config)
+            self._armed[order_id] = {
+                "order_id": order_id,
+                "canteen_id": canteen_id,
+                "token_number": order.get("token_number"),
+                "deadline": deadline
+            }
+            self.wheel.add(order_id, math.ceil(deadline.timestamp() / TICK_SECONDS))
+
+    def tick(self) -> List[Dict]:
+        """Advance the wheel to the current time and return the new alerts"""
+        now = self.clock()
+        fired = []
+        for order_id in self.wheel.advance(int(now) // TICK_SECONDS):
+            info = self._armed.pop(order_id)
+            alert = {
+                **info,
+                "fired_at": datetime.fromtimestamp(now, tz=timezone.utc),
+                "overdue_minutes": max(0, int((now - info["deadline"].timestamp()) // 60))
+            }
+            self._alerts[info["canteen_id"]][order_id] = alert
+            fired.append(alert)
+        return fired
+
+    def alerts(self, canteen_id: str) -> List[Dict]:
+        """Alerts still open for a canteen, oldest deadline first"""
+        return sorted(self._alerts[canteen_id].values(), key=lambda a: a["deadline"])
+
+    async def run(self, emit: Callable[[Dict], Awaitable]) -> None:
+        """Tick once per second and push fired alerts until cancelled"""
+        while True:
+            for alert in self.tick():
+                try:
+                    await emit(alert)
+                except Exception as e:
+                    logging.error(f"Failed to push delay alert for {alert['order_id']}: {e}")
+            await asyncio.sleep(TICK_SECONDS)
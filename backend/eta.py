@@ -0,0 +1,83 @@
+"""
+Queue-aware ready-time estimates for orders.
+
+Each canteen's kitchen is modelled as one FIFO queue drained at the canteen's
+historical throughput for the current hour of day (COMPLETED orders per hour from
+the analytics store, averaged over the days it traded). An order at queue position
+k is served once the k orders ahead of it and itself have drained, and it can never
+be ready sooner than the slowest item it still waits for:
+
+    minutes = max(longest outstanding prep_time, (k + 1) * 60 / throughput)
+
+Quiet hours show low throughput because demand was low, not because the kitchen
+is slow, so the rate is floored at ETA_MIN_THROUGHPUT orders per hour.
+
+Estimates are recomputed for the whole queue on every status transition of a
+canteen; only estimates that moved are written back to the orders.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from kitchen import DEFAULT_PREP_MINUTES, outstanding_units
+
+ETA_MIN_THROUGHPUT = float(os.environ.get('ETA_MIN_THROUGHPUT', 20))
+
+# Estimates closer than this to the stored one are not rewritten or pushed
+ETA_CHANGE_SECONDS = 60
+
+
+def hourly_throughput(store, canteen_id: str) -> np.ndarray:
+    """Average COMPLETED orders per UTC hour of day for a canteen (length 24)"""
+    days = len(store.daily_totals(canteen_id))
+    if not days:
+        return np.zeros(24)
+    return store.hour_histogram(canteen_id) / days
+
+
+def service_rate(throughput: np.ndarray, now: datetime) -> float:
+    """Orders per hour the queue drains at right now"""
+    return max(float(throughput[now.hour]), ETA_MIN_THROUGHPUT)
+
+
+def prep_minutes(item_ids: Iterable[str], prep_times: Dict[str, int]) -> int:
+    """Minutes to cook a set of items in parallel: the slowest of them"""
+    return max((prep_times.get(item_id) or DEFAULT_PREP_MINUTES for item_id in item_ids), default=0)
+
+
+def estimate(position: int, item_ids: Iterable[str], prep_times: Dict[str, int],
+             rate: float, now: datetime) -> Dict:
+    """ETA for an order with `position` orders ahead of it in the queue"""
+    minutes = max(prep_minutes(item_ids, prep_times), (position + 1) * 60 / rate)
+    minutes = int(np.ceil(minutes))
+    return {
+        "ready_at": now + timedelta(minutes=minutes),
+        "minutes": minutes,
+        "queue_position": position + 1
+    }
+
+
+def estimate_queue(orders: List[Dict], prep_times: Dict[str, int], throughput: np.ndarray,
+                   now: datetime) -> Dict[str, Dict]:
+    """ETAs for every active order of a canteen, keyed by order_id"""
+    rate = service_rate(throughput, now)
+    queue = sorted(orders, key=lambda o: (o["created_at"], o["order_id"]))
+    return {
+        order["order_id"]: estimate(position, outstanding_units(order), prep_times, rate, now)
+        for position, order in enumerate(queue)
+    }
+
+
+def changed_estimates(orders: List[Dict], estimates: Dict[str, Dict]) -> List[Dict]:
+    """Orders whose new estimate differs from the stored one (returned with `eta` replaced)"""
+    changed = []
+    for order in orders:
+        new = estimates.get(order["order_id"])
+        if new is None:
+            continue
+        old: Optional[Dict] = order.get("eta")
+        if (old and old.get("queue_position") == new["queue_position"]
+                and abs((old["ready_at"] - new["ready_at"]).total_seconds()) < ETA_CHANGE_SECONDS):
+            continue
+        changed.append({**order, "eta": new})
+    return changed
@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List
+
+# Number of documents Motor pulls per getMore and rows per emitted chunk
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Flat columns used for the CSV export
+CSV_COLUMNS = [
+    "order_id", "token_number", "canteen_id", "student_id", "status",
+    "total_amount", "item_count", "items", "created_at", "updated_at"
+]
+
+EXPORT_PROJECTION = {
+    "_id": 0,
+    "order_id": 1,
+    "token_number": 1,
+    "canteen_id": 1,
+    "student_id": 1,
+    "status": 1,
+    "items": 1,
+    "total_amount": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
+
+def _json_default(value):
+    """JSON fallback for values Mongo returns natively (datetimes)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _item_label(item: Dict) -> str:
+    name = item.get('item_name') or item.get('name') or item.get('item_id', '')
+    return f"{name} x{item.get('quantity', 1)}"
+
+
+def order_to_row(order: Dict) -> List:
+    """Flatten an order document into CSV_COLUMNS order"""
+    items = order.get('items', [])
+    created_at = order.get('created_at')
+    updated_at = order.get('updated_at')
+    return [
+        order.get('order_id'),
+        order.get('token_number'),
+        order.get('canteen_id'),
+        order.get('student_id'),
+        order.get('status'),
+        order.get('total_amount'),
+        sum(item.get('quantity', 1) for item in items),
+        "; ".join(_item_label(item) for item in items),
+        created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+        updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at
+    ]
+
+
+async def stream_ndjson(docs: AsyncIterator[Dict], chunk_rows: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Encode documents as newline-delimited JSON, one chunk per `chunk_rows` documents"""
+    lines = []
+    async for doc in docs:
+        lines.append(json.dumps(doc, default=_json_default, separators=(",", ":")))
+        if len(lines) >= chunk_rows:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def stream_csv(docs: AsyncIterator[Dict], chunk_rows: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Encode documents as CSV with a header row, one chunk per `chunk_rows` documents"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    rows = 0
+    async for doc in docs:
+        writer.writerow(order_to_row(doc))
+        rows += 1
+        if rows >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def build_export_query(start_date=None, end_date=None, canteen_id=None, statuses: Iterable[str] = None) -> Dict:
+    """Build the orders filter for an export (dates are inclusive start, exclusive end)"""
+    query = {}
+    if canteen_id:
+        query["canteen_id"] = canteen_id
+    if statuses:
+        query["status"] = {"$in": list(statuses)}
+    created_range = {}
+    if start_date:
+        created_range["$gte"] = start_date
+    if end_date:
+        created_range["$lt"] = end_date
+    if created_range:
+        query["created_at"] = created_range
+    return query
@@ -0,0 +1,130 @@
+"""
+Demand forecasting per (canteen, item, hour-of-week).
+
+Each series is the quantity sold in one hour-of-week slot over the last few complete
+weeks. Every slot is smoothed independently with simple exponential smoothing
+(oldest week first), which gives a seasonal baseline for the next occurrence of that
+slot. All series are built and smoothed at once with NumPy over the columnar
+analytics store; nothing iterates over orders.
+
+The scheduled job writes one document per canteen to `demand_forecasts`.
+"""
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+from storage import utcnow
+
+FORECAST_ALPHA = float(os.environ.get('FORECAST_ALPHA', 0.5))
+FORECAST_HORIZON_HOURS = 24
+FORECAST_TOP_ITEMS = 10
+FORECAST_MAX_WEEKS = 8
+FORECAST_INTERVAL_SECONDS = int(os.environ.get('FORECAST_INTERVAL_SECONDS', 1800))
+
+HOURS_PER_WEEK = 168
+
+
+def seasonal_history(series: np.ndarray, ts: np.ndarray, weights: np.ndarray,
+                     n_series: int, now_hour: int, weeks: int) -> np.ndarray:
+    """
+    Bucket events into a (weeks, n_series, 168) array, week 0 being the most recent
+    168 complete hours. The current (partial) hour and anything older than `weeks`
+    weeks is ignored.
+    """
+    hour = ts // 3600
+    age = now_hour - hour
+    week = (age - 1) // HOURS_PER_WEEK
+    keep = (age >= 1) & (week < weeks)
+    flat = (week[keep] * n_series + series[keep]) * HOURS_PER_WEEK + hour[keep] % HOURS_PER_WEEK
+    counts = np.bincount(flat, weights=weights[keep], minlength=weeks * n_series * HOURS_PER_WEEK)
+    return counts.reshape(weeks, n_series, HOURS_PER_WEEK)
+
+
+def smooth(history: np.ndarray, alpha: float = FORECAST_ALPHA) -> np.ndarray:
+    """Exponentially smooth every (series, slot) across weeks, oldest first"""
+    level = history[-1].astype(float)
+    for week in range(len(history) - 2, -1, -1):
+        level = alpha * history[week] + (1 - alpha) * level
+    return level
+
+
+def _weeks_of_history(ts: np.ndarray, now_hour: int) -> int:
+    if not len(ts):
+        return 0
+    oldest_age = now_hour - int(ts.min()) // 3600
+    return int(min(FORECAST_MAX_WEEKS, max(1, oldest_age // HOURS_PER_WEEK)))
+
+
+def build_forecasts(store, now: Optional[datetime] = None, horizon: int = FORECAST_HORIZON_HOURS,
+                    top: int = FORECAST_TOP_ITEMS, alpha: float = FORECAST_ALPHA) -> List[Dict]:
+    """Forecast the next `horizon` hours for every canteen in the analytics store"""
+    now = now or utcnow()
+    now_hour = int(now.timestamp()) // 3600
+    canteens = store.canteen_ids
+    item_ids, item_names = store.item_ids, store.item_names
+    n_canteens, n_items = len(canteens), len(item_ids)
+
+    order_canteen, order_ts = store.order_events()
+    weeks = _weeks_of_history(order_ts, now_hour)
+    if not weeks or not n_items:
+        return []
+
+    item_canteen, item_ts, item_code, item_qty = store.item_events()
+    item_series = item_canteen.astype(np.int64) * n_items + item_code
+    item_level = smooth(seasonal_history(item_series, item_ts, item_qty, n_canteens * n_items, now_hour, weeks), alpha)
+    item_level = item_level.reshape(n_canteens, n_items, HOURS_PER_WEEK)
+
+    order_level = smooth(seasonal_history(
+        order_canteen.astype(np.int64), order_ts, np.ones(len(order_ts)), n_canteens, now_hour, weeks
+    ), alpha)
+
+    # Slots of the forecast hours, starting with the current one
+    hours = now_hour + np.arange(horizon)
+    slots = hours % HOURS_PER_WEEK
+    generated_at = utcnow()
+
+    forecasts = []
+    for c, canteen_id in enumerate(canteens):
+        demand = item_level[c][:, slots]  # (items, horizon)
+        ranked = np.argsort(-demand, axis=0, kind="stable")[:top]
+        forecasts.append({
+            "canteen_id": canteen_id,
+            "generated_at": generated_at,
+            "weeks_of_history": weeks,
+            "alpha": alpha,
+            "hours": [{
+                "hour_start": datetime.fromtimestamp(int(hours[h]) * 3600, tz=timezone.utc),
+                "expected_orders": round(float(order_level[c, slots[h]]), 1),
+                "items": [{
+                    "item_id": item_ids[i],
+                    "item_name": item_names[i],
+                    "quantity": round(float(demand[i, h]), 1)
+                } for i in ranked[:, h].tolist() if demand[i, h] >= 0.05]
+            } for h in range(horizon)],
+            # Total demand per item over the horizon (for stock checks)
+            "horizon_totals": {
+                item_ids[i]: round(float(total), 1)
+                for i, total in enumerate(demand.sum(axis=1).tolist()) if total >= 0.05
+            }
+        })
+    return forecasts
+
+
+async def refresh_forecasts(db, store) -> int:
+    """Scheduled job: recompute forecasts from the analytics store and persist them"""
+    if store.watermark is None:
+        await store.refresh(db)
+    forecasts = build_forecasts(store)
+    for forecast in forecasts:
+        await db.demand_forecasts.replace_one({"canteen_id": forecast["canteen_id"]}, forecast, upsert=True)
+    if forecasts:
+        logging.info(f"Refreshed demand forecasts for {len(forecasts)} canteens")
+    return len(forecasts)
+
+
+def trim_forecast(forecast: Dict, hours: int) -> Dict:
+    """Drop elapsed hours and keep the next `hours` of a stored forecast"""
+    current_hour = utcnow().replace(minute=0, second=0, microsecond=0)
+    upcoming = [h for h in forecast.get("hours", []) if h["hour_start"] >= current_hour]
+    return {**forecast, "hours": upcoming[:hours]}
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, Hashable
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from storage import utcnow
+
+# Identifies this process when it holds a job lease
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+async def acquire_lease(db, name: str, ttl_seconds: int) -> bool:
+    """
+    Take (or renew) the named lease in `job_locks` for `ttl_seconds`.
+    Only one worker across all uvicorn processes holds a lease at a time.
+    """
+    now = utcnow()
+    try:
+        doc = await db.job_locks.find_one_and_update(
+            {"_id": name, "$or": [{"locked_until": {"$lt": now}}, {"owner": WORKER_ID}]},
+            {"$set": {"owner": WORKER_ID, "locked_until": now + timedelta(seconds=ttl_seconds)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Another worker holds an unexpired lease (the upsert collided with its document)
+        return False
+    return doc is not None and doc.get("owner") == WORKER_ID
+
+
+async def run_periodically(db, name: str, interval_seconds: int, job: Callable[[], Awaitable]):
+    """Run `job` every `interval_seconds` on whichever worker holds the lease"""
+    while True:
+        try:
+            if await acquire_lease(db, name, ttl_seconds=interval_seconds):
+                await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Scheduled job '{name}' failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+async def run_every(name: str, interval_seconds: int, job: Callable[[], Awaitable]):
+    """Run `job` every `interval_seconds` in this worker (no lease: per-process state)"""
+    while True:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Scheduled job '{name}' failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+class Debouncer:
+    """
+    Coalesce bursts of calls per key: the first call schedules `job(key)` after
+    `delay_seconds`, and further calls for that key before it starts are absorbed.
+    A call made while the job is running schedules one more run, so the last
+    change is always picked up.
+    """
+
+    def __init__(self, name: str, delay_seconds: float, job: Callable[[Hashable], Awaitable]):
+        self.name = name
+        self.delay = delay_seconds
+        self.job = job
+        self._scheduled: Dict[Hashable, asyncio.Task] = {}
+        self._running: set = set()
+
+    def __call__(self, key: Hashable) -> None:
+        if key not in self._scheduled:
+            task = asyncio.create_task(self._run(key))
+            self._scheduled[key] = task
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: Hashable) -> None:
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._scheduled.pop(key, None)
+        try:
+            await self.job(key)
+        except Exception as e:
+            logging.error(f"Debounced job '{self.name}' failed for {key}: {e}")
+
+    async def drain(self) -> None:
+        """Wait for every scheduled and running job (tests, shutdown)"""
+        while self._running:
+            await asyncio.gather(*list(self._running), return_exceptions=True)
@@ -0,0 +1,148 @@
+"""
+Kitchen batch-prep scheduling.
+
+Outstanding units per item are summed across a canteen's REQUESTED/PREPARING orders
+and cut into prep batches, so the kitchen cooks ten Masala Dosas once instead of
+ten times. Orders record what has been cooked for them in `prepared`
+({item_id: units}); completing a batch hands its units to the oldest orders first
+and an order is READY once nothing is outstanding.
+"""
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+# Orders the kitchen still has to cook for
+KITCHEN_STATUSES = ["REQUESTED", "PREPARING"]
+
+# Largest number of identical units cooked in one batch
+MAX_BATCH_SIZE = int(os.environ.get('KITCHEN_MAX_BATCH', 8))
+
+# Used for items without a menu prep_time
+DEFAULT_PREP_MINUTES = 10
+
+# Status transitions of one canteen within this window share one board / ETA / load refresh
+KITCHEN_UPDATE_DEBOUNCE_MS = float(os.environ.get('KITCHEN_UPDATE_DEBOUNCE_MS', 250))
+
+KITCHEN_PROJECTION = {
+    "_id": 0,
+    "order_id": 1,
+    "token_number": 1,
+    "student_id": 1,
+    "canteen_id": 1,
+    "status": 1,
+    "created_at": 1,
+    "requested_at": 1,
+    "items.item_id": 1,
+    "items.item_name": 1,
+    "items.quantity": 1,
+    "prepared": 1,
+    "eta": 1
+}
+
+
+def ordered_units(order: Dict) -> Dict[str, int]:
+    """Units ordered per item (lines of the same item are added up)"""
+    units = defaultdict(int)
+    for item in order.get("items", []):
+        units[item["item_id"]] += item.get("quantity", 1)
+    return dict(units)
+
+
+def outstanding_units(order: Dict) -> Dict[str, int]:
+    """Units per item still to be cooked for this order"""
+    prepared = order.get("prepared") or {}
+    remaining = {item_id: qty - prepared.get(item_id, 0) for item_id, qty in ordered_units(order).items()}
+    return {item_id: qty for item_id, qty in remaining.items() if qty > 0}
+
+
+def _wait_minutes(order: Dict, now: datetime) -> int:
+    return max(0, int((now - order["created_at"]).total_seconds() // 60))
+
+
+def build_board(canteen_id: str, orders: List[Dict], prep_times: Dict[str, int], now: datetime,
+                max_batch: int = MAX_BATCH_SIZE) -> Dict:
+    """
+    Production board for a canteen: outstanding units per item and the prep batches.
+    Batches are ranked by (oldest wait + prep time) - the minutes until the longest-waiting
+    customer in the batch is served if the batch starts now - so old orders and slow
+    dishes go first.
+    """
+    orders = sorted(orders, key=lambda o: (o["created_at"], o["order_id"]))
+    names, queues = {}, defaultdict(list)
+    for order in orders:
+        for item in order.get("items", []):
+            names.setdefault(item["item_id"], item.get("item_name", item["item_id"]))
+        for item_id, units in outstanding_units(order).items():
+            queues[item_id].append((order, units))
+
+    items, batches = [], []
+    for item_id, queue in queues.items():
+        prep_time = prep_times.get(item_id) or DEFAULT_PREP_MINUTES
+        items.append({
+            "item_id": item_id,
+            "item_name": names[item_id],
+            "outstanding": sum(units for _, units in queue),
+            "orders": len(queue),
+            "prep_time": prep_time,
+            "oldest_wait_minutes": _wait_minutes(queue[0][0], now)
+        })
+
+        # Cut the FIFO queue of units into batches of at most max_batch units
+        batch, size = [], 0
+        for order, units in queue:
+            while units:
+                take = min(units, max_batch - size)
+                batch.append((order, take))
+                size += take
+                units -= take
+                if size == max_batch:
+                    batches.append((item_id, prep_time, batch))
+                    batch, size = [], 0
+        if batch:
+            batches.append((item_id, prep_time, batch))
+
+    board_batches = []
+    for item_id, prep_time, batch in batches:
+        oldest_wait = _wait_minutes(batch[0][0], now)
+        board_batches.append({
+            "item_id": item_id,
+            "item_name": names[item_id],
+            "quantity": sum(take for _, take in batch),
+            "prep_time": prep_time,
+            "oldest_wait_minutes": oldest_wait,
+            "priority": oldest_wait + prep_time,
+            "orders": [
+                {"order_id": o["order_id"], "token_number": o.get("token_number"), "quantity": take}
+                for o, take in batch
+            ]
+        })
+    board_batches.sort(key=lambda b: (-b["priority"], b["item_name"]))
+    for position, batch in enumerate(board_batches, start=1):
+        batch["position"] = position
+
+    items.sort(key=lambda i: (-i["outstanding"], i["item_name"]))
+    return {
+        "canteen_id": canteen_id,
+        "generated_at": now.isoformat(),
+        "active_orders": len(orders),
+        "items": items,
+        "batches": board_batches
+    }
+
+
+def allocate_units(orders: List[Dict], item_id: str, quantity: int) -> Tuple[List[Tuple[Dict, int]], int]:
+    """
+    Hand `quantity` cooked units of `item_id` to the oldest orders still waiting for it.
+    Returns [(order, units)] and the units nobody was waiting for.
+    """
+    allocations = []
+    for order in sorted(orders, key=lambda o: (o["created_at"], o["order_id"])):
+        if not quantity:
+            break
+        take = min(quantity, outstanding_units(order).get(item_id, 0))
+        if take:
+            allocations.append((order, take))
+            quantity -= take
+    return allocations, quantity
+
@@ -0,0 +1,81 @@
+"""
+Gym Freak Mode: 0/1 knapsack over menu protein.
+
+Pure function behind POST /recommendations/protein-knapsack, kept out of the
+endpoint so it can be tested and benchmarked without Mongo.
+"""
+from typing import Dict, Iterable, List, Optional
+
+# Cap the target to avoid memory explosion if a user enters a huge number
+MAX_PROTEIN_GOAL = 2000
+
+
+def protein_candidates(items_db: Iterable[Dict], excluded: Optional[set] = None) -> List[Dict]:
+    """Menu items with a positive (integer gram) protein value, minus the excluded ones"""
+    excluded = excluded or set()
+    items = []
+    for i in items_db:
+        if i['item_id'] in excluded:
+            continue
+        try:
+            p = int(round(i['nutrition']['protein']))
+            if p > 0:
+                items.append({
+                    "name": i['name'],
+                    "protein": p,
+                    "id": i['item_id'],
+                    "canteen_id": i['canteen_id'],
+                    "price": i['price'],
+                    "image_url": i['image_url']
+                })
+        except (KeyError, TypeError):
+            continue
+    return items
+
+
+def protein_combo(items_db: Iterable[Dict], protein_goal: float, excluded: Optional[set] = None) -> Dict:
+    """
+    Maximize total protein <= protein_goal with each item used at most once.
+    """
+    target = min(int(protein_goal), MAX_PROTEIN_GOAL)
+    items = protein_candidates(items_db, excluded)
+    n = len(items)
+
+    # K[i][w] = max protein using the first i items with limit w (2D for the traceback)
+    K = [[0 for w in range(target + 1)] for i in range(n + 1)]
+
+    for i in range(n + 1):
+        for w in range(target + 1):
+            if i == 0 or w == 0:
+                K[i][w] = 0
+            elif items[i-1]['protein'] <= w:
+                val = items[i-1]['protein']
+                K[i][w] = max(val + K[i-1][w-val], K[i-1][w])
+            else:
+                K[i][w] = K[i-1][w]
+
+    result_protein = K[n][target]
+
+    # Traceback to find the selected items
+    selected_items = []
+    w = target
+    for i in range(n, 0, -1):
+        if result_protein <= 0:
+            break
+        if result_protein == K[i-1][w]:
+            continue
+        item = items[i-1]
+        selected_items.append(item)
+        result_protein -= item['protein']
+        w -= item['protein']
+
+    total_protein = sum(item['protein'] for item in selected_items)
+    status = "Exact Match" if total_protein == target else "Nearest Possible"
+
+    return {
+        "selectedItems": [item['name'] for item in selected_items],
+        "selectedItemsDetails": selected_items,  # Full details for UI
+        "totalProtein": total_protein,
+        "status": status,
+        "target": target
+    }
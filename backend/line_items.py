@@ -0,0 +1,78 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List
+
+# Canonical stored line item:
+#   {"item_id": str, "item_name": str, "quantity": int,
+#    "price_at_order": float, "unit_price_paise": int}
+# `unit_price_paise` is what aggregations read; `item_name` / `price_at_order`
+# stay on the document because the API (OrderItem) and the clients expose them.
+
+
+def to_paise(rupees: Any) -> int:
+    """Convert a rupee amount to integer paise, rounding half up"""
+    return int((Decimal(str(rupees or 0)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_paise(paise: int) -> float:
+    return paise / 100
+
+
+def normalize_line_item(item: Dict) -> Dict:
+    """Map any historical line-item shape ({name, price} or OrderItem) onto the canonical one"""
+    if "unit_price_paise" in item:
+        unit_paise = int(item["unit_price_paise"])
+    else:
+        unit_paise = to_paise(item.get("price_at_order", item.get("price", 0)))
+    # Default only a missing quantity: an explicit 0 is kept for the validator to reject
+    quantity = item.get("quantity", item.get("qty"))
+    return {
+        "item_id": item.get("item_id") or "",
+        "item_name": item.get("item_name") or item.get("name") or "",
+        "quantity": 1 if quantity is None else int(quantity),
+        "price_at_order": from_paise(unit_paise),
+        "unit_price_paise": unit_paise
+    }
+
+
+def normalize_items(items: List[Dict]) -> List[Dict]:
+    return [normalize_line_item(item) for item in items or []]
+
+
+def items_total_paise(items: List[Dict]) -> int:
+    return sum(item["unit_price_paise"] * item["quantity"] for item in items)
+
+
+# $jsonSchema validator applied to `orders` and `bills` (validationLevel "moderate",
+# so legacy documents are only checked once they are updated)
+LINE_ITEM_SCHEMA = {
+    "bsonType": "object",
+    "required": ["item_id", "item_name", "quantity", "unit_price_paise"],
+    "properties": {
+        "item_id": {"bsonType": "string"},
+        "item_name": {"bsonType": "string"},
+        "quantity": {"bsonType": ["int", "long"], "minimum": 1},
+        "price_at_order": {"bsonType": ["double", "int", "long", "decimal"]},
+        "unit_price_paise": {"bsonType": ["int", "long"], "minimum": 0}
+    }
+}
+
+ORDERS_VALIDATOR = {
+    "$jsonSchema": {
+        "bsonType": "object",
+        "required": ["order_id", "items", "canteen_id", "status"],
+        "properties": {
+            "items": {"bsonType": "array", "items": LINE_ITEM_SCHEMA},
+            "total_paise": {"bsonType": ["int", "long"], "minimum": 0}
+        }
+    }
+}
+
+BILLS_VALIDATOR = {
+    "$jsonSchema": {
+        "bsonType": "object",
+        "required": ["bill_id", "order_id", "items"],
+        "properties": {
+            "items": {"bsonType": "array", "items": LINE_ITEM_SCHEMA}
+        }
+    }
+}
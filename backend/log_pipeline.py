@@ -0,0 +1,233 @@
+"""
+Non-blocking structured logging.
+
+Records are put on a bounded in-memory queue by a QueueHandler on the event loop
+thread and written by a QueueListener thread, so a slow stdout or disk never
+stalls request handling. When the queue is full records are dropped instead of
+blocking; drops are counted in `log_records_dropped_total` and reported by a
+WARNING record as soon as the queue has room again. The listener writes one JSON object per line (or the old
+text format with LOG_FORMAT=text).
+
+Chatty loggers are tamed per logger name (longest prefix wins) before anything
+is queued:
+  LOG_SAMPLE_RATES="access=0.1"          keep 10% of access lines
+  LOG_RATE_LIMITS="server.crew=20"       at most 20 records/s, the rest are counted
+WARNING and above are never sampled or rate limited.
+
+uvicorn's own loggers are routed through the same queue (run it with
+log_config=None so it does not install its stdout handlers again).
+
+Every record carries the request id of the HTTP request it was logged under
+(`request_id_var`, set by the request middleware).
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+import orjson
+from metrics import LOG_RECORDS_DROPPED
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+DEFAULT_SAMPLE_RATES = {}
+DEFAULT_RATE_LIMITS = {"server.crew": 20.0, "server.socket": 20.0, "server.dbprofile": 5.0}
+
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
+def parse_rules(spec: Optional[str], defaults: Dict[str, float]) -> Dict[str, float]:
+    """'name=value,name=value' -> {name: value}, layered over the defaults"""
+    rules = dict(defaults)
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            rules[name.strip()] = float(value)
+    return rules
+
+
+def _rule_for(name: str, rules: Dict[str, float]) -> Optional[Tuple[str, float]]:
+    """Longest configured logger-name prefix of `name`"""
+    while True:
+        if name in rules:
+            return name, rules[name]
+        if "." not in name:
+            return None
+        name = name.rsplit(".", 1)[0]
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Per-logger probabilistic sampling and token-bucket rate limits below WARNING"""
+
+    def __init__(self, sample_rates: Dict[str, float], rate_limits: Dict[str, float],
+                 clock=time.monotonic, rng: Optional[random.Random] = None):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_limits = rate_limits
+        self.clock = clock
+        self.random = (rng or random.Random()).random
+        self._buckets: Dict[str, list] = {}  # rule -> [tokens, last refill]
+        self.suppressed: Dict[str, int] = {}
+        self._cache: Dict[str, Tuple] = {}
+
+    def _rules(self, name: str) -> Tuple:
+        rules = self._cache.get(name)
+        if rules is None:
+            rules = self._cache[name] = (_rule_for(name, self.sample_rates), _rule_for(name, self.rate_limits))
+        return rules
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        sample, limit = self._rules(record.name)
+        if sample is not None and self.random() >= sample[1]:
+            return False
+        if limit is not None:
+            key, rate = limit
+            now = self.clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [rate, now]
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return False
+            bucket[0] -= 1
+            dropped = self.suppressed.pop(key, 0)
+            if dropped:
+                record.suppressed = dropped
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args into the message here (cheap) but leave JSON formatting to the listener thread
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self._unreported:
+                self.queue.put_nowait(self._drop_report(record))
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+            LOG_RECORDS_DROPPED.inc()
+
+    def _drop_report(self, record: logging.LogRecord) -> logging.LogRecord:
+        report = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f"Log queue full: dropped {self._unreported} records", None, None
+        )
+        report.dropped = self._unreported
+        report.request_id = getattr(record, "request_id", "-")
+        report.message = report.msg
+        return report
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-")
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_lock = threading.Lock()
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None,
+                  sample_rates: Optional[Dict[str, float]] = None,
+                  rate_limits: Optional[Dict[str, float]] = None) -> DroppingQueueHandler:
+    """Route the root logger through the queue pipeline (idempotent; later calls reconfigure)"""
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+        target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        handler.addFilter(SamplingFilter(
+            sample_rates if sample_rates is not None else parse_rules(os.environ.get('LOG_SAMPLE_RATES'), DEFAULT_SAMPLE_RATES),
+            rate_limits if rate_limits is not None else parse_rules(os.environ.get('LOG_RATE_LIMITS'), DEFAULT_RATE_LIMITS)
+        ))
+        handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        # uvicorn's log config gives its loggers their own stdout handlers (propagate off),
+        # which would write on the event loop thread; send them through the queue instead
+        for name in UVICORN_LOGGERS:
+            server_logger = logging.getLogger(name)
+            for existing in list(server_logger.handlers):
+                server_logger.removeHandler(existing)
+            server_logger.propagate = True
+
+        _listener = logging.handlers.QueueListener(handler.queue, target, respect_handler_level=True)
+        _listener.start()
+        _queue_handler = handler
+        return handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records (called at exit)"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
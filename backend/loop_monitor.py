@@ -0,0 +1,196 @@
+"""
+Event-loop health: scheduling lag and who blocked the loop.
+
+A heartbeat task sleeps LOOP_MONITOR_INTERVAL_MS at a time and records how late
+it wakes up (the scheduling lag every other coroutine on the loop sees) in the
+`event_loop_lag_seconds` histogram.
+
+A watchdog thread checks the heartbeat. When it has been silent for longer than
+LOOP_BLOCK_THRESHOLD_MS the loop is blocked right now, so the watchdog captures
+the loop thread's stack (from the callback the loop is running) while the
+blocking call is still on it. The stall is attributed to
+  - the handler: the outermost application frame (e.g. `server.protein_knapsack`)
+  - the blocking frame: the innermost application frame (e.g. `auth_utils.verify_password`)
+and its length is filled in when the heartbeat comes back. Offenders are
+aggregated by (handler, blocking frame) for /management/loop-health.
+
+Only one capture is taken per stall, so a stall made of several slow callbacks
+in a row is attributed to the one running when the threshold was crossed.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+import numpy as np
+from metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+from request_profiler import is_loop_callback
+
+LOOP_MONITOR_INTERVAL_MS = float(os.environ.get('LOOP_MONITOR_INTERVAL_MS', 50))
+LOOP_BLOCK_THRESHOLD_MS = float(os.environ.get('LOOP_BLOCK_THRESHOLD_MS', 100))
+
+# Lag samples kept for the percentiles in the report (~1 minute at the default interval)
+RECENT_LAGS = 1200
+RECENT_STALLS = 20
+MAX_OFFENDERS = 200
+MAX_STACK = 64
+
+APP_ROOT = Path(__file__).resolve().parent
+# Our own plumbing is never "the handler"
+INFRA_MODULES = {"loop_monitor", "metrics", "request_profiler", "query_profiler", "log_pipeline"}
+
+loop_logger = logging.getLogger("server.loop")
+
+
+class LoopMonitor:
+    def __init__(self, interval_ms: float = LOOP_MONITOR_INTERVAL_MS,
+                 threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS, app_root: Path = APP_ROOT):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.app_root = str(app_root)
+        self.lags: Deque[float] = deque(maxlen=RECENT_LAGS)
+        self.recent: Deque[Dict] = deque(maxlen=RECENT_STALLS)
+        self.offenders: Dict[Tuple[str, str], Dict] = {}
+        self.stalls = 0
+        self._last_beat = time.monotonic()
+        self._pending: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._loop_thread: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+
+    def _is_app_frame(self, frame) -> bool:
+        filename = frame.f_code.co_filename
+        return filename.startswith(self.app_root) and Path(filename).stem not in INFRA_MODULES
+
+    def capture(self, frame) -> Dict:
+        """Handler, blocking frame and stack (outermost first) of a blocked thread"""
+        stack = []
+        while frame is not None and not is_loop_callback(frame):
+            stack.append(frame)
+            frame = frame.f_back
+        stack.reverse()
+        app_frames = [f for f in stack if self._is_app_frame(f)]
+        handler = self._label(app_frames[0]) if app_frames else "?"
+        blocking = app_frames[-1] if app_frames else (stack[-1] if stack else None)
+        return {
+            "handler": handler,
+            "blocking_frame": f"{self._label(blocking)}:{blocking.f_lineno}" if blocking else "?",
+            "stack": [f"{self._label(f)}:{f.f_lineno}" for f in stack[-MAX_STACK:]]
+        }
+
+    @staticmethod
+    def _label(frame) -> str:
+        code = frame.f_code
+        return f"{Path(code.co_filename).stem}.{getattr(code, 'co_qualname', code.co_name)}"
+
+    def start(self) -> asyncio.Task:
+        """Start the heartbeat on the running loop and the watchdog thread"""
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+        return asyncio.create_task(self._heartbeat())
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def _heartbeat(self) -> None:
+        try:
+            while True:
+                before = time.monotonic()
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                self.beat(now - before - self.interval, now)
+        finally:
+            self.stop()
+
+    def beat(self, lag: float, now: float) -> None:
+        lag = max(0.0, lag)
+        self._last_beat = now
+        self.lags.append(lag)
+        EVENT_LOOP_LAG.observe(lag)
+        with self._lock:
+            stall, self._pending = self._pending, None
+        if stall is not None:
+            self._finish_stall(stall, lag)
+
+    def _finish_stall(self, stall: Dict, lag: float) -> None:
+        stall["blocked_ms"] = round(lag * 1000, 1)
+        key = (stall["handler"], stall["blocking_frame"])
+        with self._lock:
+            self.stalls += 1
+            self.recent.append(stall)
+            offender = self.offenders.get(key)
+            if offender is None and len(self.offenders) < MAX_OFFENDERS:
+                offender = self.offenders[key] = {
+                    "handler": stall["handler"], "blocking_frame": stall["blocking_frame"],
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0
+                }
+            if offender is not None:
+                offender["count"] += 1
+                offender["total_ms"] += stall["blocked_ms"]
+                offender["max_ms"] = max(offender["max_ms"], stall["blocked_ms"])
+                offender["last_seen"] = stall["at"]
+                offender["stack"] = stall["stack"]
+        EVENT_LOOP_STALLS.inc(stall["handler"])
+        loop_logger.warning(
+            "Event loop blocked %.0f ms in %s at %s", stall["blocked_ms"], stall["handler"], stall["blocking_frame"],
+            extra={"blocked_ms": stall["blocked_ms"], "handler": stall["handler"],
+                   "blocking_frame": stall["blocking_frame"]}
+        )
+
+    def check(self, now: float) -> Optional[Dict]:
+        """Capture the loop thread's stack if the heartbeat is overdue (once per stall)"""
+        if now - self._last_beat < self.interval + self.threshold or self._pending is not None:
+            return None
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+        stall = self.capture(frame)
+        stall["at"] = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            # The heartbeat may have come back while we walked the stack
+            if self._pending is None and time.monotonic() - self._last_beat >= self.interval + self.threshold:
+                self._pending = stall
+        return stall
+
+    def _watch(self) -> None:
+        period = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(period):
+            try:
+                self.check(time.monotonic())
+            except Exception:
+                # Frames change under us while the loop runs on; try again next tick
+                continue
+
+    def report(self, limit: int = 10) -> Dict:
+        lags = np.fromiter(self.lags, dtype=float) * 1000
+        if lags.size:
+            p50, p99 = np.percentile(lags, [50, 99])
+            lag = {"p50_ms": round(float(p50), 2), "p99_ms": round(float(p99), 2), "max_ms": round(float(lags.max()), 2)}
+        else:
+            lag = {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        with self._lock:
+            offenders = sorted((dict(o) for o in self.offenders.values()), key=lambda o: o["total_ms"], reverse=True)
+            recent = list(self.recent)
+        for offender in offenders:
+            offender["total_ms"] = round(offender["total_ms"], 1)
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag": lag,
+            "stalls": self.stalls,
+            "offenders": offenders[:limit],
+            "recent": [{k: v for k, v in stall.items() if k != "stack"} for stall in reversed(recent)]
+        }
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,162 @@
+"""
+Bulk menu import: upserts, price changes, stock levels and availability toggles
+for many items in one request.
+
+Rows come from a JSON array (or {"items": [...]}) or a CSV file whose header
+names the fields to change; empty cells are left alone and nutrition columns
+are written as `nutrition.calories`, `nutrition.protein`, ... Each row is keyed
+by `item_id`, or by `canteen_id` + `name` for items that may not exist yet;
+key columns only identify the item and are never changed by an import (a row
+keyed by item_id may only name its canteen and name when it creates the item).
+A row carrying every MenuItemCreate field (and every nutrition value) may create
+the item; any other row only updates an existing one, and only the nutrition
+values it carries are changed. Every row becomes one UpdateOne in a single
+unordered bulk_write, and problems are reported per row instead of failing
+the whole import.
+"""
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from pydantic import TypeAdapter, ValidationError
+from pymongo import UpdateOne
+from models import MenuBulkRow, MenuItemCreate, MenuItemUpdate, Nutrition
+
+MENU_IMPORT_MAX_ROWS = int(os.environ.get('MENU_IMPORT_MAX_ROWS', 2000))
+
+ROW_ADAPTER = TypeAdapter(MenuBulkRow)
+
+# Fields a new item needs; rows with fewer can only update
+CREATE_FIELDS = set(MenuItemCreate.model_fields)
+
+# What crew may change (same as PATCH /menu/{item_id})
+CREW_FIELDS = set(MenuItemUpdate.model_fields)
+
+KEY_FIELDS = {"item_id", "canteen_id", "name"}
+
+NUTRITION_FIELDS = set(Nutrition.model_fields)
+
+
+def parse_rows(body: bytes, content_type: str) -> List[Dict]:
+    """Raw row dicts from a JSON or CSV request body; raises ValueError on a malformed body"""
+    text = body.decode("utf-8-sig")
+    if "csv" in (content_type or ""):
+        try:
+            return _csv_rows(text)
+        except csv.Error as e:
+            raise ValueError(f"Malformed CSV: {e}") from e
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of items or {\"items\": [...]}")
+    return data
+
+
+def _csv_rows(text: str) -> List[Dict]:
+    rows = []
+    for record in csv.DictReader(io.StringIO(text)):
+        row = {}
+        for column, value in record.items():
+            if column is None or value is None or not value.strip():
+                continue
+            if "." in column:
+                parent, child = column.split(".", 1)
+                row.setdefault(parent.strip(), {})[child.strip()] = value.strip()
+            else:
+                row[column.strip()] = value.strip()
+        rows.append(row)
+    return rows
+
+
+def _row_error(index: int, message: str, row: Optional[MenuBulkRow] = None) -> Dict:
+    error = {"row": index, "error": message}
+    if row is not None:
+        error["item_id"] = row.item_id
+        error["name"] = row.name
+    return error
+
+
+def validate_rows(raw_rows: List, allowed_fields: Optional[Set[str]] = None) -> Tuple[List[Tuple[int, MenuBulkRow]], List[Dict]]:
+    """(valid rows with their positions, per-row errors); `allowed_fields` limits what may change"""
+    rows, errors = [], []
+    for index, raw in enumerate(raw_rows):
+        try:
+            row = ROW_ADAPTER.validate_python(raw)
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in e.errors())
+            errors.append(_row_error(index, detail))
+            continue
+        if allowed_fields is not None:
+            forbidden = sorted(set(row.model_dump(exclude_none=True)) - allowed_fields - set(row_filter(row)))
+            if forbidden:
+                errors.append(_row_error(index, f"Not allowed to change: {', '.join(forbidden)}", row))
+                continue
+        rows.append((index, row))
+    return rows, errors
+
+
+def row_filter(row: MenuBulkRow) -> Dict:
+    if row.item_id:
+        return {"item_id": row.item_id}
+    return {"canteen_id": row.canteen_id, "name": row.name}
+
+
+def existing_query(rows: List[Tuple[int, MenuBulkRow]]) -> Dict:
+    """One query matching every item the rows refer to"""
+    item_ids = [row.item_id for _, row in rows if row.item_id]
+    clauses = [row_filter(row) for _, row in rows if not row.item_id]
+    if item_ids:
+        clauses.append({"item_id": {"$in": item_ids}})
+    return {"$or": clauses}
+
+
+def plan_writes(rows: List[Tuple[int, MenuBulkRow]], existing: List[Dict], allow_create: bool,
+                now: datetime) -> Tuple[List[UpdateOne], List[int], List[Dict]]:
+    """
+    Turn validated rows into UpdateOne requests. Returns the requests, the row
+    position of each request (to map bulk_write results back) and per-row errors.
+    """
+    known_ids = {item["item_id"] for item in existing}
+    known_names = {(item["canteen_id"], item["name"]) for item in existing}
+    requests, positions, errors = [], [], []
+    seen = {}
+    for index, row in rows:
+        key = tuple(sorted(row_filter(row).items()))
+        if key in seen:
+            errors.append(_row_error(index, f"Duplicate of row {seen[key]}", row))
+            continue
+        seen[key] = index
+
+        fields = row.model_dump(exclude_none=True)
+        nutrition = fields.pop("nutrition", None) or {}
+        if not set(fields) - KEY_FIELDS and not nutrition:
+            errors.append(_row_error(index, "Nothing to update", row))
+            continue
+        exists = row.item_id in known_ids if row.item_id else (row.canteen_id, row.name) in known_names
+        creates = not exists and CREATE_FIELDS - {"nutrition"} <= set(fields) and NUTRITION_FIELDS <= set(nutrition)
+        if not exists and not creates:
+            errors.append(_row_error(index, "Item not found (new items need every menu field)", row))
+            continue
+        if creates and not allow_create:
+            errors.append(_row_error(index, "Only management can add menu items", row))
+            continue
+
+        # Key fields only identify the row: never rename or move an item. Nutrition
+        # goes in as dotted keys so a partial row keeps the other values
+        update = {"$set": {k: v for k, v in fields.items() if k not in KEY_FIELDS}}
+        update["$set"].update({f"nutrition.{k}": v for k, v in nutrition.items()})
+        if creates:
+            on_insert = {k: fields[k] for k in ("canteen_id", "name") if row.item_id}
+            on_insert["created_at"] = now
+            if "available" not in fields:
+                on_insert["available"] = True
+            if not row.item_id:
+                on_insert["item_id"] = f"item_{uuid.uuid4().hex[:12]}"
+            update["$setOnInsert"] = on_insert
+        requests.append(UpdateOne(row_filter(row), update, upsert=creates))
+        positions.append(index)
+    return requests, positions, errors
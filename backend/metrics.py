@@ -0,0 +1,290 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A deliberately small subset of the Prometheus client: counters, gauges and
+fixed-bucket histograms with label values, rendered by `/metrics`. Recording is a
+dict lookup, a bisect and a few additions under a lock (Mongo command listeners
+run on driver threads), so instrumenting the request path costs microseconds.
+
+What is collected:
+  - HTTP request latency per method and route template, requests by status, in-flight requests
+  - Mongo command latency by collection and command (pymongo CommandListener)
+  - socket.io connected clients and emits per event and room
+  - event-loop lag and stalls by handler (loop_monitor.py)
+  - cache lookups by result, with the hit ratio
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+LOOP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                                for labels, value in items]
+
+
+class Gauge(Metric):
+    """A settable gauge, or one whose values are read from `collect` at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(),
+                 collect: Optional[Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._collect = collect
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        if self._collect is not None:
+            items = sorted(self._collect())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                                for labels, value in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (+Inf last)..., sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = self.header()
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {int(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {int(cumulative)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode()
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+))
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+))
+MONGO_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and command",
+    ("collection", "command"), MONGO_BUCKETS
+))
+MONGO_COMMAND_FAILURES = REGISTRY.register(Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands by collection and command", ("collection", "command")
+))
+SOCKET_CLIENTS = REGISTRY.register(Gauge(
+    "socketio_connected_clients", "Connected socket.io clients on this worker"
+))
+SOCKET_EMITS = REGISTRY.register(Counter(
+    "socketio_emits_total", "socket.io emits by event and room", ("event", "room")
+))
+EVENT_LOOP_LAG = REGISTRY.register(Histogram(
+    "event_loop_lag_seconds", "How late the event-loop heartbeat wakes up", (), LOOP_BUCKETS
+))
+EVENT_LOOP_STALLS = REGISTRY.register(Counter(
+    "event_loop_stalls_total", "Event-loop stalls over the block threshold by handler", ("handler",)
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "cache_requests_total", "Cache lookups by cache and result", ("cache", "result")
+))
+LOG_RECORDS_DROPPED = REGISTRY.register(Counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full"
+))
+
+
+def _hit_ratios():
+    caches = {labels[0] for labels in list(CACHE_REQUESTS._values)}
+    for cache in caches:
+        hits, misses = CACHE_REQUESTS.value(cache, "hit"), CACHE_REQUESTS.value(cache, "miss")
+        yield (cache,), hits / (hits + misses) if hits + misses else 0.0
+
+
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "cache_hit_ratio", "Share of cache lookups served from the cache", ("cache",), collect=_hit_ratios
+))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(elapsed, scope["method"], path)
+            HTTP_REQUESTS.inc(scope["method"], path, str(status[0]))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Command latency by collection; the collection is only on the started event"""
+
+    def __init__(self):
+        self._collections: Dict[Tuple, str] = {}
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[self._key(event)] = collection if isinstance(collection, str) else "-"
+
+    def succeeded(self, event):
+        collection = self._collections.pop(self._key(event), "-")
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event):
+        collection = self._collections.pop(self._key(event), "-")
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, collection, event.command_name)
+        MONGO_COMMAND_FAILURES.inc(collection, event.command_name)
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+def instrument_socketio(sio, room_label: Callable[[Optional[str]], str]) -> None:
+    """Count emits per event and room (room names mapped through `room_label` to bound cardinality)"""
+    emit = sio.emit
+
+    async def counted_emit(event, data=None, to=None, room=None, **kwargs):
+        SOCKET_EMITS.inc(event, room_label(to or room))
+        return await emit(event, data, to=to, room=room, **kwargs)
+
+    sio.emit = counted_emit
@@ -0,0 +1,182 @@
+"""
+Versioned data migrations.
+
+Each migration is an async function registered with @migration(version, name).
+Applied versions are recorded in the `schema_migrations` collection, so running
+the runner again only applies what is pending. Migrations must be idempotent:
+a run interrupted half-way is simply resumed on the next invocation.
+
+Usage: python migrations.py            # apply pending migrations
+       python migrations.py --status   # list applied / pending versions
+"""
+import asyncio
+import logging
+import sys
+from typing import Awaitable, Callable, Dict, List, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+from storage import parse_timestamp, utcnow
+from line_items import normalize_items, items_total_paise, ORDERS_VALIDATOR, BILLS_VALIDATOR
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+BATCH_SIZE = 1000
+
+_registry: Dict[int, Tuple[str, Callable[..., Awaitable[None]]]] = {}
+
+
+def migration(version: int, name: str):
+    """Register an async migration `fn(db)` under a unique, increasing version"""
+    def decorator(fn):
+        if version in _registry:
+            raise ValueError(f"Duplicate migration version {version}")
+        _registry[version] = (name, fn)
+        return fn
+    return decorator
+
+
+async def applied_versions(db) -> List[int]:
+    docs = await db[MIGRATIONS_COLLECTION].find({}, {"_id": 0, "version": 1}).to_list(None)
+    return sorted(d["version"] for d in docs)
+
+
+async def pending_migrations(db) -> List[Tuple[int, str]]:
+    applied = set(await applied_versions(db))
+    return [(v, _registry[v][0]) for v in sorted(_registry) if v not in applied]
+
+
+async def run_migrations(db) -> List[int]:
+    """Apply every pending migration in version order. Returns the versions applied."""
+    ran = []
+    for version, name in await pending_migrations(db):
+        logging.info(f"Applying migration {version}: {name}")
+        await _registry[version][1](db)
+        await db[MIGRATIONS_COLLECTION].insert_one({
+            "version": version,
+            "name": name,
+            "applied_at": utcnow()
+        })
+        ran.append(version)
+    return ran
+
+
+async def convert_string_dates(collection, fields: List[str], batch_size: int = BATCH_SIZE) -> int:
+    """
+    Rewrite ISO-8601 string timestamps in `fields` as native dates, batch by batch.
+    Only documents that still hold a string in one of the fields are touched.
+    """
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    converted = 0
+
+    while True:
+        docs = await collection.find(query, projection).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+
+        ops = []
+        for doc in docs:
+            updates = {}
+            for field in fields:
+                value = doc.get(field)
+                if isinstance(value, str):
+                    try:
+                        updates[field] = parse_timestamp(value)
+                    except ValueError:
+                        # Unparseable legacy value: drop it rather than loop on it forever
+                        logging.warning(f"{collection.name}.{field}: unparseable timestamp {value!r} on {doc['_id']}")
+                        updates[field] = None
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": updates}))
+
+        await collection.bulk_write(ops, ordered=False)
+        converted += len(ops)
+        logging.info(f"{collection.name}: converted {converted} documents")
+
+    return converted
+
+
+async def normalize_line_items(collection, with_total: bool, batch_size: int = BATCH_SIZE) -> int:
+    """Rewrite every document's `items` into the canonical line-item shape, batch by batch"""
+    query = {"items": {"$elemMatch": {"unit_price_paise": {"$exists": False}}}}
+    if with_total:
+        query = {"$or": [query, {"total_paise": {"$exists": False}}]}
+    converted = 0
+
+    while True:
+        docs = await collection.find(query, {"items": 1}).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+
+        ops = []
+        for doc in docs:
+            items = normalize_items(doc.get("items", []))
+            updates = {"items": items}
+            if with_total:
+                updates["total_paise"] = items_total_paise(items)
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": updates}))
+
+        await collection.bulk_write(ops, ordered=False)
+        converted += len(ops)
+        logging.info(f"{collection.name}: normalized {converted} documents")
+
+    return converted
+
+
+async def set_validator(db, name: str, validator: dict):
+    """Attach a $jsonSchema validator to a collection, creating the collection if needed"""
+    try:
+        await db.command("collMod", name, validator=validator, validationLevel="moderate", validationAction="error")
+    except OperationFailure as e:
+        if e.code != 26:  # NamespaceNotFound
+            raise
+        await db.create_collection(name, validator=validator, validationLevel="moderate", validationAction="error")
+
+
+# ============================================
+# MIGRATIONS
+# ============================================
+
+@migration(1, "ISO string timestamps to native BSON dates")
+async def iso_strings_to_dates(db):
+    await convert_string_dates(db.orders, ["created_at", "updated_at", "expires_at"])
+    await convert_string_dates(db.bills, ["timestamp"])
+    await convert_string_dates(db.users, ["created_at"])
+    await convert_string_dates(db.user_sessions, ["created_at", "expires_at"])
+    await convert_string_dates(db.menu_items, ["created_at"])
+    await convert_string_dates(db.spending_analytics, ["last_updated"])
+
+
+@migration(2, "Canonical order line items with integer paise + schema validators")
+async def canonical_line_items(db):
+    await normalize_line_items(db.orders, with_total=True)
+    await normalize_line_items(db.bills, with_total=False)
+    await set_validator(db, "orders", ORDERS_VALIDATOR)
+    await set_validator(db, "bills", BILLS_VALIDATOR)
+
+
+async def main(argv: List[str]):
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        if "--status" in argv:
+            applied = await applied_versions(db)
+            for version in sorted(_registry):
+                state = "applied" if version in applied else "pending"
+                print(f"{version:>4}  {state:<8} {_registry[version][0]}")
+            return
+
+        ran = await run_migrations(db)
+        print(f"✅ Applied {len(ran)} migration(s): {ran}" if ran else "✅ Database is up to date")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main(sys.argv[1:]))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, model_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uuid
@@ -43,6 +43,16 @@ class UserSession(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 # Canteen Model
+class CanteenLoad(BaseModel):
+    active_orders: int
+    outstanding_units: int
+    outstanding_prep_minutes: int
+    recent_throughput: int
+    service_rate: float
+    queue_minutes: float
+    level: str  # "quiet", "busy", "swamped"
+    updated_at: datetime
+
 class Canteen(BaseModel):
     model_config = ConfigDict(extra="ignore")
     canteen_id: str
@@ -50,6 +60,7 @@ class Canteen(BaseModel):
     description: str
     operating_hours: str
     image_url: str
+    load: Optional[CanteenLoad] = None  # Live; attached when serving /api/canteens
 
 # Menu Item Models
 class Nutrition(BaseModel):
@@ -61,6 +72,16 @@ class Nutrition(BaseModel):
     vitamins: str
     sodium: float
 
+class NutritionUpdate(BaseModel):
+    """Nutrition columns of a bulk import row; only the ones given are changed"""
+    calories: Optional[int] = None
+    carbs: Optional[float] = None
+    protein: Optional[float] = None
+    fat: Optional[float] = None
+    fiber: Optional[float] = None
+    vitamins: Optional[str] = None
+    sodium: Optional[float] = None
+
 class MenuItem(BaseModel):
     model_config = ConfigDict(extra="ignore")
     item_id: str = Field(default_factory=lambda: f"item_{uuid.uuid4().hex[:12]}")
@@ -96,6 +117,29 @@ class MenuItemUpdate(BaseModel):
     stock_qty: Optional[int] = None
     available: Optional[bool] = None
 
+class MenuBulkRow(BaseModel):
+    """One row of a bulk menu import, keyed by item_id or by (canteen_id, name)"""
+    model_config = ConfigDict(extra="ignore")
+    item_id: Optional[str] = None
+    name: Optional[str] = None
+    canteen_id: Optional[str] = None
+    price: Optional[float] = Field(default=None, ge=0)
+    nutrition: Optional[NutritionUpdate] = None
+    ingredients: Optional[str] = None
+    allergens: Optional[str] = None
+    stock_qty: Optional[int] = Field(default=None, ge=0)
+    category: Optional[str] = None
+    image_url: Optional[str] = None
+    veg_type: Optional[str] = None
+    prep_time: Optional[int] = Field(default=None, gt=0)
+    available: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def check_key(self):
+        if not self.item_id and not (self.canteen_id and self.name):
+            raise ValueError("item_id or both canteen_id and name are required")
+        return self
+
 # Order Models
 class OrderItem(BaseModel):
     item_id: str
@@ -110,7 +154,7 @@ class Order(BaseModel):
     items: List[OrderItem]
     canteen_id: str
     token_number: int
-    status: str  # "PENDING_PAYMENT", "PREPARING", "READY", "COMPLETED", "CANCELLED"
+    status: str  # "PENDING_PAYMENT", "SCHEDULED", "REQUESTED", "PREPARING", "READY", "COMPLETED", "CANCELLED"
     payment_id: Optional[str] = None
     razorpay_order_id: Optional[str] = None
     razorpay_payment_id: Optional[str] = None
@@ -118,11 +162,14 @@ class Order(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     expires_at: datetime
+    pickup_slot: Optional[datetime] = None  # Pre-orders: start of the pickup slot
+    release_at: Optional[datetime] = None  # Pre-orders: when the order enters the kitchen queue
 
 class OrderCreate(BaseModel):
     items: List[OrderItem]
     canteen_id: str
     total_amount: float
+    pickup_slot: Optional[datetime] = None  # Omit to order for now
 
 class OrderBatchDelete(BaseModel):
     order_ids: List[str]
@@ -130,10 +177,28 @@ class OrderBatchDelete(BaseModel):
 class OrderStatusUpdate(BaseModel):
     status: str
 
+class OrderStatusChange(BaseModel):
+    order_id: str
+    status: str
+
+class OrderStatusBulkUpdate(BaseModel):
+    updates: List[OrderStatusChange] = Field(min_length=1, max_length=100)
+
 class PaymentVerification(BaseModel):
     payment_id: str
     signature: str
 
+class KitchenBatchComplete(BaseModel):
+    item_id: str
+    quantity: int = Field(gt=0)
+
+class CartLine(BaseModel):
+    item_name: str
+    quantity: int = Field(default=1, gt=0)
+
+class CanteenSuggestionRequest(BaseModel):
+    items: List[CartLine] = Field(min_length=1)
+
 # AI Recommendation Models
 class AIRecommendation(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -168,6 +233,67 @@ class SpendingAnalytics(BaseModel):
     monthly_total: float = 0.0
     last_updated: datetime = Field(default_factory=datetime.utcnow)
 
+# Slim list-view models (see views.py: each one also drives its Mongo projection)
+class OrderCardItem(BaseModel):
+    """A line as the list views render it (name x quantity, line price); no item_id"""
+    model_config = ConfigDict(extra="ignore")
+    item_name: str
+    quantity: int
+    price_at_order: float
+
+class OrderEta(BaseModel):
+    ready_at: datetime
+    minutes: int
+    queue_position: int
+
+class OrderCard(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    order_id: str
+    token_number: int
+    canteen_id: str
+    status: str
+    item_count: int  # Computed in the projection: sum of line quantities
+    items: List[OrderCardItem]  # Rendered on the crew dashboard, order tracking and history cards
+    total_amount: float
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    pickup_slot: Optional[datetime] = None
+
+class StudentOrderCard(OrderCard):
+    razorpay_order_id: Optional[str] = None  # Needed to retry PENDING_PAYMENT orders
+    eta: Optional[OrderEta] = None  # Refreshed on every kitchen status transition
+
+class NutritionCard(BaseModel):
+    calories: int
+    protein: float
+    carbs: float
+    fat: float
+    fiber: float
+
+class MenuCard(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    item_id: str
+    name: str
+    canteen_id: str
+    price: float
+    nutrition: NutritionCard
+    ingredients: str
+    allergens: str
+    stock_qty: int
+    category: str
+    image_url: str
+    veg_type: str
+    prep_time: int
+    available: bool = True
+
+class BillCard(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    bill_id: str
+    order_id: str
+    amount: float
+    items: List[OrderCardItem]
+    timestamp: datetime
+
 # Bill Model
 class Bill(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -0,0 +1,239 @@
+"""
+In-memory book of active orders per canteen for the crew dashboard.
+
+Each canteen's book keeps its REQUESTED / PREPARING / READY orders (crew card
+fields only) in a list sorted by (created_at, order_id), a status -> order ids
+index, and rolling counters for the current UTC day (orders completed, summed
+prep time). The crew read endpoints - pending, recent, alerts and stats - are
+answered from here instead of a Mongo query per request.
+
+The book is fed by the code paths that change an order's status, which re-read
+the order and `apply` it, and by an incremental `updated_at` poll (the same
+watermark scheme as the analytics store) for changes made by other workers or
+scripts. `verify` compares each canteen's active order ids with Mongo and
+re-hydrates a canteen whose book has drifted (e.g. orders deleted underneath it).
+"""
+import logging
+import os
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from storage import utcnow
+from views import CREW_ORDER_VIEW
+
+ORDER_BOOK_REFRESH_SECONDS = int(os.environ.get('ORDER_BOOK_REFRESH_SECONDS', 5))
+ORDER_BOOK_VERIFY_SECONDS = int(os.environ.get('ORDER_BOOK_VERIFY_SECONDS', 300))
+
+ACTIVE_STATUSES = ["REQUESTED", "PREPARING", "READY"]
+
+# Re-read this much before the last poll so concurrent writes are not missed
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+# Reported when nothing has been completed yet today (matches the previous endpoint)
+DEFAULT_AVG_PREP_MINUTES = 15
+
+BOOK_PROJECTION = {
+    **CREW_ORDER_VIEW.projection,
+    "student_id": 1,
+    "requested_at": 1,
+    "ready_at": 1
+}
+
+
+def prep_seconds(order: Dict) -> float:
+    """Paid -> READY, falling back to created -> last update for orders without the stamps"""
+    end = order.get("ready_at") or order.get("updated_at")
+    start = order.get("requested_at") or order.get("created_at")
+    return max(0.0, (end - start).total_seconds()) if end and start else 0.0
+
+
+class CanteenBook:
+    """Active orders of one canteen, sorted by created_at, plus today's counters"""
+
+    def __init__(self, day: date):
+        self.orders: Dict[str, Dict] = {}
+        self._keys: List[Tuple[datetime, str]] = []
+        self.by_status: Dict[str, Set[str]] = defaultdict(set)
+        self.day = day
+        self.completed_today = 0
+        self.prep_seconds_today = 0.0
+        self._completed_ids: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def upsert(self, order: Dict) -> None:
+        order_id = order["order_id"]
+        old = self.orders.get(order_id)
+        if old is None:
+            insort(self._keys, (order["created_at"], order_id))
+        else:
+            self.by_status[old["status"]].discard(order_id)
+        self.orders[order_id] = order
+        self.by_status[order["status"]].add(order_id)
+
+    def remove(self, order_id: str) -> None:
+        old = self.orders.pop(order_id, None)
+        if old is None:
+            return
+        self._keys.pop(bisect_left(self._keys, (old["created_at"], order_id)))
+        self.by_status[old["status"]].discard(order_id)
+
+    def count_completed(self, order: Dict) -> None:
+        if order["order_id"] in self._completed_ids:
+            return
+        self._completed_ids.add(order["order_id"])
+        self.completed_today += 1
+        self.prep_seconds_today += prep_seconds(order)
+
+    def roll(self, day: date) -> None:
+        """Start a new day's counters"""
+        if day != self.day:
+            self.day = day
+            self.completed_today = 0
+            self.prep_seconds_today = 0.0
+            self._completed_ids.clear()
+
+    def active(self, statuses: Optional[Iterable[str]] = None, created_before: Optional[datetime] = None,
+               limit: Optional[int] = None) -> List[Dict]:
+        """Orders oldest first, optionally filtered by status and created_at upper bound"""
+        keys = self._keys
+        if created_before is not None:
+            keys = keys[:bisect_left(keys, (created_before, ""))]
+        wanted = set(statuses) if statuses is not None else None
+        result = []
+        for _, order_id in keys:
+            order = self.orders[order_id]
+            if wanted is None or order["status"] in wanted:
+                result.append(order)
+                if limit is not None and len(result) == limit:
+                    break
+        return result
+
+    def status_counts(self) -> Dict[str, int]:
+        return {status: len(self.by_status[status]) for status in ACTIVE_STATUSES}
+
+
+class OrderBook:
+    """Per-canteen active order books with an incremental Mongo sync"""
+
+    def __init__(self):
+        self._books: Dict[str, CanteenBook] = {}
+        self.watermark: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        """False until the first hydration has completed"""
+        return self.watermark is not None
+
+    def book(self, canteen_id: str, now: Optional[datetime] = None) -> CanteenBook:
+        day = (now or utcnow()).date()
+        book = self._books.get(canteen_id)
+        if book is None:
+            book = self._books[canteen_id] = CanteenBook(day)
+        book.roll(day)
+        return book
+
+    def apply(self, order: Dict, now: Optional[datetime] = None) -> None:
+        """Bring the book in line with the current state of one order"""
+        now = now or utcnow()
+        book = self.book(order["canteen_id"], now)
+        current = book.orders.get(order["order_id"])
+        # Ignore a read that is older than what a local transition already applied
+        if current and current.get("updated_at") and order.get("updated_at") \
+                and order["updated_at"] < current["updated_at"]:
+            return
+        if order["status"] in ACTIVE_STATUSES:
+            if "item_count" not in order:
+                order = {**order, "item_count": sum(item.get("quantity", 1) for item in order.get("items", []))}
+            book.upsert(order)
+        else:
+            book.remove(order["order_id"])
+        if order["status"] == "COMPLETED" and order.get("updated_at") and order["updated_at"].date() == book.day:
+            book.count_completed(order)
+
+    def discard(self, order_ids: Iterable[str]) -> None:
+        """Forget orders that were deleted"""
+        for book in self._books.values():
+            for order_id in order_ids:
+                book.remove(order_id)
+
+    def pending(self, canteen_id: str, limit: int = 100) -> List[Dict]:
+        return self.book(canteen_id).active(limit=limit)
+
+    def delayed(self, canteen_id: str, older_than: datetime, statuses: Iterable[str], limit: int = 50) -> List[Dict]:
+        return self.book(canteen_id).active(statuses, created_before=older_than, limit=limit)
+
+    def cards(self, canteen_id: str, order_ids: Iterable[str]) -> List[Dict]:
+        """Active orders by id (ids that are no longer active are skipped)"""
+        orders = self.book(canteen_id).orders
+        return [orders[order_id] for order_id in order_ids if order_id in orders]
+
+    def stats(self, canteen_id: str, now: Optional[datetime] = None) -> Dict:
+        book = self.book(canteen_id, now)
+        avg = DEFAULT_AVG_PREP_MINUTES
+        if book.completed_today:
+            avg = int(book.prep_seconds_today / book.completed_today / 60)
+        return {
+            "completed_today": book.completed_today,
+            "avg_prep_time": avg,
+            "active": book.status_counts()
+        }
+
+    def diff(self, canteen_id: str, active_ids: Set[str]) -> Tuple[Set[str], Set[str]]:
+        """(ids Mongo has that the book is missing, ids the book has that Mongo does not)"""
+        held = set(self.book(canteen_id).orders)
+        return active_ids - held, held - active_ids
+
+    # ---------- Mongo sync ----------
+
+    async def _hydrate(self, db, canteen_id: Optional[str] = None) -> None:
+        now = utcnow()
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        scope = {"canteen_id": canteen_id} if canteen_id else {}
+        if canteen_id:
+            self._books.pop(canteen_id, None)
+        else:
+            self._books.clear()
+        async for order in db.orders.find({**scope, "status": {"$in": ACTIVE_STATUSES}}, BOOK_PROJECTION):
+            self.apply(order, now)
+        async for order in db.orders.find(
+            {**scope, "status": "COMPLETED", "updated_at": {"$gte": day_start}},
+            {"_id": 0, "order_id": 1, "canteen_id": 1, "status": 1, "created_at": 1,
+             "updated_at": 1, "requested_at": 1, "ready_at": 1}
+        ):
+            self.apply(order, now)
+        if not canteen_id:
+            self.watermark = now
+
+    async def refresh(self, db) -> int:
+        """Hydrate on first use, then apply orders changed since the last poll"""
+        if self.watermark is None:
+            await self._hydrate(db)
+            return sum(len(book) for book in self._books.values())
+        since = self.watermark - REFRESH_OVERLAP
+        now = utcnow()
+        changed = 0
+        async for order in db.orders.find({"updated_at": {"$gte": since}}, BOOK_PROJECTION):
+            self.apply(order, now)
+            changed += 1
+        self.watermark = now
+        return changed
+
+    async def verify(self, db) -> List[str]:
+        """Consistency check against Mongo; re-hydrates drifted canteens and returns their ids"""
+        active = defaultdict(set)
+        async for order in db.orders.find({"status": {"$in": ACTIVE_STATUSES}}, {"_id": 0, "order_id": 1, "canteen_id": 1}):
+            active[order["canteen_id"]].add(order["order_id"])
+        drifted = []
+        for canteen_id in set(active) | set(self._books):
+            missing, extra = self.diff(canteen_id, active.get(canteen_id, set()))
+            if missing or extra:
+                logging.warning(f"Order book for {canteen_id} drifted ({len(missing)} missing, {len(extra)} stale) - re-hydrating")
+                await self._hydrate(db, canteen_id)
+                drifted.append(canteen_id)
+        return drifted
+
+
+order_book = OrderBook()
@@ -0,0 +1,93 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+
+# Page size limits shared by every cursor-paginated list endpoint
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Response header carrying the opaque cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """Clamp a requested page size into [1, MAX_PAGE_SIZE]"""
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(sort_value: Any, tie_breaker: str) -> str:
+    """Encode the (sort value, unique id) of the last row into an opaque cursor"""
+    if isinstance(sort_value, datetime):
+        payload = {"t": "dt", "v": sort_value.isoformat(), "id": tie_breaker}
+    else:
+        payload = {"t": "s", "v": sort_value, "id": tie_breaker}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Decode an opaque cursor back into (sort value, unique id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, last_id = payload["v"], payload["id"]
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+        # Only scalars go into the seek predicate; a dict here would be a query operator
+        elif isinstance(value, (dict, list)):
+            raise ValueError("cursor value must be a scalar")
+        if not isinstance(last_id, str):
+            raise ValueError("cursor id must be a string")
+        return value, last_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(sort_field: str, id_field: str, cursor: str, direction: int = -1) -> Dict:
+    """Build the seek predicate that resumes strictly after the cursor row"""
+    value, last_id = decode_cursor(cursor)
+    op = "$lt" if direction < 0 else "$gt"
+    return {"$or": [
+        {sort_field: {op: value}},
+        {sort_field: value, id_field: {op: last_id}}
+    ]}
+
+
+async def fetch_page(
+    collection,
+    query: Dict,
+    sort_field: str,
+    id_field: str,
+    projection: Dict,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    direction: int = -1
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Fetch one page ordered by (sort_field, id_field) using an index seek.
+    Returns the page and the cursor of the next page (None on the last page).
+    """
+    page_size = clamp_page_size(limit)
+
+    if cursor:
+        query = {"$and": [query, keyset_filter(sort_field, id_field, cursor, direction)]}
+
+    # The sort keys must always be present to build the next cursor
+    if any(v == 1 for k, v in projection.items() if k != "_id"):
+        projection = {**projection, sort_field: 1, id_field: 1}
+
+    docs = await collection.find(query, projection).sort(
+        [(sort_field, direction), (id_field, direction)]
+    ).limit(page_size + 1).to_list(page_size + 1)
+
+    next_cursor = None
+    if len(docs) > page_size:
+        docs = docs[:page_size]
+        last = docs[-1]
+        next_cursor = encode_cursor(last[sort_field], last[id_field])
+
+    return docs, next_cursor
@@ -0,0 +1,167 @@
+"""
+Scheduled pre-orders: pickup slots and timed release to the kitchen.
+
+A pre-order is paid like any other order but parks in SCHEDULED until its
+`release_at` (pickup slot minus the prep time of its slowest item), when it enters
+the kitchen queue as REQUESTED. Slots are SLOT_MINUTES wide and hold as many
+orders as the canteen historically completes in that much time at that hour of
+day, so a 13:00 lunch rush is spread over the slots before it instead of hitting
+the crew at once.
+
+Bookings are counted in `pickup_slots` ({canteen_id, slot_start, booked}) with a
+conditional $inc. The release and payment-expiry timers live in an in-process
+min-heap; the orders themselves are the persistent copy, so the heap is rebuilt
+from Mongo on startup and resynced periodically to pick up orders scheduled by
+other workers. Firing a timer is a conditional update on the order's status, so
+the same timer firing in several workers is harmless.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from pymongo.errors import DuplicateKeyError
+from eta import service_rate
+from storage import utcnow
+
+SLOT_MINUTES = int(os.environ.get('PICKUP_SLOT_MINUTES', 15))
+PREORDER_MAX_HOURS_AHEAD = int(os.environ.get('PREORDER_MAX_HOURS_AHEAD', 24))
+SCHEDULER_RESYNC_SECONDS = int(os.environ.get('SCHEDULER_RESYNC_SECONDS', 60))
+
+# Timer actions
+RELEASE = "release"   # SCHEDULED -> REQUESTED
+EXPIRE = "expire"     # unpaid PENDING_PAYMENT pre-order -> CANCELLED, slot freed
+
+
+def slot_start(moment: datetime) -> datetime:
+    """Start of the pickup slot containing `moment`"""
+    minute = moment.minute - moment.minute % SLOT_MINUTES
+    return moment.replace(minute=minute, second=0, microsecond=0)
+
+
+def slot_capacity(throughput: np.ndarray, slot: datetime) -> int:
+    """Orders one slot can take: the canteen's historical completion rate at that hour"""
+    return max(1, int(service_rate(throughput, slot) * SLOT_MINUTES / 60))
+
+
+def release_time(slot: datetime, prep_minutes: int) -> datetime:
+    """When a pre-order for `slot` has to enter the kitchen queue"""
+    return slot - timedelta(minutes=prep_minutes)
+
+
+def upcoming_slots(now: datetime, hours: int, throughput: np.ndarray, booked: Dict[datetime, int],
+                   lead_minutes: int = 0) -> List[Dict]:
+    """Bookable slots over the next `hours`, starting after `lead_minutes` of prep"""
+    first = slot_start(now + timedelta(minutes=lead_minutes)) + timedelta(minutes=SLOT_MINUTES)
+    slots = []
+    for k in range(hours * 60 // SLOT_MINUTES):
+        slot = first + timedelta(minutes=k * SLOT_MINUTES)
+        capacity = slot_capacity(throughput, slot)
+        taken = booked.get(slot, 0)
+        slots.append({
+            "slot_start": slot,
+            "capacity": capacity,
+            "booked": taken,
+            "available": max(0, capacity - taken)
+        })
+    return slots
+
+
+async def reserve_slot(db, canteen_id: str, slot: datetime, capacity: int) -> bool:
+    """Atomically take one place in a slot. Returns False when the slot is full."""
+    try:
+        await db.pickup_slots.find_one_and_update(
+            {"canteen_id": canteen_id, "slot_start": slot, "booked": {"$lt": capacity}},
+            {"$inc": {"booked": 1}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # The slot document exists but is full, so the upsert tried to insert a second one
+        return False
+
+
+async def free_slot(db, canteen_id: str, slot: datetime) -> None:
+    await db.pickup_slots.update_one(
+        {"canteen_id": canteen_id, "slot_start": slot, "booked": {"$gt": 0}},
+        {"$inc": {"booked": -1}}
+    )
+
+
+class OrderScheduler:
+    """Min-heap of (due, action, order_id) timers drained by one sleeper task"""
+
+    def __init__(self, handlers: Dict[str, Callable[[str], Awaitable]],
+                 resync_seconds: int = SCHEDULER_RESYNC_SECONDS):
+        self.handlers = handlers
+        self.resync_seconds = resync_seconds
+        self._heap: List[Tuple[datetime, str, str]] = []
+        self._keys = set()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, due: datetime, action: str, order_id: str) -> None:
+        """Add a timer (a timer already pending for the same order and action is kept)"""
+        if (action, order_id) in self._keys:
+            return
+        self._keys.add((action, order_id))
+        heapq.heappush(self._heap, (due, action, order_id))
+        if self._heap[0][2] == order_id:
+            self._wakeup.set()
+
+    def next_due(self) -> Optional[datetime]:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[Tuple[str, str]]:
+        """Remove and return (action, order_id) for every timer due at `now`"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, action, order_id = heapq.heappop(self._heap)
+            self._keys.discard((action, order_id))
+            due.append((action, order_id))
+        return due
+
+    async def load(self, db) -> int:
+        """(Re)build timers from the orders collection"""
+        before = len(self._heap)
+        async for order in db.orders.find({"status": "SCHEDULED"}, {"_id": 0, "order_id": 1, "release_at": 1}):
+            self.schedule(order["release_at"], RELEASE, order["order_id"])
+        async for order in db.orders.find(
+            {"status": "PENDING_PAYMENT", "pickup_slot": {"$ne": None}},
+            {"_id": 0, "order_id": 1, "expires_at": 1}
+        ):
+            self.schedule(order["expires_at"], EXPIRE, order["order_id"])
+        return len(self._heap) - before
+
+    async def run(self, db) -> None:
+        """Fire timers as they come due until cancelled"""
+        await self.load(db)
+        last_sync = time.monotonic()
+        while True:
+            self._wakeup.clear()
+            now = utcnow()
+            for action, order_id in self.pop_due(now):
+                try:
+                    await self.handlers[action](order_id)
+                except Exception as e:
+                    logging.error(f"Scheduler {action} failed for {order_id}: {e}")
+
+            timeout = self.resync_seconds
+            if self._heap:
+                timeout = min(timeout, max(0.0, (self.next_due() - now).total_seconds()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            if time.monotonic() - last_sync >= self.resync_seconds:
+                try:
+                    await self.load(db)
+                except Exception as e:
+                    logging.error(f"Scheduler resync failed: {e}")
+                last_sync = time.monotonic()
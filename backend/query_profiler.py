@@ -0,0 +1,311 @@
+"""
+Per-request Mongo profiler: round trips, DB time and repeated query shapes.
+
+A pymongo CommandListener attributes every command to the HTTP request it runs
+under (Motor copies contextvars into its executor threads, so the listener sees
+the request's `RequestProfile`). When the request finishes its profile is
+checked against a round-trip budget, slow-command threshold and repeated query
+shapes (the same query run over and over with different values - the N+1
+pattern), and folded into per-route and per-shape aggregates.
+
+A query shape is the command with every value replaced by `?`, e.g.
+`find orders {order_id:?}` or `aggregate orders [$match{canteen_id:?,status:{$in:[?]}},$group]`.
+The first command seen for each shape is kept so the report can explain it
+and show the winning plan (IXSCAN/COLLSCAN) on demand.
+
+Background jobs run outside any request and are not profiled.
+"""
+import logging
+import os
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import monitoring
+
+QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', '1') == '1'
+QUERY_PROFILER_MAX_ROUND_TRIPS = int(os.environ.get('QUERY_PROFILER_MAX_ROUND_TRIPS', 5))
+QUERY_PROFILER_REPEAT_THRESHOLD = int(os.environ.get('QUERY_PROFILER_REPEAT_THRESHOLD', 3))
+QUERY_PROFILER_SLOW_MS = float(os.environ.get('QUERY_PROFILER_SLOW_MS', 100))
+
+# Bound the aggregate tables (shapes beyond this are counted under "other")
+MAX_SHAPES = 500
+
+PROFILE_HEADER = "X-DB-Profile"
+
+# Commands whose shape we keep a sample of, so the report can explain them
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+
+# Driver-added fields that must not be sent back with an explain
+_SESSION_FIELDS = {"lsid", "txnNumber", "$clusterTime", "$db", "$readPreference", "readConcern",
+                   "writeConcern", "startTransaction", "autocommit", "$query", "apiVersion"}
+
+profile_logger = logging.getLogger("server.dbprofile")
+
+
+def value_shape(value: Any) -> str:
+    """Structure of a filter with the values blanked out"""
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{key}:{value_shape(item)}" for key, item in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + (value_shape(value[0]) if value and isinstance(value[0], (dict, list, tuple)) else "?") + "]"
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict) -> str:
+    collection = command.get(command_name)
+    collection = collection if isinstance(collection, str) else "-"
+    if command_name == "find":
+        shape = f"find {collection} {value_shape(command.get('filter', {}))}"
+        if command.get("sort"):
+            shape += f" sort {list(command['sort'])}"
+        return shape
+    if command_name in ("update", "delete"):
+        ops = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        return f"{command_name} {collection} {value_shape(ops[0].get('q', {}))}" + (f" x{len(ops)}" if len(ops) > 1 else "")
+    if command_name == "findAndModify":
+        return f"findAndModify {collection} {value_shape(command.get('query', {}))}"
+    if command_name == "aggregate":
+        stages = []
+        for stage in command.get("pipeline", []):
+            name = next(iter(stage), "?")
+            stages.append(f"{name}{value_shape(stage[name])}" if name == "$match" else name)
+        return f"aggregate {collection} [{','.join(stages)}]"
+    if command_name in ("count", "distinct"):
+        return f"{command_name} {collection} {value_shape(command.get('query', {}))}"
+    return f"{command_name} {collection}"
+
+
+def explainable_command(command_name: str, command: Dict) -> Optional[Dict]:
+    if command_name not in EXPLAINABLE:
+        return None
+    return {key: value for key, value in command.items() if key not in _SESSION_FIELDS}
+
+
+def plan_summary(explain: Dict) -> str:
+    """Winning plan as `STAGE(index) <- STAGE ...`, top stage first"""
+    def find_planner(node):
+        if isinstance(node, dict):
+            if "queryPlanner" in node:
+                return node["queryPlanner"]
+            for value in node.values():
+                found = find_planner(value)
+                if found:
+                    return found
+        elif isinstance(node, list):
+            for value in node:
+                found = find_planner(value)
+                if found:
+                    return found
+        return None
+
+    planner = find_planner(explain) or {}
+    plan = planner.get("winningPlan", {})
+    plan = plan.get("queryPlan", plan)
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        stages.append(f"{stage}({plan['indexName']})" if plan.get("indexName") else stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " <- ".join(stages) or "unknown"
+
+
+class RequestProfile:
+    """Commands issued while serving one request"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.db_seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.slow: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def record(self, shape: str, seconds: float, repeatable: bool) -> None:
+        with self._lock:
+            self.round_trips += 1
+            self.db_seconds += seconds
+            if repeatable:
+                self.shapes[shape] += 1
+            if seconds * 1000 >= QUERY_PROFILER_SLOW_MS:
+                self.slow.append((shape, seconds))
+
+    def repeated(self, threshold: int = QUERY_PROFILER_REPEAT_THRESHOLD) -> Dict[str, int]:
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+    def flags(self, max_round_trips: int = QUERY_PROFILER_MAX_ROUND_TRIPS) -> List[str]:
+        flags = []
+        if self.round_trips > max_round_trips:
+            flags.append("round_trips")
+        if self.repeated():
+            flags.append("repeated_shape")
+        if self.slow:
+            flags.append("slow_command")
+        return flags
+
+    def header(self) -> str:
+        value = f"rt={self.round_trips}; db_ms={self.db_seconds * 1000:.1f}"
+        flags = self.flags()
+        if flags:
+            value += f"; flags={','.join(flags)}"
+        return value
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("db_profile", default=None)
+
+
+class _ProfilerListener(monitoring.CommandListener):
+    def __init__(self, profiler: "QueryProfiler"):
+        self.profiler = profiler
+        self._pending: Dict[Tuple, Tuple[Optional[RequestProfile], str]] = {}
+
+    def started(self, event):
+        profile = current_profile.get()
+        if profile is None:
+            return
+        shape = command_shape(event.command_name, event.command)
+        self._pending[(event.connection_id, event.request_id)] = (profile, shape)
+        self.profiler.sample(shape, event.command_name, event.command)
+
+    def _finish(self, event):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is not None:
+            profile, shape = pending
+            seconds = event.duration_micros / 1e6
+            profile.record(shape, seconds, repeatable=event.command_name != "getMore")
+            self.profiler.observe_command(shape, seconds)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+
+class QueryProfiler:
+    """Per-route and per-shape aggregates over all profiled requests"""
+
+    def __init__(self):
+        self.listener = _ProfilerListener(self)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.routes: Dict[str, Dict] = {}
+            self.shapes: Dict[str, Dict] = {}
+
+    def begin(self):
+        """Start profiling the current request; returns the contextvar token for `end`"""
+        if not QUERY_PROFILER_ENABLED:
+            return None
+        return current_profile.set(RequestProfile())
+
+    def end(self, token, route: str) -> Optional[RequestProfile]:
+        if token is None:
+            return None
+        profile = current_profile.get()
+        current_profile.reset(token)
+        if profile is None:
+            return None
+        self.observe_request(route, profile)
+        return profile
+
+    def _shape_stats(self, shape: str) -> Dict:
+        stats = self.shapes.get(shape)
+        if stats is None:
+            if len(self.shapes) >= MAX_SHAPES:
+                shape = "other"
+                stats = self.shapes.get(shape)
+            if stats is None:
+                stats = self.shapes[shape] = {"count": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                              "repeated_in": 0, "routes": Counter(), "sample": None, "plan": None}
+        return stats
+
+    def sample(self, shape: str, command_name: str, command: Dict) -> None:
+        if shape in self.shapes and self.shapes[shape]["sample"] is not None:
+            return
+        with self._lock:
+            stats = self._shape_stats(shape)
+            if stats["sample"] is None:
+                stats["sample"] = explainable_command(command_name, command)
+
+    def observe_command(self, shape: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._shape_stats(shape)
+            stats["count"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def observe_request(self, route: str, profile: RequestProfile) -> None:
+        flags = profile.flags()
+        repeated = profile.repeated()
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = {"requests": 0, "round_trips": 0, "max_round_trips": 0,
+                                              "db_seconds": 0.0, "max_db_seconds": 0.0, "flagged": 0}
+            stats["requests"] += 1
+            stats["round_trips"] += profile.round_trips
+            stats["max_round_trips"] = max(stats["max_round_trips"], profile.round_trips)
+            stats["db_seconds"] += profile.db_seconds
+            stats["max_db_seconds"] = max(stats["max_db_seconds"], profile.db_seconds)
+            stats["flagged"] += bool(flags)
+            for shape in profile.shapes:
+                self._shape_stats(shape)["routes"][route] += 1
+            for shape in repeated:
+                self._shape_stats(shape)["repeated_in"] += 1
+        if flags:
+            profile_logger.info(
+                "%s: %d round trips, %.1f ms in Mongo (%s)", route, profile.round_trips,
+                profile.db_seconds * 1000, ",".join(flags),
+                extra={"route": route, "round_trips": profile.round_trips, "flags": flags,
+                       "repeated": repeated, "db_ms": round(profile.db_seconds * 1000, 2)}
+            )
+
+    def report(self, limit: int = 20) -> Dict:
+        """Routes by total DB time and the most expensive query shapes"""
+        with self._lock:
+            routes = [{
+                "route": route,
+                "requests": stats["requests"],
+                "avg_round_trips": round(stats["round_trips"] / stats["requests"], 2),
+                "max_round_trips": stats["max_round_trips"],
+                "avg_db_ms": round(stats["db_seconds"] / stats["requests"] * 1000, 2),
+                "max_db_ms": round(stats["max_db_seconds"] * 1000, 2),
+                "total_db_ms": round(stats["db_seconds"] * 1000, 2),
+                "flagged": stats["flagged"]
+            } for route, stats in self.routes.items()]
+            shapes = [{
+                "shape": shape,
+                "count": stats["count"],
+                "total_ms": round(stats["seconds"] * 1000, 2),
+                "avg_ms": round(stats["seconds"] / stats["count"] * 1000, 3) if stats["count"] else 0,
+                "max_ms": round(stats["max_seconds"] * 1000, 2),
+                "repeated_in_requests": stats["repeated_in"],
+                "routes": dict(stats["routes"].most_common(5)),
+                "plan": stats["plan"]
+            } for shape, stats in self.shapes.items()]
+        routes.sort(key=lambda r: r["total_db_ms"], reverse=True)
+        shapes.sort(key=lambda s: (s["repeated_in_requests"], s["total_ms"]), reverse=True)
+        return {
+            "budget": {"max_round_trips": QUERY_PROFILER_MAX_ROUND_TRIPS,
+                       "repeat_threshold": QUERY_PROFILER_REPEAT_THRESHOLD,
+                       "slow_ms": QUERY_PROFILER_SLOW_MS},
+            "routes": routes[:limit],
+            "shapes": shapes[:limit]
+        }
+
+    async def explain(self, db, shapes: List[str]) -> None:
+        """Fill in the winning plan for the given shapes (runs `explain` once per shape)"""
+        for shape in shapes:
+            stats = self.shapes.get(shape)
+            if not stats or not stats["sample"] or stats["plan"]:
+                continue
+            try:
+                result = await db.command({"explain": stats["sample"], "verbosity": "queryPlanner"})
+                stats["plan"] = plan_summary(result)
+            except Exception as e:
+                stats["plan"] = f"explain failed: {e}"
+
+
+query_profiler = QueryProfiler()
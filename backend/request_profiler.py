@@ -0,0 +1,286 @@
+"""
+On-demand statistical profiling of live requests.
+
+A request is profiled when a management user sends `X-Profile: 1` (checked
+against the normal JWT header / session cookie) or when it falls into the
+PROFILER_SAMPLE_RATE random sample. Randomly sampled profiles are only kept when
+the request took at least PROFILER_MIN_DURATION_MS, so the store fills with slow
+requests rather than typical ones.
+
+While any request is being profiled a sampler thread wakes every
+PROFILER_INTERVAL_MS and looks at the request's asyncio task:
+  - if it is the task running on the event loop, the loop thread's Python stack
+    is recorded (time spent computing on the loop)
+  - otherwise the task's suspended coroutine stack is recorded with an
+    `[awaiting]` leaf (time spent waiting on Mongo, an HTTP call, a lock ...)
+Other requests interleaved on the loop are not attributed to the profile.
+
+Profiles are kept in memory (bounded, oldest evicted) keyed by route template
+and exported in the collapsed-stack format (`frame;frame;frame count` per line)
+that flamegraph.pl, speedscope and inferno read directly.
+
+The middleware must be the innermost one: the route handler then runs in the
+same task the middleware registers (BaseHTTPMiddleware layers spawn new tasks).
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from starlette.requests import Request
+from auth_utils import verify_jwt_token
+from log_pipeline import request_id_var
+
+PROFILER_SAMPLE_RATE = float(os.environ.get('PROFILER_SAMPLE_RATE', 0))
+PROFILER_MIN_DURATION_MS = float(os.environ.get('PROFILER_MIN_DURATION_MS', 500))
+PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS', 5))
+PROFILER_MAX_STORED = int(os.environ.get('PROFILER_MAX_STORED', 100))
+PROFILER_MAX_CONCURRENT = int(os.environ.get('PROFILER_MAX_CONCURRENT', 4))
+
+PROFILE_TRIGGER_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+AWAITING = "[awaiting]"
+MAX_DEPTH = 128
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).stem}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def is_loop_callback(frame) -> bool:
+    # asyncio's Handle._run steps the task; everything above it is the loop and the server
+    code = frame.f_code
+    return code.co_name == "_run" and code.co_filename.endswith(os.path.join("asyncio", "events.py"))
+
+
+def thread_stack(frame) -> Tuple[str, ...]:
+    """Stack of a running thread, outermost first, starting at the first frame the loop resumed"""
+    frames = []
+    while frame is not None and len(frames) < MAX_DEPTH:
+        if is_loop_callback(frame):
+            break
+        frames.append(frame_label(frame))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+def task_stack(task: asyncio.Task) -> Tuple[str, ...]:
+    """Where a suspended task is waiting, outermost coroutine first"""
+    frames = []
+    coro = task.get_coro()
+    while coro is not None and len(frames) < MAX_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return tuple(frames) + (AWAITING,)
+
+
+def _running_task(loop) -> Optional[asyncio.Task]:
+    # asyncio's own registry of the task each loop is currently stepping
+    current = getattr(asyncio.tasks, "_current_tasks", None)
+    return current.get(loop) if current is not None else None
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, trigger: str, request_id: Optional[str] = None):
+        self.profile_id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.route = path
+        self.trigger = trigger
+        self.request_id = request_id
+        self.started = datetime.now(timezone.utc)
+        self.duration_ms = 0.0
+        self.status: Optional[int] = None
+        self.stacks: Counter = Counter()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def hottest(self, limit: int = 5) -> List[Dict]:
+        """Leaf frames by share of samples (self time)"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack[-1] if stack else "?"] += count
+        total = self.samples or 1
+        return [{"frame": frame, "share": round(count / total, 3)} for frame, count in leaves.most_common(limit)]
+
+    def summary(self) -> Dict:
+        return {
+            "profile_id": self.profile_id,
+            "route": self.route,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "request_id": self.request_id,
+            "started": self.started.isoformat(),
+            "duration_ms": round(self.duration_ms, 2),
+            "status": self.status,
+            "samples": self.samples,
+            "hottest": self.hottest()
+        }
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{';'.join(stack) or '?'} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+class Sampler:
+    """One background thread sampling every active profile; idle when nothing is profiled"""
+
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._active: Dict[asyncio.Task, Tuple[RequestProfile, asyncio.AbstractEventLoop, int]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> int:
+        return len(self._active)
+
+    def add(self, task: asyncio.Task, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active[task] = (profile, task.get_loop(), threading.get_ident())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+            self._wake.set()
+
+    def remove(self, task: asyncio.Task) -> None:
+        with self._lock:
+            self._active.pop(task, None)
+
+    def sample_once(self) -> None:
+        with self._lock:
+            active = list(self._active.items())
+        frames = sys._current_frames()
+        for task, (profile, loop, thread_id) in active:
+            try:
+                if _running_task(loop) is task and thread_id in frames:
+                    stack = thread_stack(frames[thread_id])
+                else:
+                    stack = task_stack(task)
+            except Exception:
+                # The loop thread moves on while we walk its frames; drop the sample
+                continue
+            profile.stacks[stack] += 1
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self.sample_once()
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+
+
+class ProfileStore:
+    """Most recent profiles, bounded, oldest evicted first"""
+
+    def __init__(self, max_stored: int = PROFILER_MAX_STORED):
+        self.max_stored = max_stored
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles[profile.profile_id] = profile
+            while len(self._profiles) > self.max_stored:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(profile_id)
+
+    def list(self, route: Optional[str] = None) -> List[RequestProfile]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [p for p in reversed(profiles) if route is None or p.route == route]
+
+    def by_route(self) -> Dict[str, List[Dict]]:
+        grouped: Dict[str, List[Dict]] = {}
+        for profile in self.list():
+            grouped.setdefault(profile.route, []).append(profile.summary())
+        return grouped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+sampler = Sampler()
+profile_store = ProfileStore()
+
+
+def is_management(request: Request) -> bool:
+    """True when the request carries a valid management token (header or session cookie)"""
+    authorization = request.headers.get("authorization", "")
+    token = authorization[7:] if authorization.startswith("Bearer ") else request.cookies.get("session_token")
+    if not token:
+        return False
+    try:
+        return verify_jwt_token(token).get("role") == "management"
+    except HTTPException:
+        return False
+
+
+class ProfilerMiddleware:
+    """ASGI middleware profiling requests on demand (see module docstring)"""
+
+    def __init__(self, app, sample_rate: float = None, min_duration_ms: float = None,
+                 store: ProfileStore = None, profiler: Sampler = None):
+        self.app = app
+        self.sample_rate = PROFILER_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.min_duration_ms = PROFILER_MIN_DURATION_MS if min_duration_ms is None else min_duration_ms
+        self.store = store or profile_store
+        self.sampler = profiler or sampler
+
+    def _trigger(self, scope) -> Optional[str]:
+        request = Request(scope)
+        if request.headers.get(PROFILE_TRIGGER_HEADER) == "1" and is_management(request):
+            return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trigger = self._trigger(scope)
+        if trigger is None or self.sampler.active >= PROFILER_MAX_CONCURRENT:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope["method"], scope["path"], trigger, request_id_var.get())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                if trigger == "header":
+                    message.setdefault("headers", []).append(
+                        (PROFILE_ID_HEADER.lower().encode(), profile.profile_id.encode()))
+            await send(message)
+
+        task = asyncio.current_task()
+        start = time.perf_counter()
+        self.sampler.add(task, profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.sampler.remove(task)
+            profile.duration_ms = (time.perf_counter() - start) * 1000
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None) or "unmatched"
+            if trigger == "header" or profile.duration_ms >= self.min_duration_ms:
+                self.store.add(profile)
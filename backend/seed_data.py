@@ -6,6 +6,8 @@ from pathlib import Path
 from datetime import datetime
 import uuid
 from auth_utils import hash_password
+from storage import utcnow
+from line_items import normalize_line_item, items_total_paise
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -267,7 +269,7 @@ async def seed_database():
             "veg_type": veg_type,
             "prep_time": random.randint(5, 20),
             "available": True,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": utcnow()
         }
 
     # Generate lists
@@ -296,7 +298,7 @@ async def seed_database():
             "role": "management",
             "canteen_id": None,
             "picture": None,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": utcnow()
         },
         {
             "user_id": "mgmt_sopanam",
@@ -306,7 +308,7 @@ async def seed_database():
             "role": "management",
             "canteen_id": "sopanam",
             "picture": None,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": utcnow()
         },
         {
             "user_id": "mgmt_mba",
@@ -316,7 +318,7 @@ async def seed_database():
             "role": "management",
             "canteen_id": "mba",
             "picture": None,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": utcnow()
         },
         {
             "user_id": "mgmt_samudra",
@@ -326,7 +328,7 @@ async def seed_database():
             "role": "management",
             "canteen_id": "samudra",
             "picture": None,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": utcnow()
         }
     ]
     await db.users.insert_many(management_users)
@@ -343,7 +345,7 @@ async def seed_database():
             "role": "crew",
             "canteen_id": "sopanam",
             "picture": None,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": utcnow()
         },
         {
             "user_id": "crew_mba",
@@ -353,7 +355,7 @@ async def seed_database():
             "role": "crew",
             "canteen_id": "mba",
             "picture": None,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": utcnow()
         },
         {
             "user_id": "crew_samudra",
@@ -363,7 +365,7 @@ async def seed_database():
             "role": "crew",
             "canteen_id": "samudra",
             "picture": None,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": utcnow()
         }
     ]
     await db.users.insert_many(crew_users)
@@ -401,23 +403,23 @@ async def seed_database():
             for item in selected_items:
                 quantity = random.randint(1, 2)
                 price = item.get('price', 50.0)
-                order_items.append({
+                order_items.append(normalize_line_item({
                     "item_id": item['item_id'],
-                    "name": item['name'],
+                    "item_name": item['name'],
                     "quantity": quantity,
-                    "price": price
-                })
+                    "price_at_order": price
+                }))
                 total_amount += price * quantity
             
             # Create order with different timestamps for priority testing
-            created_time = datetime.utcnow()
+            created_time = utcnow()
             if status == "REQUESTED" and i == 0:
                 # Make first REQUESTED order older (for priority highlighting)
-                created_time = datetime.utcnow() - timedelta(minutes=15)
+                created_time = utcnow() - timedelta(minutes=15)
             elif status == "PREPARING":
-                created_time = datetime.utcnow() - timedelta(minutes=8)
+                created_time = utcnow() - timedelta(minutes=8)
             elif status == "READY":
-                created_time = datetime.utcnow() - timedelta(minutes=3)
+                created_time = utcnow() - timedelta(minutes=3)
             
             order = {
                 "order_id": f"order_{uuid.uuid4().hex[:12]}",
@@ -430,9 +432,10 @@ async def seed_database():
                 "razorpay_order_id": f"order_{uuid.uuid4().hex[:8]}",
                 "razorpay_payment_id": f"pay_{uuid.uuid4().hex[:8]}",
                 "total_amount": total_amount,
-                "created_at": created_time.isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-                "expires_at": (datetime.utcnow() + timedelta(hours=1)).isoformat()
+                "total_paise": items_total_paise(order_items),
+                "created_at": created_time,
+                "updated_at": utcnow(),
+                "expires_at": utcnow() + timedelta(hours=1)
             }
             demo_orders.append(order)
             token_counter += 1
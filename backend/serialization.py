@@ -0,0 +1,82 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional
+import orjson
+from cachetools import TTLCache
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter, ValidationError
+from models import Canteen
+from metrics import record_cache
+
+# Built once at import: schema construction is the expensive part of a TypeAdapter.
+# The list endpoints use the adapters of their views.py ListView instead.
+CANTEENS_ADAPTER = TypeAdapter(List[Canteen])
+
+# Pre-encoded menu / canteen payloads, keyed by cache key (e.g. "menu:sopanam")
+# Short TTL so other workers pick up menu edits even without a local invalidation
+MENU_CACHE_TTL_SECONDS = 30
+_encoded_cache = TTLCache(maxsize=64, ttl=MENU_CACHE_TTL_SECONDS)
+
+
+def encode_raw(content: Any) -> bytes:
+    """Encode plain dicts/lists straight from Mongo with orjson (no validation)"""
+    return orjson.dumps(content)
+
+
+def encode_models(adapter: TypeAdapter, docs: List[Dict]) -> bytes:
+    """
+    Validate documents against a pre-built TypeAdapter and dump them to JSON bytes.
+    Falls back to raw encoding for legacy documents that no longer match the model.
+    """
+    try:
+        return adapter.dump_json(adapter.validate_python(docs))
+    except ValidationError as e:
+        logging.warning(f"Serialization fallback to raw encoding: {e.error_count()} validation errors")
+        return encode_raw(docs)
+
+
+def to_python(adapter: TypeAdapter, docs: List[Dict]) -> List[Dict]:
+    """Like encode_models, but returns JSON-ready Python objects instead of bytes"""
+    try:
+        return adapter.dump_python(adapter.validate_python(docs), mode="json")
+    except ValidationError as e:
+        logging.warning(f"Serialization fallback to raw documents: {e.error_count()} validation errors")
+        return docs
+
+
+def json_response(content: Any = None, encoded: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Return a JSON response without FastAPI's jsonable_encoder pass.
+    Pass `encoded` when the body is already serialized.
+    """
+    if encoded is not None:
+        return Response(content=encoded, media_type="application/json", headers=headers)
+    return ORJSONResponse(content=content, headers=headers)
+
+
+async def _cached(key: str, load: Callable, build: Callable[[Any], Any]) -> Any:
+    value = _encoded_cache.get(key)
+    record_cache(key.split(":", 1)[0], value is not None)
+    if value is None:
+        value = build(await load())
+        _encoded_cache[key] = value
+    return value
+
+
+async def cached_encoded(key: str, load: Callable, encode: Callable[[Any], bytes]) -> bytes:
+    """Return cached JSON bytes for `key`, loading and encoding them on a miss"""
+    return await _cached(key, load, encode)
+
+
+async def cached_objects(key: str, load: Callable, convert: Callable[[Any], Any]) -> Any:
+    """
+    Like cached_encoded, but caches JSON-ready Python objects for payloads that
+    are merged with live data before encoding. Callers must not mutate them.
+    """
+    return await _cached(key, load, convert)
+
+
+def invalidate_encoded(*prefixes: str) -> None:
+    """Drop cached payloads whose key starts with any of `prefixes` (all when none given)"""
+    for key in list(_encoded_cache.keys()):
+        if not prefixes or key.startswith(prefixes):
+            _encoded_cache.pop(key, None)
@@ -4,25 +4,71 @@ from dotenv import load_dotenv
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Cookie, Header, Response, Body
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Cookie, Header, Request, Response, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 import os
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
+import asyncio
 import razorpay
 import socketio
+import time
 import uuid
 
 # Import local modules
 from models import *
 from auth_utils import hash_password, verify_password, create_jwt_token, get_current_user, generate_token_number
 from ai_service import ai_service
+from pagination import fetch_page, NEXT_CURSOR_HEADER, DEFAULT_PAGE_SIZE
+from menu_import import (
+    parse_rows, validate_rows, existing_query, plan_writes, MENU_IMPORT_MAX_ROWS, CREW_FIELDS
+)
+from exporter import (
+    stream_ndjson, stream_csv, build_export_query,
+    EXPORT_FORMATS, EXPORT_PROJECTION, EXPORT_BATCH_SIZE
+)
+from storage import to_document, utcnow, as_utc
+from migrations import pending_migrations
+from line_items import normalize_items, items_total_paise, to_paise, from_paise
+from serialization import (
+    json_response, to_python, cached_encoded, cached_objects, invalidate_encoded, CANTEENS_ADAPTER
+)
+from views import CREW_ORDER_VIEW, STUDENT_ORDER_VIEW, MENU_VIEW, BILL_VIEW
+from archiver import order_archive, archive_orders, ARCHIVE_INTERVAL_SECONDS
+from analytics_store import analytics_store, ANALYTICS_REFRESH_SECONDS, STORE_PROJECTION
+from forecasting import refresh_forecasts, trim_forecast, FORECAST_INTERVAL_SECONDS, FORECAST_HORIZON_HOURS
+from jobs import run_periodically, run_every, Debouncer
+from kitchen import (
+    build_board, allocate_units, outstanding_units, ordered_units, KITCHEN_STATUSES, KITCHEN_PROJECTION,
+    KITCHEN_UPDATE_DEBOUNCE_MS
+)
+from eta import hourly_throughput, service_rate, estimate, estimate_queue, changed_estimates, prep_minutes
+from preorders import (
+    OrderScheduler, slot_start, slot_capacity, release_time, upcoming_slots, reserve_slot, free_slot,
+    SLOT_MINUTES, PREORDER_MAX_HOURS_AHEAD, RELEASE, EXPIRE
+)
+from canteen_load import measure_load, rank_canteens, name_pattern, LOAD_REFRESH_SECONDS, RECENT_WINDOW
+from order_book import order_book, BOOK_PROJECTION, ORDER_BOOK_REFRESH_SECONDS, ORDER_BOOK_VERIFY_SECONDS
+from delay_alerts import DelayAlertEngine, delay_config, DELAY_ALERT_SYNC_SECONDS
+from log_pipeline import setup_logging, request_id_var
+from metrics import (
+    REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, SOCKET_CLIENTS,
+    mongo_command_metrics, instrument_socketio
+)
+from query_profiler import query_profiler, PROFILE_HEADER
+from request_profiler import ProfilerMiddleware, is_management, profile_store, PROFILE_ID_HEADER
+from loop_monitor import loop_monitor
+from knapsack import protein_combo
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[mongo_command_metrics, query_profiler.listener])
 db = client[os.environ['DB_NAME']]
 
 # Razorpay client - Use test mode
@@ -38,17 +84,100 @@ else:
 # Socket.IO setup
 sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
 
-# Create the main app
-app = FastAPI()
+
+def socket_room_label(room: Optional[str]) -> str:
+    """Canteen rooms are reported by name; per-user rooms are folded into one label"""
+    if room is None:
+        return "broadcast"
+    if not isinstance(room, str):
+        return "multiple"
+    return "user" if room.startswith("user_") else room
+
+instrument_socketio(sio, socket_room_label)
+
+# Create the main app (orjson for every response that goes through FastAPI's encoder)
+app = FastAPI(default_response_class=ORJSONResponse)
 
 @app.on_event("startup")
 async def startup_db_client():
-    # Create TTL index for automatic deletion after 30 days (2592000 seconds)
+    # Timestamps must be native dates for date-range queries and the archiver to work
+    try:
+        pending = await pending_migrations(db)
+        if pending:
+            logging.warning(f"Pending data migrations {pending} - run `python migrations.py`")
+    except Exception as e:
+        logging.error(f"Failed to check data migrations: {e}")
+
+    # Aged orders are moved to cold storage by the archiver instead of being deleted
+    # by a TTL index; drop the old 30-day TTL index if this database still has it
+    try:
+        indexes = await db.orders.index_information()
+        if "expireAfterSeconds" in indexes.get("created_at_1", {}):
+            await db.orders.drop_index("created_at_1")
+            logging.info("Dropped 30-day TTL index on orders.created_at")
+        await db.orders.create_index("created_at")
+        await db.orders.create_index("archive_batch", sparse=True)
+    except Exception as e:
+        logging.error(f"Failed to create archive indexes: {e}")
+
+    # Compound indexes backing keyset pagination (equality prefix + sort keys)
     try:
-        await db.orders.create_index("created_at", expireAfterSeconds=2592000)
-        logging.info("Created TTL index on orders.created_at for 30 days retention")
+        await db.orders.create_index([("student_id", 1), ("created_at", -1), ("order_id", -1)])
+        await db.orders.create_index([("canteen_id", 1), ("status", 1), ("created_at", -1), ("order_id", -1)])
+        await db.bills.create_index([("student_id", 1), ("timestamp", -1), ("bill_id", -1)])
+        await db.orders.create_index([("status", 1), ("updated_at", 1)])
+        # Every worker's order book polls {"updated_at": {"$gte": watermark}} across all statuses
+        await db.orders.create_index("updated_at")
+        logging.info("Created pagination indexes on orders and bills")
     except Exception as e:
-        logging.error(f"Failed to create TTL index: {e}")
+        logging.error(f"Failed to create pagination indexes: {e}")
+
+    # Pre-orders: one booking counter per (canteen, slot), parked orders by release time
+    try:
+        await db.pickup_slots.create_index([("canteen_id", 1), ("slot_start", 1)], unique=True)
+        await db.orders.create_index("release_at", partialFilterExpression={"status": "SCHEDULED"})
+    except Exception as e:
+        logging.error(f"Failed to create pre-order indexes: {e}")
+
+    # One worker at a time runs the archiver (lease in job_locks)
+    app.state.archiver_task = asyncio.create_task(run_periodically(
+        db, "order_archiver", ARCHIVE_INTERVAL_SECONDS, lambda: archive_orders(db)
+    ))
+
+    # Every worker keeps its own columnar analytics store in sync (first run loads the window)
+    app.state.analytics_task = asyncio.create_task(run_every(
+        "analytics_refresh", ANALYTICS_REFRESH_SECONDS, lambda: analytics_store.refresh(db)
+    ))
+
+    # Demand forecasts are computed by one worker and shared through the collection
+    app.state.forecast_task = asyncio.create_task(run_periodically(
+        db, "demand_forecast", FORECAST_INTERVAL_SECONDS, lambda: refresh_forecasts(db, analytics_store)
+    ))
+
+    # Every worker serves crew reads from its own active-order book (first run hydrates it)
+    app.state.order_book_task = asyncio.create_task(run_every(
+        "order_book_refresh", ORDER_BOOK_REFRESH_SECONDS, lambda: order_book.refresh(db)
+    ))
+    app.state.order_book_verify_task = asyncio.create_task(run_every(
+        "order_book_verify", ORDER_BOOK_VERIFY_SECONDS, lambda: order_book.verify(db)
+    ))
+
+    # Delay alerts: every worker arms timers for the kitchen orders and pushes them when they fire
+    app.state.delay_sync_task = asyncio.create_task(run_every(
+        "delay_alert_sync", DELAY_ALERT_SYNC_SECONDS, sync_all_delay_alerts
+    ))
+    app.state.delay_alert_task = asyncio.create_task(delay_alerts.run(push_delay_alert))
+
+    # Heartbeat + watchdog thread: records loop lag and captures whatever blocks the loop
+    app.state.loop_monitor_task = loop_monitor.start()
+
+    # Releases scheduled pre-orders to the kitchen (timers rebuilt from the orders collection)
+    app.state.scheduler_task = asyncio.create_task(order_scheduler.run(db))
+
+    # Transitions refresh a canteen's load index; this keeps idle canteens' throughput current
+    app.state.load_task = asyncio.create_task(run_periodically(
+        db, "canteen_load", LOAD_REFRESH_SECONDS, refresh_all_canteen_loads
+    ))
 
 # Socket.IO app
 socket_app = socketio.ASGIApp(sio, app)
@@ -56,10 +185,16 @@ socket_app = socketio.ASGIApp(sio, app)
 # Create API router
 api_router = APIRouter(prefix="/api")
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+# Configure logging: JSON lines written off the event loop (see log_pipeline.py)
+setup_logging()
+access_logger = logging.getLogger("access")
+crew_logger = logging.getLogger("server.crew")
+socket_logger = logging.getLogger("server.socket")
 
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Added first so it is innermost and shares the route handler's task (see request_profiler.py)
+app.add_middleware(ProfilerMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -68,16 +203,36 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER, PROFILE_HEADER, PROFILE_ID_HEADER],
 )
 
 @app.middleware("http")
 async def log_requests(request, call_next):
-    import time
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    logging.info(f"REQUEST: {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.4f}s")
-    return response
+    # Correlate every log line of this request (the id is echoed back to the client)
+    request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex[:16]
+    token = request_id_var.set(request_id)
+    profile_token = query_profiler.begin()
+    try:
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        route = request.scope.get("route")
+        profile = query_profiler.end(profile_token, route.path if route else "unmatched")
+        profile_token = None
+        # Debug aid: management clients sending `X-DB-Profile: 1` get round trips / DB time / flags back
+        if profile is not None and request.headers.get(PROFILE_HEADER) == "1" and is_management(request):
+            response.headers[PROFILE_HEADER] = profile.header()
+        access_logger.info(
+            "%s %s %s %.1fms", request.method, request.url.path, response.status_code, duration_ms,
+            extra={"method": request.method, "path": request.url.path,
+                   "status": response.status_code, "duration_ms": round(duration_ms, 2)}
+        )
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+    finally:
+        if profile_token is not None:
+            query_profiler.end(profile_token, "failed")
+        request_id_var.reset(token)
 
 # Cache Control Middleware
 @app.middleware("http")
@@ -88,6 +243,18 @@ async def add_cache_control_header(request, call_next):
     response.headers["Expires"] = "0"
     return response
 
+# Added last so it is outermost and times the whole middleware stack
+app.add_middleware(MetricsMiddleware)
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint (requires `Bearer METRICS_TOKEN` when that is set)"""
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
 # ============================================
 # AUTH ENDPOINTS
 # ============================================
@@ -109,8 +276,7 @@ async def student_register(data: StudentRegister):
         role="student"
     )
     
-    user_dict = user.model_dump()
-    user_dict['created_at'] = user_dict['created_at'].isoformat()
+    user_dict = to_document(user)
     
     await db.users.insert_one(user_dict)
     
@@ -194,8 +360,7 @@ async def google_auth_callback(session_id: str):
             role=role,
             picture=picture
         )
-        user_dict = user.model_dump()
-        user_dict['created_at'] = user_dict['created_at'].isoformat()
+        user_dict = to_document(user)
         await db.users.insert_one(user_dict)
         user_id = user.user_id
     else:
@@ -211,9 +376,7 @@ async def google_auth_callback(session_id: str):
         session_token=token,
         expires_at=datetime.now(timezone.utc) + timedelta(days=7)
     )
-    session_dict = session.model_dump()
-    session_dict['created_at'] = session_dict['created_at'].isoformat()
-    session_dict['expires_at'] = session_dict['expires_at'].isoformat()
+    session_dict = to_document(session)
     await db.user_sessions.insert_one(session_dict)
     
     return {
@@ -306,8 +469,7 @@ async def crew_signup(email: str = Body(...), password: str = Body(...), name: s
         role="crew",
         canteen_id=canteen_id
     )
-    user_dict = user.model_dump()
-    user_dict['created_at'] = user_dict['created_at'].isoformat()
+    user_dict = to_document(user)
     user_dict['password_hash'] = hash_password(password)
     
     await db.users.insert_one(user_dict)
@@ -341,8 +503,7 @@ async def management_signup(email: str = Body(...), password: str = Body(...), n
         name=name,
         role="management"
     )
-    user_dict = user.model_dump()
-    user_dict['created_at'] = user_dict['created_at'].isoformat()
+    user_dict = to_document(user)
     user_dict['password_hash'] = hash_password(password)
     
     await db.users.insert_one(user_dict)
@@ -380,19 +541,62 @@ async def logout(response: Response):
 
 @api_router.get("/canteens", response_model=List[Canteen])
 async def get_canteens():
-    """Get all canteens"""
-    canteens = await db.canteens.find({}, {"_id": 0}).to_list(10)
-    return canteens
+    """Get all canteens with their live load index"""
+    canteens = await cached_objects(
+        "canteens",
+        lambda: db.canteens.find({}, {"_id": 0}).to_list(10),
+        lambda docs: to_python(CANTEENS_ADAPTER, docs)
+    )
+    loads = await load_snapshots()
+    return json_response([{**canteen, "load": loads.get(canteen['canteen_id'])} for canteen in canteens])
+
+@api_router.post("/canteens/suggest")
+async def suggest_canteen(request: CanteenSuggestionRequest):
+    """Rank canteens by how soon they could serve a cart (least busy kitchen first)"""
+    cart = {}
+    for line in request.items:
+        cart[line.item_name] = cart.get(line.item_name, 0) + line.quantity
+    menus = {canteen['canteen_id']: [] for canteen in await db.canteens.find({}, {"_id": 0, "canteen_id": 1}).to_list(None)}
+    async for item in db.menu_items.find(
+        {"name": {"$regex": name_pattern(cart), "$options": "i"}},
+        {"_id": 0, "item_id": 1, "name": 1, "canteen_id": 1, "available": 1, "stock_qty": 1, "prep_time": 1}
+    ):
+        menus.setdefault(item['canteen_id'], []).append(item)
+    ranked = rank_canteens(cart, menus, await load_snapshots(), utcnow())
+    return {"suggested": ranked[0]['canteen_id'] if ranked and ranked[0]['can_serve'] else None, "canteens": ranked}
+
+@api_router.get("/canteens/{canteen_id}/pickup-slots")
+async def get_pickup_slots(canteen_id: str, hours: int = 4):
+    """Bookable pre-order pickup slots with remaining capacity"""
+    hours = max(1, min(hours, PREORDER_MAX_HOURS_AHEAD))
+    now = utcnow()
+    booked = {
+        doc['slot_start']: doc['booked']
+        async for doc in db.pickup_slots.find(
+            {"canteen_id": canteen_id, "slot_start": {"$gte": now, "$lte": now + timedelta(hours=hours + 1)}},
+            {"_id": 0, "slot_start": 1, "booked": 1}
+        )
+    }
+    throughput = hourly_throughput(analytics_store, canteen_id)
+    return {
+        "canteen_id": canteen_id,
+        "slot_minutes": SLOT_MINUTES,
+        "slots": upcoming_slots(now, hours, throughput, booked)
+    }
 
 # ============================================
 # MENU ENDPOINTS
 # ============================================
 
-@api_router.get("/menu/{canteen_id}", response_model=List[MenuItem])
+@api_router.get("/menu/{canteen_id}", response_model=List[MenuCard])
 async def get_menu(canteen_id: str):
-    """Get menu for a specific canteen"""
-    items = await db.menu_items.find({"canteen_id": canteen_id}, {"_id": 0}).to_list(100)
-    return items
+    """Get menu for a specific canteen (served from pre-encoded bytes)"""
+    encoded = await cached_encoded(
+        f"menu:{canteen_id}",
+        lambda: db.menu_items.find({"canteen_id": canteen_id}, MENU_VIEW.projection).to_list(100),
+        MENU_VIEW.encode
+    )
+    return json_response(encoded=encoded)
 
 @api_router.get("/menu/item/{item_id}", response_model=MenuItem)
 async def get_menu_item(item_id: str):
@@ -409,9 +613,9 @@ async def create_menu_item(item: MenuItemCreate, user: dict = Depends(get_curren
         raise HTTPException(status_code=403, detail="Unauthorized")
     
     menu_item = MenuItem(**item.model_dump())
-    item_dict = menu_item.model_dump()
-    item_dict['created_at'] = item_dict['created_at'].isoformat()
+    item_dict = to_document(menu_item)
     await db.menu_items.insert_one(item_dict)
+    invalidate_encoded("menu:", "prep:")
     return menu_item
 
 @api_router.patch("/menu/{item_id}")
@@ -428,237 +632,53 @@ async def update_menu_item(item_id: str, update: MenuItemUpdate, user: dict = De
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Item not found")
     
+    invalidate_encoded("menu:", "prep:")
     return {"message": "Item updated successfully"}
 
-# ============================================
-# MANAGEMENT ANALYTICS ENDPOINTS
-# ============================================
-
-@api_router.get("/management/analytics/revenue")
-async def get_revenue_analytics(canteen_id: str = None, user: dict = Depends(get_current_user)):
-    """Get revenue analytics"""
-    if user['role'] != 'management':
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
-    try:
-        match_filter = {"status": "COMPLETED"}
-        if canteen_id:
-            match_filter["canteen_id"] = canteen_id
-        
-        # Get total revenue
-        pipeline = [
-            {"$match": match_filter},
-            {"$group": {
-                "_id": None,
-                "total_revenue": {"$sum": "$total_amount"},
-                "total_orders": {"$sum": 1},
-                "avg_order_value": {"$avg": "$total_amount"}
-            }}
-        ]
-        
-        result = await db.orders.aggregate(pipeline).to_list(1)
-        
-        if result:
-            return {
-                "total_revenue": result[0]["total_revenue"],
-                "total_orders": result[0]["total_orders"],
-                "avg_order_value": result[0]["avg_order_value"]
-            }
-        else:
-            return {
-                "total_revenue": 0,
-                "total_orders": 0,
-                "avg_order_value": 0
-            }
-    except Exception as e:
-        logging.error(f"Revenue analytics error: {e}")
-        return {
-            "total_revenue": 0,
-            "total_orders": 0,
-            "avg_order_value": 0
-        }
-
-@api_router.get("/management/analytics/top-items")
-async def get_top_items(canteen_id: str = None, user: dict = Depends(get_current_user)):
-    """Get top selling items"""
-    if user['role'] != 'management':
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
-    try:
-        match_filter = {"status": "COMPLETED"}
-        if canteen_id:
-            match_filter["canteen_id"] = canteen_id
-        
-        pipeline = [
-            {"$match": match_filter},
-            {"$unwind": "$items"},
-            {"$group": {
-                "_id": "$items.item_id",
-                "name": {"$first": "$items.name"},
-                "quantity": {"$sum": "$items.quantity"},
-                "revenue": {"$sum": {"$multiply": ["$items.price", "$items.quantity"]}}
-            }},
-            {"$sort": {"quantity": -1}},
-            {"$limit": 10}
-        ]
-        
-        items = await db.orders.aggregate(pipeline).to_list(10)
-        return items
-    except Exception as e:
-        logging.error(f"Top items error: {e}")
-        return []
-
-@api_router.get("/management/analytics/daily-summary")
-async def get_daily_summary(canteen_id: str = None, user: dict = Depends(get_current_user)):
-    """Get daily summary"""
-    if user['role'] != 'management':
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
-    try:
-        # Get today's date range
-        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        match_filter = {
-            "created_at": {"$gte": today_start.isoformat()},
-            "status": "COMPLETED"
-        }
-        if canteen_id:
-            match_filter["canteen_id"] = canteen_id
-        
-        pipeline = [
-            {"$match": match_filter},
-            {"$group": {
-                "_id": None,
-                "total_orders": {"$sum": 1},
-                "total_revenue": {"$sum": "$total_amount"}
-            }}
-        ]
-        
-        result = await db.orders.aggregate(pipeline).to_list(1)
-        
-        if result:
-            return {
-                "total_orders": result[0]["total_orders"],
-                "total_revenue": result[0]["total_revenue"]
-            }
-        else:
-            return {
-                "total_orders": 0,
-                "total_revenue": 0
-            }
-    except Exception as e:
-        logging.error(f"Daily summary error: {e}")
-        return {
-            "total_orders": 0,
-            "total_revenue": 0
-        }
-
-@api_router.get("/management/analytics/peak-hours")
-async def get_peak_hours(canteen_id: str = None, user: dict = Depends(get_current_user)):
-    """Get peak hours analysis"""
-    if user['role'] != 'management':
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
-    try:
-        match_filter = {"status": "COMPLETED"}
-        if canteen_id:
-            match_filter["canteen_id"] = canteen_id
-        
-        # Group by hour
-        pipeline = [
-            {"$match": match_filter},
-            {"$group": {
-                "_id": {"$hour": {"$toDate": "$created_at"}},
-                "order_count": {"$sum": 1}
-            }},
-            {"$sort": {"order_count": -1}},
-            {"$limit": 5}
-        ]
-        
-        hours = await db.orders.aggregate(pipeline).to_list(5)
-        
-        if hours:
-            peak_hour = hours[0]["_id"]
-            # Convert to dictionary for frontend: "12:00": 5
-            peak_hours_dict = {f"{h['_id']}:00": h['order_count'] for h in hours}
-            
-            return {
-                "peak_hour": f"{peak_hour}:00 - {peak_hour + 1}:00",
-                "peak_hour_orders": hours[0]["order_count"],
-                "busiest_hour": f"{peak_hour}:00",
-                "busiest_hour_orders": hours[0]["order_count"],
-                "peak_hours": peak_hours_dict,
-                "hours_data": hours
-            }
-        else:
-            return {
-                "peak_hour": "12:00 - 13:00",
-                "peak_hour_orders": 0,
-                "busiest_hour": "12:00",
-                "busiest_hour_orders": 0,
-                "peak_hours": {},
-                "hours_data": []
-            }
-    except Exception as e:
-        logging.error(f"Peak hours error: {e}")
-        return {
-            "peak_hour": "12:00 - 13:00",
-            "peak_hour_orders": 0, 
-            "peak_hours": {},
-            "hours_data": []
-        }
-
-@api_router.get("/management/analytics/combos")
-async def get_frequent_combos(canteen_id: str = None, user: dict = Depends(get_current_user)):
-    """Get frequent item combinations"""
-    if user['role'] != 'management':
+@api_router.post("/menu/bulk")
+async def bulk_import_menu(request: Request, user: dict = Depends(get_current_user)):
+    """Upsert items and change prices, stock and availability in bulk from JSON or CSV (Management/Crew)"""
+    if user['role'] not in ['management', 'crew']:
         raise HTTPException(status_code=403, detail="Unauthorized")
-    
-    try:
-        # This is a simplified version - real Apriori would be more complex
-        return {
-            "combos": [
-                {"item1": "Chicken Biryani", "item2": "Cold Drink", "frequency": 45, "confidence": 0.75},
-                {"item1": "Veg Biryani", "item2": "Raita", "frequency": 32, "confidence": 0.68},
-                {"item1": "Idli", "item2": "Sambar", "frequency": 28, "confidence": 0.82}
-            ]
-        }
-    except Exception as e:
-        logging.error(f"Combos error: {e}")
-        return {"combos": []}
 
-@api_router.get("/canteens")
-async def get_canteens():
-    """Get all canteens"""
     try:
-        canteens = await db.canteens.find({}, {"_id": 0}).to_list(100)
-        return canteens
-    except Exception as e:
-        logging.error(f"Error fetching canteens: {e}")
-        return []
+        raw_rows = parse_rows(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not read import: {e}")
+    if not raw_rows:
+        raise HTTPException(status_code=400, detail="No rows to import")
+    if len(raw_rows) > MENU_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {MENU_IMPORT_MAX_ROWS} rows per import")
+
+    is_management = user['role'] == 'management'
+    rows, errors = validate_rows(raw_rows, None if is_management else CREW_FIELDS)
+    created = updated = 0
+    if rows:
+        existing = await db.menu_items.find(
+            existing_query(rows), {"_id": 0, "item_id": 1, "canteen_id": 1, "name": 1}
+        ).to_list(None)
+        requests, positions, plan_errors = plan_writes(rows, existing, is_management, utcnow())
+        errors.extend(plan_errors)
+        if requests:
+            try:
+                result = (await db.menu_items.bulk_write(requests, ordered=False)).bulk_api_result
+            except BulkWriteError as e:
+                result = e.details
+                errors.extend(
+                    {"row": positions[err['index']], "error": err.get('errmsg', 'Write failed')}
+                    for err in result.get('writeErrors', [])
+                )
+            created = result.get('nUpserted', 0)
+            updated = result.get('nMatched', 0)
+            invalidate_encoded("menu:", "prep:")
 
-@api_router.post("/management/ai-insights")
-async def get_ai_insights(user: dict = Depends(get_current_user)):
-    """Get AI-powered insights (Mocked for now)"""
-    if user['role'] != 'management':
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
     return {
-        "insights": [
-             {"title": "Revenue Growth", "message": "Revenue is up 15% compared to last week."},
-             {"title": "Popular Item", "message": "Chicken Biryani is trending this week."}
-        ],
-        "recommendations": [
-            {"title": "Stock Up", "suggestion": "Increase inventory for Chicken", "priority": "high", "category": "Inventory"},
-            {"title": "Promotion", "suggestion": "Run a discount on Veg Meals", "priority": "medium", "category": "Marketing"}
-        ],
-        "predictions": {
-            "stock_alerts": ["Low stock warning: Milk", "Low stock warning: Coffee Powder"]
-        }
+        "rows": len(raw_rows),
+        "created": created,
+        "updated": updated,
+        "errors": sorted(errors, key=lambda err: err['row'])
     }
 
-
-
 # ============================================
 # ORDER ENDPOINTS
 # ============================================
@@ -677,13 +697,21 @@ async def create_order(order_data: OrderCreate, user: dict = Depends(get_current
     if user['role'] != 'student':
         raise HTTPException(status_code=403, detail="Only students can place orders")
     
+    # The stored total is what the line items add up to; a client total that disagrees is refused
+    items = normalize_items([item.model_dump() for item in order_data.items])
+    if any(item['quantity'] < 1 for item in items):
+        raise HTTPException(status_code=400, detail="Item quantities must be at least 1")
+    total_paise = items_total_paise(items)
+    if to_paise(order_data.total_amount) != total_paise:
+        raise HTTPException(status_code=400, detail="Order total does not match its items")
+    
     # Generate token number
     token_number = generate_token_number()
     
     # Create Razorpay order (test mode)
     if RAZORPAY_ENABLED and razorpay_client:
         razorpay_order = razorpay_client.order.create({
-            "amount": int(order_data.total_amount * 100),
+            "amount": total_paise,
             "currency": "INR",
             "payment_capture": 1
         })
@@ -700,24 +728,43 @@ async def create_order(order_data: OrderCreate, user: dict = Depends(get_current
         token_number=token_number,
         status="PENDING_PAYMENT",
         razorpay_order_id=razorpay_order_id,
-        total_amount=order_data.total_amount,
+        total_amount=from_paise(total_paise),
         expires_at=datetime.now(timezone.utc) + timedelta(minutes=10)
     )
     
-    order_dict = order.model_dump()
-    order_dict['created_at'] = order_dict['created_at'].isoformat()
-    order_dict['updated_at'] = order_dict['updated_at'].isoformat()
-    order_dict['expires_at'] = order_dict['expires_at'].isoformat()
+    order_dict = to_document(order)
+    order_dict['items'] = items
+    order_dict['total_paise'] = total_paise
+    units = ordered_units(order_dict)
+    if order_data.pickup_slot:
+        order_dict['pickup_slot'], order_dict['release_at'] = await book_pickup_slot(
+            order_data.canteen_id, as_utc(order_data.pickup_slot), units
+        )
+        order_dict['eta'] = None
+    else:
+        order_dict['eta'] = await quote_eta(order_data.canteen_id, units)
     
-    await db.orders.insert_one(order_dict)
+    try:
+        await db.orders.insert_one(order_dict)
+    except Exception:
+        # The slot place was taken before the insert; hand it back
+        if order_dict['pickup_slot']:
+            await free_slot(db, order_data.canteen_id, order_dict['pickup_slot'])
+        raise
+    if order_dict['pickup_slot']:
+        # Give the slot back if the order is never paid
+        order_scheduler.schedule(order_dict['expires_at'], EXPIRE, order.order_id)
     
     return {
         "order_id": order.order_id,
         "token_number": token_number,
         "razorpay_order_id": razorpay_order_id,
         "razorpay_key_id": os.environ.get('RAZORPAY_KEY_ID', 'rzp_test_demo'),
-        "amount": order_data.total_amount,
-        "test_mode": not RAZORPAY_ENABLED
+        "amount": from_paise(total_paise),
+        "test_mode": not RAZORPAY_ENABLED,
+        "eta": order_dict['eta'],
+        "pickup_slot": order_dict['pickup_slot'],
+        "release_at": order_dict['release_at']
     }
 
 @api_router.post("/orders/{order_id}/verify-payment")
@@ -742,39 +789,63 @@ async def verify_payment(order_id: str, verification: PaymentVerification, user:
             raise HTTPException(status_code=400, detail="Payment verification failed")
     # In test mode, always pass verification
     
-    # Update order status to REQUESTED (crew needs to accept it first)
-    await db.orders.update_one(
-        {"order_id": order_id},
-        {"$set": {
-            "status": "REQUESTED",
-            "razorpay_payment_id": payment_id,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    # Update order status to REQUESTED (crew needs to accept it first); pre-orders
+    # park in SCHEDULED until their release time
+    now = utcnow()
+    release_at = order.get('release_at')
+    status = "SCHEDULED" if release_at and release_at > now else "REQUESTED"
+    update = {"status": status, "razorpay_payment_id": payment_id, "updated_at": now}
+    if status == "REQUESTED":
+        update["requested_at"] = now
+    # Only an order still awaiting payment moves on: an expired pre-order was cancelled
+    # and its pickup slot given to someone else, so a late payment must not revive it
+    result = await db.orders.update_one({"order_id": order_id, "status": "PENDING_PAYMENT"}, {"$set": update})
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Order is no longer awaiting payment")
+    await sync_order_book(order_id)
     
     # Create bill
     bill = Bill(
         student_id=user['user_id'],
         order_id=order_id,
         amount=order['total_amount'],
-        items=order['items']
+        items=normalize_items(order['items'])
     )
-    bill_dict = bill.model_dump()
-    bill_dict['timestamp'] = bill_dict['timestamp'].isoformat()
+    bill_dict = to_document(bill)
+    bill_dict['items'] = normalize_items(bill_dict['items'])
     await db.bills.insert_one(bill_dict)
     
     # Update spending analytics
     await update_spending_analytics(user['user_id'], order['total_amount'])
     
+    if status == "SCHEDULED":
+        order_scheduler.schedule(release_at, RELEASE, order_id)
+        return {"message": "Payment verified", "status": status, "release_at": release_at}
+    
     # Emit socket event
     await sio.emit('order_update', {
         'order_id': order_id,
         'status': 'REQUESTED',
         'canteen_id': order['canteen_id']
     }, room=order['canteen_id'])
+    kitchen_updates(order['canteen_id'])
     
     return {"message": "Payment verified", "status": "REQUESTED"}
 
+async def sync_order_book(*order_ids: str):
+    """Re-read orders whose status just changed into the in-memory order book"""
+    async for order in db.orders.find({"order_id": {"$in": list(order_ids)}}, BOOK_PROJECTION):
+        order_book.apply(order)
+
+async def active_crew_orders(canteen_id: str) -> List[dict]:
+    """REQUESTED/PREPARING/READY orders oldest first (order book, or Mongo until it is hydrated)"""
+    if order_book.ready:
+        return order_book.pending(canteen_id)
+    return await db.orders.find({
+        "canteen_id": canteen_id,
+        "status": {"$in": ["REQUESTED", "PREPARING", "READY"]}
+    }, CREW_ORDER_VIEW.projection).sort("created_at", 1).to_list(100)
+
 @api_router.get("/orders/pending/{canteen_id}")
 async def get_pending_orders(canteen_id: str, user: dict = Depends(get_current_user)):
     """Get pending orders for crew dashboard - only PAID orders"""
@@ -782,63 +853,94 @@ async def get_pending_orders(canteen_id: str, user: dict = Depends(get_current_u
         raise HTTPException(status_code=403, detail="Unauthorized - Crew only")
     
     try:
-        # Fetch orders that are PAID but not yet completed
-        # Statuses: REQUESTED, PREPARING, READY (exclude PENDING_PAYMENT, COMPLETED, CANCELLED)
-        orders = await db.orders.find({
-            "canteen_id": canteen_id,
-            "status": {"$in": ["REQUESTED", "PREPARING", "READY"]}
-        }, {"_id": 0}).sort("created_at", 1).to_list(100)
+        # Orders that are PAID but not yet completed
+        # Statuses: REQUESTED, PREPARING, READY (exclude PENDING_PAYMENT, SCHEDULED, COMPLETED, CANCELLED)
+        orders = await active_crew_orders(canteen_id)
         
-        return orders
+        return json_response(encoded=CREW_ORDER_VIEW.encode(orders))
     except Exception as e:
         logging.error(f"Error fetching pending orders: {e}")
         return []
 
 @api_router.get("/orders/recent/{canteen_id}")
-async def get_recent_orders(canteen_id: str, user: dict = Depends(get_current_user)):
-    """Get recent orders including history for crew dashboard"""
-    logging.info(f"Fetching recent orders for canteen: '{canteen_id}' Requesting User: {user.get('email')}")
+async def get_recent_orders(
+    canteen_id: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    user: dict = Depends(get_current_user)
+):
+    """Get recent orders including history for crew dashboard (history is cursor-paginated)"""
+    crew_logger.debug("Fetching recent orders for canteen %s (user %s)", canteen_id, user.get('email'))
     if user['role'] != 'crew':
         raise HTTPException(status_code=403, detail="Unauthorized - Crew only")
-    
-    try:
-        # 1. Fetch active orders (REQUESTED, PREPARING, READY)
-        active_orders = await db.orders.find({
-            "canteen_id": canteen_id,
-            "status": {"$in": ["REQUESTED", "PREPARING", "READY"]}
-        }, {"_id": 0}).sort("created_at", 1).to_list(100)
-        logging.info(f"Found {len(active_orders)} active orders for {canteen_id}")
-
-        # 2. Fetch recent COMPLETED/CANCELLED orders (Limit 50)
-        history_orders = await db.orders.find({
-            "canteen_id": canteen_id,
-            "status": {"$in": ["COMPLETED", "CANCELLED"]}
-        }, {"_id": 0}).sort("created_at", -1).limit(50).to_list(50)
 
+    try:
+        # 1. Active orders (REQUESTED, PREPARING, READY) from the order book - first page only
+        active_orders = []
+        if not cursor:
+            active_orders = await active_crew_orders(canteen_id)
+            crew_logger.debug("Found %d active orders for %s", len(active_orders), canteen_id)
+
+        # 2. Fetch one page of COMPLETED/CANCELLED history, newest first
+        history_orders, next_cursor = await fetch_page(
+            db.orders,
+            {"canteen_id": canteen_id, "status": {"$in": ["COMPLETED", "CANCELLED"]}},
+            sort_field="created_at",
+            id_field="order_id",
+            projection=CREW_ORDER_VIEW.projection,
+            limit=limit,
+            cursor=cursor
+        )
         results = active_orders + history_orders
-        logging.info(f"Returning total {len(results)} orders for {canteen_id}")
-        return results
+        crew_logger.debug("Returning %d orders for %s", len(results), canteen_id)
+        return json_response(
+            encoded=CREW_ORDER_VIEW.encode(results),
+            headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error fetching recent orders: {e}")
         return []
 
 @api_router.get("/orders/alerts/{canteen_id}")
 async def get_priority_orders(canteen_id: str, user: dict = Depends(get_current_user)):
-    """Get priority/delayed orders (waiting > 15 minutes)"""
+    """Get priority/delayed orders (past their prep-time deadline)"""
     if user['role'] != 'crew':
         raise HTTPException(status_code=403, detail="Unauthorized - Crew only")
     
+    if delay_alerts.ready:
+        now = utcnow()
+        alerts = delay_alerts.alerts(canteen_id)
+        order_ids = [alert['order_id'] for alert in alerts]
+        if order_book.ready:
+            priority_orders = order_book.cards(canteen_id, order_ids)
+        else:
+            priority_orders = await db.orders.find({"order_id": {"$in": order_ids}}, CREW_ORDER_VIEW.projection).to_list(None)
+        return json_response({
+            "priority_orders": CREW_ORDER_VIEW.dump(priority_orders),
+            "alerts": [{
+                "order_id": alert['order_id'],
+                "token_number": alert['token_number'],
+                "deadline": alert['deadline'],
+                "overdue_minutes": int((now - alert['deadline']).total_seconds() // 60)
+            } for alert in alerts]
+        })
+    
     try:
-        # Calculate timestamp for 15 minutes ago
-        fifteen_mins_ago = (datetime.now(timezone.utc) - timedelta(minutes=15)).isoformat()
+        # Until the alert engine has synced: anything waiting more than 15 minutes
+        fifteen_mins_ago = utcnow() - timedelta(minutes=15)
         
-        priority_orders = await db.orders.find({
-            "canteen_id": canteen_id,
-            "status": {"$in": ["REQUESTED", "PREPARING"]},
-            "created_at": {"$lt": fifteen_mins_ago}
-        }, {"_id": 0}).to_list(50)
+        if order_book.ready:
+            priority_orders = order_book.delayed(canteen_id, fifteen_mins_ago, ["REQUESTED", "PREPARING"])
+        else:
+            priority_orders = await db.orders.find({
+                "canteen_id": canteen_id,
+                "status": {"$in": ["REQUESTED", "PREPARING"]},
+                "created_at": {"$lt": fifteen_mins_ago}
+            }, CREW_ORDER_VIEW.projection).to_list(50)
         
-        return {"priority_orders": priority_orders}
+        return json_response({"priority_orders": CREW_ORDER_VIEW.dump(priority_orders)})
     except Exception as e:
         logging.error(f"Error fetching priority orders: {e}")
         return {"priority_orders": []}
@@ -849,37 +951,40 @@ async def get_order_stats(canteen_id: str, user: dict = Depends(get_current_user
     if user['role'] != 'crew':
         raise HTTPException(status_code=403, detail="Unauthorized - Crew only")
     
+    # Rolling counters kept by the order book
+    if order_book.ready:
+        return order_book.stats(canteen_id)
+    
     try:
         today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
         
-        logging.info(f"Stats Debug: Fetching stats for {canteen_id} since {today_start.isoformat()}")
+        crew_logger.debug("Fetching stats for %s since %s", canteen_id, today_start)
         
         # 1. Count Completed Today
         completed_count = await db.orders.count_documents({
             "canteen_id": canteen_id,
             "status": "COMPLETED",
-            "updated_at": {"$gte": today_start.isoformat()}
+            "updated_at": {"$gte": today_start}
         })
-        logging.info(f"Stats Debug: Found {completed_count} completed orders")
+        crew_logger.debug("Found %d completed orders", completed_count)
         
-        # 2. Calculate Avg Prep Time (Mock or Simple Calculation)
-        # For now, let's return a static or random value if real data is hard to compute without 'prep_start' timestamp
-        # Or just aggregate based on created_at vs updated_at for COMPLETED orders
+        # 2. Avg Prep Time: paid (requested_at) -> READY (ready_at); older orders
+        # without those stamps fall back to created_at -> updated_at
         
         pipeline = [
             {
                 "$match": {
                     "canteen_id": canteen_id,
                     "status": "COMPLETED",
-                    "updated_at": {"$gte": today_start.isoformat()}
+                    "updated_at": {"$gte": today_start}
                 }
             },
             {
                 "$project": {
                     "duration": {
                         "$subtract": [
-                            {"$toDate": "$updated_at"},
-                            {"$toDate": "$created_at"}
+                            {"$ifNull": ["$ready_at", "$updated_at"]},
+                            {"$ifNull": ["$requested_at", "$created_at"]}
                         ]
                     }
                 }
@@ -913,7 +1018,7 @@ async def get_order_stats(canteen_id: str, user: dict = Depends(get_current_user
 @api_router.post("/orders/verify-token")
 async def verify_token(token_data: dict, user: dict = Depends(get_current_user)):
     """Verify token number and return order details"""
-    logging.info(f"Verification Request: {token_data} User: {user.get('email')}")
+    crew_logger.debug("Verification request %s from %s", token_data, user.get('email'))
     if user['role'] != 'crew':
         raise HTTPException(status_code=403, detail="Unauthorized - Crew only")
     
@@ -934,12 +1039,93 @@ async def verify_token(token_data: dict, user: dict = Depends(get_current_user))
         order = await db.orders.find_one({"token_number": {"$regex":f"^{token}$", "$options": "i"}}, {"_id": 0})
 
     if not order:
-        logging.warning(f"Token NOT found: '{token}'")
+        crew_logger.warning("Token not found: %s", token)
         raise HTTPException(status_code=404, detail="Invalid token or order not found")
     
-    logging.info(f"Token verified: {token} -> {order['order_id']}")
+    crew_logger.info("Token verified: %s -> %s", token, order['order_id'])
     return order
 
+CREW_STATUSES = ["REQUESTED", "PREPARING", "READY", "COMPLETED", "CANCELLED"]
+
+# Kitchen transitions crew may batch: target status -> statuses it can be reached from.
+# Unpaid, scheduled and finished orders are never touched by a bulk change.
+ALLOWED_FROM = {
+    "REQUESTED": ["PREPARING"],
+    "PREPARING": ["REQUESTED"],
+    "READY": ["REQUESTED", "PREPARING"],
+    "COMPLETED": ["READY"],
+    "CANCELLED": ["REQUESTED", "PREPARING", "READY"],
+}
+
+# Everything the order book, analytics store and socket payloads need after a status change
+STATUS_CHANGE_PROJECTION = {**BOOK_PROJECTION, **STORE_PROJECTION, "updated_at": 1}
+
+
+def status_update(status: str, now: datetime) -> dict:
+    update = {"status": status, "updated_at": now}
+    if status == "READY":
+        update["ready_at"] = now
+    return update
+
+
+async def apply_status_change(order: dict):
+    """Local side effects of a status change (book, analytics, pickup slot); the caller emits"""
+    order_book.apply(order)
+    if order['status'] == "COMPLETED":
+        analytics_store.add(order)
+    if order['status'] == "CANCELLED":
+        await release_pickup_slot(order['order_id'])
+
+
+@api_router.post("/orders/status/bulk")
+async def bulk_update_order_status(batch: OrderStatusBulkUpdate, user: dict = Depends(get_current_user)):
+    """Apply many status changes with one write, one read and one socket message per room (crew only)"""
+    if user['role'] != 'crew':
+        raise HTTPException(status_code=403, detail="Unauthorized - Crew only")
+
+    invalid = sorted({change.status for change in batch.updates if change.status not in CREW_STATUSES})
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid status {invalid}. Must be one of: {CREW_STATUSES}")
+
+    # A later entry for the same order wins, as if the requests had been sent one by one
+    changes = {change.order_id: change.status for change in batch.updates}
+    # Millisecond precision so the stamp reads back equal from Mongo; it tells the orders
+    # this batch changed apart from ones whose current status rejected the transition
+    now = utcnow()
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    await db.orders.bulk_write(
+        [UpdateOne({"order_id": order_id, "status": {"$in": ALLOWED_FROM[status]}}, {"$set": status_update(status, now)})
+         for order_id, status in changes.items()],
+        ordered=False
+    )
+    found = await db.orders.find({"order_id": {"$in": list(changes)}}, STATUS_CHANGE_PROJECTION).to_list(None)
+    orders = [order for order in found
+              if order['status'] == changes[order['order_id']] and order.get('updated_at') == now]
+    changed = {order['order_id'] for order in orders}
+
+    by_canteen, by_student = defaultdict(list), defaultdict(list)
+    for order in orders:
+        await apply_status_change(order)
+        event = {'order_id': order['order_id'], 'status': order['status'], 'token_number': order['token_number']}
+        by_canteen[order['canteen_id']].append(event)
+        by_student[order['student_id']].append(event)
+
+    for canteen_id, events in by_canteen.items():
+        await sio.emit('order_updates', {'canteen_id': canteen_id, 'updates': events}, room=canteen_id)
+    for student_id, events in by_student.items():
+        await sio.emit('order_updates', {'student_id': student_id, 'updates': events}, room=student_id)
+    for canteen_id in by_canteen:
+        kitchen_updates(canteen_id)
+
+    found_ids = {order['order_id'] for order in found}
+    return {
+        "updated": [{"order_id": order['order_id'], "status": order['status']} for order in orders],
+        "rejected": [{"order_id": order['order_id'], "status": order['status'], "requested": changes[order['order_id']]}
+                     for order in found if order['order_id'] not in changed],
+        "not_found": [order_id for order_id in changes if order_id not in found_ids]
+    }
+
+
 @api_router.patch("/orders/{order_id}/status")
 async def update_order_status(order_id: str, status_data: dict, user: dict = Depends(get_current_user)):
     """Update order status (crew only)"""
@@ -951,52 +1137,64 @@ async def update_order_status(order_id: str, status_data: dict, user: dict = Dep
         raise HTTPException(status_code=400, detail="Status required")
     
     # Validate status
-    valid_statuses = ["REQUESTED", "PREPARING", "READY", "COMPLETED", "CANCELLED"]
-    if new_status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
+    if new_status not in CREW_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {CREW_STATUSES}")
     
-    result = await db.orders.update_one(
-        {"order_id": order_id},
-        {"$set": {
-            "status": new_status,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    result = await db.orders.update_one({"order_id": order_id}, {"$set": status_update(new_status, utcnow())})
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
     
     # Emit socket event for real-time updates
-    order = await db.orders.find_one({"order_id": order_id}, {"_id": 0})
+    order = await db.orders.find_one({"order_id": order_id}, STATUS_CHANGE_PROJECTION)
     if order:
+        await apply_status_change(order)
         await sio.emit('order_update', {
             'order_id': order_id,
             'status': new_status,
             'canteen_id': order['canteen_id']
         }, room=order['canteen_id'])
+        kitchen_updates(order['canteen_id'])
     
     return {"message": "Order status updated successfully", "status": new_status}
 
 
 @api_router.get("/orders/my")
-async def get_my_orders(user: dict = Depends(get_current_user)):
-    """Get current user's orders (Last 30 days)"""
+async def get_my_orders(
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    user: dict = Depends(get_current_user)
+):
+    """Get current user's orders (Last 30 days), newest first, cursor-paginated"""
     # Calculate 30 days ago
-    thirty_days_ago = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-    
-    orders = await db.orders.find(
+    thirty_days_ago = utcnow() - timedelta(days=30)
+
+    orders, next_cursor = await fetch_page(
+        db.orders,
         {
             "student_id": user['user_id'],
             "created_at": {"$gte": thirty_days_ago}
         },
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(500) # Increased limit to ensure full month history
-    return orders
+        sort_field="created_at",
+        id_field="order_id",
+        projection=STUDENT_ORDER_VIEW.projection,
+        limit=limit,
+        cursor=cursor
+    )
+    return json_response(
+        encoded=STUDENT_ORDER_VIEW.encode(orders),
+        headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    )
 
 @api_router.delete("/orders/my")
 async def clear_order_history(user: dict = Depends(get_current_user)):
     """Clear all order history for current user"""
+    active = await db.orders.find(
+        {"student_id": user['user_id'], "status": {"$in": ["REQUESTED", "PREPARING", "READY"]}},
+        {"_id": 0, "order_id": 1}
+    ).to_list(None)
     result = await db.orders.delete_many({"student_id": user['user_id']})
+    order_book.discard([order['order_id'] for order in active])
     return {"message": f"Deleted {result.deleted_count} orders"}
 
 @api_router.post("/orders/batch-delete")
@@ -1006,6 +1204,7 @@ async def delete_orders_batch(batch: OrderBatchDelete, user: dict = Depends(get_
         "student_id": user['user_id'],
         "order_id": {"$in": batch.order_ids}
     })
+    order_book.discard(batch.order_ids)
     return {"message": f"Deleted {result.deleted_count} orders"}
 
     
@@ -1015,7 +1214,7 @@ async def delete_orders_batch(batch: OrderBatchDelete, user: dict = Depends(get_
     
     await db.orders.update_one(
         {"order_id": order_id},
-        {"$set": {"status": status_update.status, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"status": status_update.status, "updated_at": utcnow()}}
     )
     
     # Emit socket event
@@ -1027,6 +1226,292 @@ async def delete_orders_batch(batch: OrderBatchDelete, user: dict = Depends(get_
     
     return {"message": "Status updated"}
 
+# ============================================
+# KITCHEN PRODUCTION BOARD
+# ============================================
+
+async def load_kitchen_orders(canteen_id: str, item_id: Optional[str] = None) -> List[dict]:
+    """Orders the kitchen still has to cook for, oldest first"""
+    query = {"canteen_id": canteen_id, "status": {"$in": KITCHEN_STATUSES}}
+    if item_id:
+        query["items.item_id"] = item_id
+    return await db.orders.find(query, KITCHEN_PROJECTION).sort("created_at", 1).to_list(None)
+
+async def load_prep_times(canteen_id: str, item_ids: Optional[List[str]] = None) -> dict:
+    """{item_id: prep_time} for a canteen's menu, cached with the menu payloads"""
+    prep_times = await cached_objects(
+        f"prep:{canteen_id}",
+        lambda: db.menu_items.find({"canteen_id": canteen_id}, {"_id": 0, "item_id": 1, "prep_time": 1}).to_list(None),
+        lambda menu: {item['item_id']: item.get('prep_time') for item in menu}
+    )
+    if item_ids is None:
+        return prep_times
+    return {item_id: prep_times[item_id] for item_id in item_ids if item_id in prep_times}
+
+async def get_production_board(canteen_id: str) -> dict:
+    orders = await load_kitchen_orders(canteen_id)
+    return build_board(canteen_id, orders, await load_prep_times(canteen_id), utcnow())
+
+async def quote_eta(canteen_id: str, units: dict) -> dict:
+    """ETA for a new order joining the back of the canteen's queue"""
+    queue_depth = await db.orders.count_documents({"canteen_id": canteen_id, "status": {"$in": KITCHEN_STATUSES}})
+    prep_times = await load_prep_times(canteen_id, list(units))
+    now = utcnow()
+    rate = service_rate(hourly_throughput(analytics_store, canteen_id), now)
+    return estimate(queue_depth, units, prep_times, rate, now)
+
+async def refresh_order_etas(canteen_id: str, orders: List[dict], prep_times: dict):
+    """Re-estimate the canteen's queue, persist the ETAs that moved and push them to students"""
+    estimates = estimate_queue(orders, prep_times, hourly_throughput(analytics_store, canteen_id), utcnow())
+    changed = changed_estimates(orders, estimates)
+    if not changed:
+        return
+    await db.orders.bulk_write([
+        UpdateOne({"order_id": order['order_id'], "status": {"$in": KITCHEN_STATUSES}}, {"$set": {"eta": order['eta']}})
+        for order in changed
+    ], ordered=False)
+    for order in changed:
+        await sio.emit('order_eta', {
+            'order_id': order['order_id'],
+            'student_id': order['student_id'],
+            'eta': {**order['eta'], 'ready_at': order['eta']['ready_at'].isoformat()}
+        }, room=order['student_id'])
+
+async def publish_kitchen_update(canteen_id: str) -> Optional[dict]:
+    """
+    Called after every status transition of a canteen's orders: push the production
+    board to the crew and refreshed ETAs to the students still waiting.
+    """
+    try:
+        orders = await load_kitchen_orders(canteen_id)
+        prep_times = await load_prep_times(canteen_id)
+        board = build_board(canteen_id, orders, prep_times, utcnow())
+        await sio.emit('production_board', board, room=canteen_id)
+        await refresh_order_etas(canteen_id, orders, prep_times)
+        await refresh_canteen_load(canteen_id, orders, prep_times)
+        delay_alerts.sync(canteen_id, orders, prep_times, await load_delay_config(canteen_id))
+        return board
+    except Exception as e:
+        logging.error(f"Failed to publish kitchen update for {canteen_id}: {e}")
+        return None
+
+# Status transitions come in bursts (a crew member clearing a batch, the bulk endpoint):
+# publish once per canteen per burst instead of reloading the kitchen on every one
+kitchen_updates = Debouncer(
+    "kitchen_update", KITCHEN_UPDATE_DEBOUNCE_MS / 1000, lambda canteen_id: publish_kitchen_update(canteen_id)
+)
+
+@api_router.get("/kitchen/{canteen_id}/board")
+async def get_kitchen_board(canteen_id: str, user: dict = Depends(get_current_user)):
+    """Outstanding units per item and prioritized prep batches across active orders"""
+    if user['role'] not in ['crew', 'management']:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    if user['role'] == 'crew' and user.get('canteen_id') != canteen_id:
+        raise HTTPException(status_code=403, detail="Unauthorized for this canteen")
+    
+    return await get_production_board(canteen_id)
+
+@api_router.post("/kitchen/{canteen_id}/batches/complete")
+async def complete_kitchen_batch(canteen_id: str, batch: KitchenBatchComplete, user: dict = Depends(get_current_user)):
+    """
+    Record a cooked batch: units go to the oldest orders waiting for the item, and
+    orders with nothing left outstanding become READY.
+    """
+    if user['role'] not in ['crew', 'management']:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    if user['role'] == 'crew' and user.get('canteen_id') != canteen_id:
+        raise HTTPException(status_code=403, detail="Unauthorized for this canteen")
+    
+    remaining = batch.quantity
+    allocated = []
+    prepared_field = f"prepared.{batch.item_id}"
+    
+    # Retry when another crew member's batch touched the same orders first
+    for _ in range(3):
+        orders = await load_kitchen_orders(canteen_id, batch.item_id)
+        allocations, _ = allocate_units(orders, batch.item_id, remaining)
+        if not allocations:
+            break
+        
+        conflict = False
+        for order, units in allocations:
+            already = (order.get('prepared') or {}).get(batch.item_id)
+            updated = await db.orders.find_one_and_update(
+                {
+                    "order_id": order['order_id'],
+                    "status": {"$in": KITCHEN_STATUSES},
+                    prepared_field: already if already is not None else {"$exists": False}
+                },
+                {"$inc": {prepared_field: units}, "$set": {"status": "PREPARING", "updated_at": utcnow()}},
+                projection=KITCHEN_PROJECTION,
+                return_document=ReturnDocument.AFTER
+            )
+            if updated is None:
+                conflict = True
+                continue
+            remaining -= units
+            
+            status = "PREPARING"
+            if not outstanding_units(updated):
+                now = utcnow()
+                result = await db.orders.update_one(
+                    {"order_id": order['order_id'], "status": "PREPARING"},
+                    {"$set": {"status": "READY", "updated_at": now, "ready_at": now}}
+                )
+                if result.modified_count:
+                    status = "READY"
+            
+            allocated.append({
+                "order_id": order['order_id'],
+                "token_number": order.get('token_number'),
+                "quantity": units,
+                "status": status
+            })
+            await sio.emit('order_update', {
+                'order_id': order['order_id'],
+                'status': status,
+                'canteen_id': canteen_id
+            }, room=canteen_id)
+            if status == "READY":
+                await sio.emit('order_update', {
+                    'order_id': order['order_id'],
+                    'status': status,
+                    'student_id': order['student_id']
+                }, room=order['student_id'])
+        
+        if not conflict or not remaining:
+            break
+    
+    if allocated:
+        await sync_order_book(*[entry['order_id'] for entry in allocated])
+    board = await publish_kitchen_update(canteen_id) or await get_production_board(canteen_id)
+    
+    return {"allocated": allocated, "unallocated": remaining, "board": board}
+
+# ============================================
+# DELAY ALERTS
+# ============================================
+
+delay_alerts = DelayAlertEngine()
+
+async def load_delay_config(canteen_id: str) -> tuple:
+    return await cached_objects(
+        f"delay:{canteen_id}",
+        lambda: db.canteens.find_one(
+            {"canteen_id": canteen_id},
+            {"_id": 0, "delay_alert_prep_factor": 1, "delay_alert_grace_minutes": 1}
+        ),
+        delay_config
+    )
+
+async def sync_all_delay_alerts():
+    """Reconcile every canteen's timers with Mongo (startup, and changes made by other workers)"""
+    for canteen in await db.canteens.find({}, {"_id": 0}).to_list(None):
+        canteen_id = canteen['canteen_id']
+        delay_alerts.sync(canteen_id, await load_kitchen_orders(canteen_id), await load_prep_times(canteen_id),
+                          delay_config(canteen))
+    delay_alerts.ready = True
+
+async def push_delay_alert(alert: dict):
+    await sio.emit('order_delayed', {
+        **alert,
+        'deadline': alert['deadline'].isoformat(),
+        'fired_at': alert['fired_at'].isoformat()
+    }, room=alert['canteen_id'])
+
+# ============================================
+# CANTEEN LOAD INDEX
+# ============================================
+
+async def load_snapshots() -> dict:
+    return {doc['canteen_id']: doc async for doc in db.canteen_load.find({}, {"_id": 0})}
+
+async def refresh_canteen_load(canteen_id: str, orders: List[dict], prep_times: dict) -> dict:
+    """Recompute a canteen's load index, store it for every worker and push it to clients"""
+    now = utcnow()
+    recent = await db.orders.count_documents({
+        "canteen_id": canteen_id,
+        "status": {"$in": ["READY", "COMPLETED"]},
+        "updated_at": {"$gte": now - RECENT_WINDOW}
+    })
+    load = measure_load(canteen_id, orders, prep_times, hourly_throughput(analytics_store, canteen_id), recent, now)
+    await db.canteen_load.replace_one({"canteen_id": canteen_id}, load, upsert=True)
+    await sio.emit('canteen_load', {**load, 'updated_at': now.isoformat()})
+    return load
+
+async def refresh_all_canteen_loads():
+    for canteen in await db.canteens.find({}, {"_id": 0, "canteen_id": 1}).to_list(None):
+        canteen_id = canteen['canteen_id']
+        await refresh_canteen_load(canteen_id, await load_kitchen_orders(canteen_id), await load_prep_times(canteen_id))
+
+# ============================================
+# PRE-ORDER SCHEDULING
+# ============================================
+
+async def book_pickup_slot(canteen_id: str, requested: datetime, units: dict) -> tuple:
+    """Validate a requested pickup slot and take a place in it. Returns (slot, release_at)."""
+    slot = slot_start(requested)
+    if slot != requested:
+        raise HTTPException(status_code=400, detail=f"Pickup slots start every {SLOT_MINUTES} minutes")
+    now = utcnow()
+    if slot > now + timedelta(hours=PREORDER_MAX_HOURS_AHEAD):
+        raise HTTPException(status_code=400, detail=f"Pre-orders open {PREORDER_MAX_HOURS_AHEAD} hours ahead")
+    
+    prep_times = await load_prep_times(canteen_id, list(units))
+    release_at = release_time(slot, prep_minutes(units, prep_times))
+    if release_at <= now:
+        raise HTTPException(status_code=400, detail="Pickup slot is too soon - order for now instead")
+    
+    capacity = slot_capacity(hourly_throughput(analytics_store, canteen_id), slot)
+    if not await reserve_slot(db, canteen_id, slot, capacity):
+        raise HTTPException(status_code=409, detail="Pickup slot is full")
+    return slot, release_at
+
+async def release_pickup_slot(order_id: str):
+    """Give a cancelled pre-order's place back to its slot (once)"""
+    order = await db.orders.find_one_and_update(
+        {"order_id": order_id, "pickup_slot": {"$ne": None}, "slot_freed": {"$ne": True}},
+        {"$set": {"slot_freed": True}},
+        projection={"_id": 0, "canteen_id": 1, "pickup_slot": 1}
+    )
+    if order:
+        await free_slot(db, order['canteen_id'], order['pickup_slot'])
+
+async def release_scheduled_order(order_id: str):
+    """Timer: a paid pre-order enters the kitchen queue"""
+    now = utcnow()
+    order = await db.orders.find_one_and_update(
+        {"order_id": order_id, "status": "SCHEDULED"},
+        {"$set": {"status": "REQUESTED", "requested_at": now, "updated_at": now}},
+        projection=BOOK_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    if not order:
+        return
+    order_book.apply(order)
+    await sio.emit('order_update', {
+        'order_id': order_id,
+        'status': 'REQUESTED',
+        'canteen_id': order['canteen_id']
+    }, room=order['canteen_id'])
+    await sio.emit('order_update', {
+        'order_id': order_id,
+        'status': 'REQUESTED',
+        'student_id': order['student_id']
+    }, room=order['student_id'])
+    kitchen_updates(order['canteen_id'])
+
+async def expire_unpaid_preorder(order_id: str):
+    """Timer: an unpaid pre-order past expires_at is cancelled and frees its slot"""
+    result = await db.orders.update_one(
+        {"order_id": order_id, "status": "PENDING_PAYMENT"},
+        {"$set": {"status": "CANCELLED", "updated_at": utcnow()}}
+    )
+    if result.modified_count:
+        await release_pickup_slot(order_id)
+
+order_scheduler = OrderScheduler({RELEASE: release_scheduled_order, EXPIRE: expire_unpaid_preorder})
+
 # ============================================
 # AI RECOMMENDATION ENDPOINTS
 # ============================================
@@ -1107,14 +1592,13 @@ async def generate_diet_plan(gym_input: GymGoalInput, user: dict = Depends(get_c
 
 async def update_spending_analytics(student_id: str, amount: float):
     """Update spending analytics for student"""
-    now = datetime.now(timezone.utc)
+    now = utcnow()
     
     analytics = await db.spending_analytics.find_one({"student_id": student_id}, {"_id": 0})
     
     if not analytics:
         analytics = SpendingAnalytics(student_id=student_id)
-        analytics_dict = analytics.model_dump()
-        analytics_dict['last_updated'] = analytics_dict['last_updated'].isoformat()
+        analytics_dict = to_document(analytics)
         await db.spending_analytics.insert_one(analytics_dict)
     
     # Update totals
@@ -1126,7 +1610,7 @@ async def update_spending_analytics(student_id: str, amount: float):
                 "weekly_total": amount,
                 "monthly_total": amount
             },
-            "$set": {"last_updated": now.isoformat()}
+            "$set": {"last_updated": now}
         }
     )
 
@@ -1139,13 +1623,25 @@ async def get_spending_analytics(user: dict = Depends(get_current_user)):
     return analytics
 
 @api_router.get("/spending/bills")
-async def get_all_bills(user: dict = Depends(get_current_user)):
-    """Get all bills for current user"""
-    bills = await db.bills.find(
+async def get_all_bills(
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    user: dict = Depends(get_current_user)
+):
+    """Get bills for current user, newest first, cursor-paginated"""
+    bills, next_cursor = await fetch_page(
+        db.bills,
         {"student_id": user['user_id']},
-        {"_id": 0}
-    ).sort("timestamp", -1).to_list(100)
-    return bills
+        sort_field="timestamp",
+        id_field="bill_id",
+        projection=BILL_VIEW.projection,
+        limit=limit,
+        cursor=cursor
+    )
+    return json_response(
+        encoded=BILL_VIEW.encode(bills),
+        headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    )
 
 # ============================================
 # MANAGEMENT ANALYTICS ENDPOINTS
@@ -1162,20 +1658,16 @@ async def get_revenue_analytics(
     if user['role'] != 'management':
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    query = {"status": "COMPLETED"}
-    if canteen_id:
-        query["canteen_id"] = canteen_id
-    
-    orders = await db.orders.find(query, {"_id": 0}).to_list(10000)
-    
-    total_revenue = sum(order['total_amount'] for order in orders)
-    total_orders = len(orders)
-    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+    total_orders, total_paise = analytics_store.summary(
+        canteen_id,
+        start=_parse_export_date(start_date, "start_date"),
+        end=_parse_export_date(end_date, "end_date")
+    )
     
     return {
-        "total_revenue": total_revenue,
+        "total_revenue": from_paise(total_paise),
         "total_orders": total_orders,
-        "average_order_value": avg_order_value
+        "average_order_value": from_paise(total_paise // total_orders) if total_orders else 0
     }
 
 @api_router.get("/management/analytics/top-items")
@@ -1184,28 +1676,7 @@ async def get_top_items(canteen_id: Optional[str] = None, user: dict = Depends(g
     if user['role'] != 'management':
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    query = {"status": "COMPLETED"}
-    if canteen_id:
-        query["canteen_id"] = canteen_id
-    
-    orders = await db.orders.find(query, {"_id": 0, "items": 1}).to_list(10000)
-    
-    item_sales = {}
-    for order in orders:
-        for item in order['items']:
-            item_id = item['item_id']
-            if item_id not in item_sales:
-                item_sales[item_id] = {
-                    "item_name": item['item_name'],
-                    "quantity": 0,
-                    "revenue": 0
-                }
-            item_sales[item_id]["quantity"] += item['quantity']
-            item_sales[item_id]["revenue"] += item['quantity'] * item['price_at_order']
-    
-    top_items = sorted(item_sales.items(), key=lambda x: x[1]['revenue'], reverse=True)[:10]
-    
-    return [{" item_id": k, **v} for k, v in top_items]
+    return analytics_store.item_sales(canteen_id, sort_by="revenue_paise", limit=10)
 
 # ============================================
 # CREW ENDPOINTS
@@ -1248,43 +1719,14 @@ async def verify_order_token(order_id: str, user: dict = Depends(get_current_use
         "created_at": order['created_at']
     }
 
-@api_router.get("/orders/alerts/{canteen_id}")
-async def get_order_alerts(canteen_id: str, user: dict = Depends(get_current_user)):
-    """Get priority/delayed orders for crew"""
-    if user['role'] not in ['crew', 'management']:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
-    # Check if crew belongs to this canteen
-    if user['role'] == 'crew' and user.get('canteen_id') != canteen_id:
-        raise HTTPException(status_code=403, detail="Unauthorized for this canteen")
-    
-    # Get orders older than 15 minutes that are still preparing
-    from datetime import datetime, timezone, timedelta
-    threshold = datetime.now(timezone.utc) - timedelta(minutes=15)
-    
-    orders = await db.orders.find({
-        "canteen_id": canteen_id,
-        "status": {"$in": ["PREPARING", "READY"]}
-    }, {"_id": 0}).to_list(100)
-    
-    priority_orders = []
-    for order in orders:
-        created_at = datetime.fromisoformat(order['created_at'].replace('Z', '+00:00'))
-        if created_at < threshold:
-            priority_orders.append({
-                **order,
-                "delay_minutes": int((datetime.now(timezone.utc) - created_at).total_seconds() / 60)
-            })
-    
-    return {
-        "priority_orders": priority_orders,
-        "count": len(priority_orders)
-    }
-
 # ============================================
 # ENHANCED MANAGEMENT ANALYTICS ENDPOINTS
 # ============================================
 
+def _peak_hours(canteen_id: Optional[str] = None, start: Optional[datetime] = None) -> dict:
+    histogram = analytics_store.hour_histogram(canteen_id, start=start)
+    return ai_service.summarize_peak_hours({hour: int(c) for hour, c in enumerate(histogram) if c})
+
 @api_router.get("/management/analytics/peak-hours")
 async def get_peak_hours_analytics(
     canteen_id: Optional[str] = None,
@@ -1294,14 +1736,7 @@ async def get_peak_hours_analytics(
     if user['role'] != 'management':
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    query = {"status": "COMPLETED"}
-    if canteen_id:
-        query["canteen_id"] = canteen_id
-    
-    orders = await db.orders.find(query, {"_id": 0}).to_list(10000)
-    peak_data = await ai_service.predict_peak_hours(orders)
-    
-    return peak_data
+    return _peak_hours(canteen_id)
 
 @api_router.get("/management/analytics/combos")
 async def get_frequent_combos(
@@ -1312,12 +1747,8 @@ async def get_frequent_combos(
     if user['role'] != 'management':
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    query = {"status": "COMPLETED"}
-    if canteen_id:
-        query["canteen_id"] = canteen_id
-    
-    orders = await db.orders.find(query, {"_id": 0}).to_list(10000)
-    combos = await ai_service.analyze_order_combos(orders)
+    pair_counts, item_counts, total_orders = analytics_store.item_pairs(canteen_id)
+    combos = ai_service.combos_from_counts(pair_counts, item_counts, total_orders)
     
     return {"combos": combos}
 
@@ -1330,40 +1761,89 @@ async def get_daily_summary(
     if user['role'] != 'management':
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    from datetime import datetime, timezone
-    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    query = {
-        "status": "COMPLETED",
-        "created_at": {"$gte": today_start.isoformat()}
-    }
-    if canteen_id:
-        query["canteen_id"] = canteen_id
-    
-    orders = await db.orders.find(query, {"_id": 0}).to_list(10000)
+    today_start = utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     
-    total_orders = len(orders)
-    total_revenue = sum(order['total_amount'] for order in orders)
+    total_orders, total_paise = analytics_store.summary(canteen_id, start=today_start)
     
     # Find peak time
-    peak_data = await ai_service.predict_peak_hours(orders)
+    peak_data = _peak_hours(canteen_id, start=today_start)
     
     # Find most ordered item
-    item_counts = {}
-    for order in orders:
-        for item in order['items']:
-            name = item['item_name']
-            item_counts[name] = item_counts.get(name, 0) + item['quantity']
-    
-    most_ordered = max(item_counts.items(), key=lambda x: x[1])[0] if item_counts else "N/A"
+    top = analytics_store.item_sales(canteen_id, start=today_start, sort_by="quantity", limit=1)
+    most_ordered = top[0]["item_name"] if top else "N/A"
     
     return {
         "total_orders": total_orders,
-        "revenue": total_revenue,
+        "revenue": from_paise(total_paise),
         "peak_time": peak_data.get('busiest_hour', 'N/A'),
         "most_ordered_item": most_ordered
     }
 
+@api_router.get("/management/db-profile")
+async def get_db_profile(
+    explain: bool = False,
+    limit: int = Query(20, ge=1, le=200),
+    reset: bool = False,
+    user: dict = Depends(get_current_user)
+):
+    """Per-route Mongo round trips / DB time and the costliest query shapes (see query_profiler.py)"""
+    if user['role'] != 'management':
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    
+    report = query_profiler.report(limit)
+    if explain:
+        await query_profiler.explain(db, [shape["shape"] for shape in report["shapes"]])
+        report = query_profiler.report(limit)
+    if reset:
+        query_profiler.reset()
+    return report
+
+@api_router.get("/management/profiles")
+async def list_request_profiles(
+    route: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    """Stored request profiles (newest first), grouped by route template"""
+    if user['role'] != 'management':
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    
+    if route:
+        return {route: [profile.summary() for profile in profile_store.list(route)]}
+    return profile_store.by_route()
+
+@api_router.get("/management/profiles/{profile_id}")
+async def download_request_profile(
+    profile_id: str,
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    user: dict = Depends(get_current_user)
+):
+    """One profile as collapsed stacks (flamegraph.pl / speedscope) or JSON"""
+    if user['role'] != 'management':
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "json":
+        return {**profile.summary(), "stacks": [
+            {"stack": list(stack), "samples": count} for stack, count in profile.stacks.most_common()
+        ]}
+    return Response(
+        content=profile.collapsed(), media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.collapsed"'}
+    )
+
+@api_router.get("/management/loop-health")
+async def get_loop_health(
+    limit: int = Query(10, ge=1, le=100),
+    user: dict = Depends(get_current_user)
+):
+    """Event-loop lag percentiles and the handlers that blocked the loop the longest"""
+    if user['role'] != 'management':
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    
+    return loop_monitor.report(limit)
+
 @api_router.post("/management/ai-insights")
 async def get_ai_insights(user: dict = Depends(get_current_user)):
     """Get AI-driven business insights"""
@@ -1371,39 +1851,42 @@ async def get_ai_insights(user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Unauthorized")
     
     # Gather analytics data
-    query = {"status": "COMPLETED"}
-    orders = await db.orders.find(query, {"_id": 0}).to_list(10000)
-    
-    total_revenue = sum(order['total_amount'] for order in orders)
-    total_orders = len(orders)
-    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+    total_orders, total_paise = analytics_store.summary()
+    total_revenue = from_paise(total_paise)
+    avg_order_value = from_paise(total_paise // total_orders) if total_orders else 0
     
     # Get top items
-    item_sales = {}
-    for order in orders:
-        for item in order['items']:
-            item_id = item['item_id']
-            if item_id not in item_sales:
-                item_sales[item_id] = {
-                    "item_name": item['item_name'],
-                    "quantity": 0,
-                    "revenue": 0
-                }
-            item_sales[item_id]["quantity"] += item['quantity']
-            item_sales[item_id]["revenue"] += item['quantity'] * item['price_at_order']
-    
-    top_items = sorted(item_sales.items(), key=lambda x: x[1]['revenue'], reverse=True)[:5]
-    top_items_list = [{"item_name": v['item_name'], "quantity": v['quantity'], "revenue": v['revenue']} for k, v in top_items]
+    top_items = analytics_store.item_sales(sort_by="revenue_paise", limit=5)
+    top_items_list = [{"item_name": t['item_name'], "quantity": t['quantity'], "revenue": t['revenue']} for t in top_items]
     
     # Get peak hours
-    peak_data = await ai_service.predict_peak_hours(orders)
+    peak_data = _peak_hours()
+    
+    # Forecast demand vs. current stock, and the next hour's prep list
+    forecasts = [trim_forecast(f, 1) for f in await db.demand_forecasts.find({}, {"_id": 0}).to_list(100)]
+    demand, prep = {}, {}
+    for forecast in forecasts:
+        for item_id, quantity in forecast.get("horizon_totals", {}).items():
+            demand[item_id] = demand.get(item_id, 0) + quantity
+        for hour in forecast["hours"]:
+            for item in hour["items"]:
+                entry = prep.setdefault(item["item_id"], {"item_name": item["item_name"], "quantity": 0})
+                entry["quantity"] += item["quantity"]
+    stock = await db.menu_items.find(
+        {"item_id": {"$in": list(demand)}}, {"_id": 0, "item_id": 1, "name": 1, "stock_qty": 1}
+    ).to_list(None)
     
     analytics_data = {
         "total_orders": total_orders,
         "total_revenue": total_revenue,
         "average_order_value": avg_order_value,
         "top_items": top_items_list,
-        "peak_hours": peak_data.get('peak_hours', {})
+        "peak_hours": peak_data.get('peak_hours', {}),
+        "demand_forecast": [
+            {"item_name": item["name"], "forecast": demand[item["item_id"]], "stock_qty": item.get("stock_qty")}
+            for item in stock
+        ],
+        "prep_next_hour": sorted(prep.values(), key=lambda p: p["quantity"], reverse=True)[:10]
     }
     
     insights = await ai_service.generate_management_insights(analytics_data)
@@ -1415,44 +1898,122 @@ async def get_analytics_trends(
     canteen_id: Optional[str] = None,
     user: dict = Depends(get_current_user)
 ):
-    """Get historical trends"""
+    """Get historical trends (hot orders plus archived orders for long ranges)"""
     if user['role'] != 'management':
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    from datetime import datetime, timezone, timedelta
-    from collections import defaultdict
-    
-    start_date = datetime.now(timezone.utc) - timedelta(days=days)
-    
-    query = {
-        "status": "COMPLETED",
-        "created_at": {"$gte": start_date.isoformat()}
-    }
-    if canteen_id:
-        query["canteen_id"] = canteen_id
+    now = utcnow()
+    start_date = now - timedelta(days=days)
+    window_start = now - timedelta(days=analytics_store.window_days)
     
-    orders = await db.orders.find(query, {"_id": 0}).to_list(10000)
+    # Recent days come from the in-memory store
+    daily = analytics_store.daily_totals(canteen_id, start=max(start_date, window_start))
     
-    # Group by date
-    daily_stats = defaultdict(lambda: {"orders": 0, "revenue": 0})
-    
-    for order in orders:
-        created_at = datetime.fromisoformat(order['created_at'].replace('Z', '+00:00'))
-        date_key = created_at.strftime('%Y-%m-%d')
-        daily_stats[date_key]["orders"] += 1
-        daily_stats[date_key]["revenue"] += order['total_amount']
+    if start_date < window_start:
+        # Older days: orders not yet archived plus the archive itself. An order tagged
+        # with an archive_batch may already be in a committed manifest while it still
+        # waits for delete_many, so tagged orders are counted from the archive only.
+        query = {
+            "status": "COMPLETED",
+            "created_at": {"$gte": start_date, "$lt": window_start},
+            "archive_batch": {"$exists": False}
+        }
+        if canteen_id:
+            query["canteen_id"] = canteen_id
+        pipeline = [
+            {"$match": query},
+            {"$group": {
+                "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                "orders": {"$sum": 1},
+                "revenue_paise": {"$sum": "$total_paise"}
+            }}
+        ]
+        hot = await db.orders.aggregate(pipeline).to_list(None)
+        archived = await asyncio.to_thread(
+            order_archive.daily_totals, start=start_date, end=window_start, canteen_id=canteen_id, statuses=["COMPLETED"]
+        )
+        for source in (archived, {row["_id"]: row for row in hot}):
+            for day, totals in source.items():
+                entry = daily.setdefault(day, {"orders": 0, "revenue_paise": 0})
+                entry["orders"] += totals["orders"]
+                entry["revenue_paise"] += totals["revenue_paise"]
     
     # Format for chart
-    trends = []
-    for date_key in sorted(daily_stats.keys()):
-        trends.append({
-            "date": date_key,
-            "orders": daily_stats[date_key]["orders"],
-            "revenue": daily_stats[date_key]["revenue"]
-        })
+    trends = [
+        {"date": date, "orders": entry["orders"], "revenue": from_paise(entry["revenue_paise"])}
+        for date, entry in sorted(daily.items())
+    ]
     
     return {"trends": trends}
 
+@api_router.get("/management/forecast")
+async def get_demand_forecast(
+    canteen_id: Optional[str] = None,
+    hours: int = FORECAST_HORIZON_HOURS,
+    user: dict = Depends(get_current_user)
+):
+    """Hourly item demand forecast per canteen (Management, or crew for their own canteen)"""
+    if user['role'] not in ['management', 'crew']:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    if user['role'] == 'crew':
+        if canteen_id and canteen_id != user.get('canteen_id'):
+            raise HTTPException(status_code=403, detail="Unauthorized for this canteen")
+        canteen_id = user.get('canteen_id')
+    
+    query = {"canteen_id": canteen_id} if canteen_id else {}
+    forecasts = await db.demand_forecasts.find(query, {"_id": 0}).to_list(100)
+    
+    hours = max(1, min(hours, FORECAST_HORIZON_HOURS))
+    return {"forecasts": [trim_forecast(f, hours) for f in forecasts]}
+
+
+# ============================================
+# MANAGEMENT EXPORT ENDPOINTS
+# ============================================
+
+def _parse_export_date(value: Optional[str], field: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {field}, expected ISO date")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+@api_router.get("/management/export/orders")
+async def export_orders(
+    format: str = "ndjson",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    canteen_id: Optional[str] = None,
+    status: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    """Stream orders as NDJSON or CSV (Management only). Memory use is constant in the result size."""
+    if user['role'] != 'management':
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Must be one of: {list(EXPORT_FORMATS)}")
+
+    query = build_export_query(
+        start_date=_parse_export_date(start_date, "start_date"),
+        end_date=_parse_export_date(end_date, "end_date"),
+        canteen_id=canteen_id,
+        statuses=status.split(',') if status else None
+    )
+
+    cursor = db.orders.find(query, EXPORT_PROJECTION).sort("created_at", 1).batch_size(EXPORT_BATCH_SIZE)
+    body = stream_csv(cursor) if format == "csv" else stream_ndjson(cursor)
+
+    filename = f"orders_{canteen_id or 'all'}_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -1460,25 +2021,33 @@ app.include_router(api_router)
 # Socket.IO events
 @sio.event
 async def connect(sid, environ):
-    logger.info(f"Client connected: {sid}")
+    SOCKET_CLIENTS.inc()
+    socket_logger.debug("Client connected: %s", sid)
 
 @sio.event
 async def disconnect(sid):
-    logger.info(f"Client disconnected: {sid}")
+    SOCKET_CLIENTS.dec()
+    socket_logger.debug("Client disconnected: %s", sid)
 
 @sio.event
 async def join_room(sid, data):
     room = data.get('room')
     await sio.enter_room(sid, room)
-    logger.info(f"Client {sid} joined room {room}")
+    socket_logger.debug("Client %s joined room %s", sid, room)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for name in ("archiver_task", "analytics_task", "forecast_task", "scheduler_task", "load_task",
+                 "order_book_task", "order_book_verify_task", "delay_sync_task", "delay_alert_task",
+                 "loop_monitor_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
     client.close()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(socket_app, host="0.0.0.0", port=8001)
+    uvicorn.run(socket_app, host="0.0.0.0", port=8001, log_config=None, access_log=False)
 
 # ============================================
 # FITNESS: 0/1 KNAPSACK PROTEIN PLANNER
@@ -1505,110 +2074,12 @@ async def protein_knapsack(data: ProteinKnapsackInput):
     Gym Freak Mode: Uses 0/1 Knapsack to find best protein combo.
     Goal: Maximize protein <= proteinGoal.
     """
-    target = int(data.proteinGoal)
     excluded = set(data.excludedItems) if data.excludedItems else set()
     
-    # 1. Fetch all available menu items
     cursor = db.menu_items.find({"available": True})
     items_db = await cursor.to_list(length=1000)
     
-    # 2. Filter valid items and prepare for Knapsack
-    # We convert protein to integer (grams) for the algorithm
-    items = []
-    for i in items_db:
-        # Skip excluded items
-        if i['item_id'] in excluded:
-            continue
-            
-        try:
-            p = int(round(i['nutrition']['protein']))
-            if p > 0:
-                items.append({
-                    "name": i['name'],
-                    "protein": p,
-                    "id": i['item_id'],
-                    "canteen_id": i['canteen_id'],
-                    "price": i['price'],
-                    "image_url": i['image_url']
-                })
-        except (KeyError, TypeError):
-            continue
-            
-    n = len(items)
-    # limit target to avoid memory explosion if user enters huge number
-    target = min(target, 2000) # Cap at 2000g protein to be safe
-    
-    # 3. 0/1 Knapsack Algorithm
-    # dp[w] = max protein value achievable with capacity w
-    # since value = weight (protein), dp[w] will track *if* protein w is possible?
-    # Actually, we want to maximize sum(protein) <= Target.
-    # Since weight matches value, we can just use a 1D DP array where dp[w] stores the actual max protein <= w.
-    # But strictly, if weight=value, then dp[w] = w if achievable.
-    # We need to reconstruct the solution, so we need a 2D table or keep track of items.
-    
-    # Let's use 2D table K[i][w] to be safe and standard for reconstruction
-    # K[i][w] = max protein using first i items with limit w
-    
-    K = [[0 for w in range(target + 1)] for i in range(n + 1)]
-    
-    for i in range(n + 1):
-        for w in range(target + 1):
-            if i == 0 or w == 0:
-                K[i][w] = 0
-            elif items[i-1]['protein'] <= w:
-                val = items[i-1]['protein']
-                # Maximize protein
-                K[i][w] = max(val + K[i-1][w-val], K[i-1][w])
-            else:
-                K[i][w] = K[i-1][w]
-                
-    result_protein = K[n][target]
-    
-    # 4. Traceback to find selected items
-    selected_items = []
-    w = target
-    for i in range(n, 0, -1):
-        if result_protein <= 0:
-            break
-        if result_protein == K[i-1][w]:
-            continue
-        else:
-            # Item was included
-            item = items[i-1]
-            selected_items.append(item)
-            result_protein -= item['protein']
-            w -= item['protein']
-            
-    # Calculate totals
-    total_protein = sum(item['protein'] for item in selected_items)
-    
-    status = "Exact Match" if total_protein == target else "Nearest Possible"
-    
-    return {
-        "selectedItems": [item['name'] for item in selected_items], # Just names as per prompt sample
-        "selectedItemsDetails": selected_items, # Full details for UI
-        "totalProtein": total_protein,
-        "status": status,
-        "target": target
-    }
-
-@api_router.get("/orders/pending/{canteen_id}")
-async def get_pending_orders(canteen_id: str, user: dict = Depends(get_current_user)):
-    """Get pending orders for crew dashboard"""
-    if user['role'] not in ['crew', 'management']:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
-    # Verify crew belongs to this canteen
-    if user['role'] == 'crew' and user.get('canteen_id') and user['canteen_id'] != canteen_id:
-         raise HTTPException(status_code=403, detail="Unauthorized for this canteen")
-
-    # Fetch orders with status PREPARING or READY
-    orders = await db.orders.find({
-        "canteen_id": canteen_id,
-        "status": {"$in": ["PREPARING", "READY"]}
-    }, {"_id": 0}).sort("created_at", -1).to_list(100)
-    
-    return orders
+    return protein_combo(items_db, data.proteinGoal, excluded)
 
 @api_router.patch("/orders/{order_id}/status")
 async def update_order_status(order_id: str, status_update: OrderStatusUpdate, user: dict = Depends(get_current_user)):
@@ -1618,7 +2089,7 @@ async def update_order_status(order_id: str, status_update: OrderStatusUpdate, u
 
     result = await db.orders.update_one(
         {"order_id": order_id},
-        {"$set": {"status": status_update.status, "updated_at": datetime.utcnow()}}
+        {"$set": {"status": status_update.status, "updated_at": utcnow()}}
     )
     
     if result.matched_count == 0:
@@ -1674,7 +2145,7 @@ async def crew_chat_endpoint(chat_data: dict, user: dict = Depends(get_current_u
         # Check DB
         order = await db.orders.find_one({"token_number": token})
         if order:
-            items_desc = ", ".join([f"{i['name']} x{i['quantity']}" for i in order['items']])
+            items_desc = ", ".join([f"{i['item_name']} x{i['quantity']}" for i in order['items']])
             status_icon = "✅" if order['status'] == 'READY' else "⚠️"
             final_response = f"{status_icon} **Token {token} Verified**\n\nItems: {items_desc}\nStatus: **{order['status']}**\n\nAction: Hand over items and mark COMPLETED."
         else:
@@ -1682,7 +2153,7 @@ async def crew_chat_endpoint(chat_data: dict, user: dict = Depends(get_current_u
             
     elif action == "show_priority":
         # Check for delayed orders
-        fifteen_mins_ago = (datetime.now(timezone.utc) - timedelta(minutes=15)).isoformat()
+        fifteen_mins_ago = utcnow() - timedelta(minutes=15)
         delayed_count = await db.orders.count_documents({
             "canteen_id": canteen_id,
             "status": {"$in": ["REQUESTED", "PREPARING"]},
@@ -1705,4 +2176,4 @@ app.include_router(api_router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("server:socket_app", host="0.0.0.0", port=8001, reload=True)
+    uvicorn.run("server:socket_app", host="0.0.0.0", port=8001, reload=True, log_config=None, access_log=False)
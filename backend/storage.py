@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from typing import Any, Dict
+from pydantic import BaseModel
+
+# Timestamps are stored as native BSON dates (UTC). The Mongo client is created
+# with tz_aware=True, so reads come back as timezone-aware datetimes as well.
+
+
+def utcnow() -> datetime:
+    """Current time as a timezone-aware UTC datetime"""
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes (Pydantic's utcnow defaults) as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def parse_timestamp(value: Any) -> Any:
+    """Convert a legacy ISO-8601 string into a UTC datetime; other values pass through"""
+    if isinstance(value, str):
+        return as_utc(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    if isinstance(value, datetime):
+        return as_utc(value)
+    return value
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return as_utc(value)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def to_document(model: BaseModel) -> Dict:
+    """Dump a model for insertion, keeping every datetime as a native UTC date"""
+    return _normalize(model.model_dump())
@@ -0,0 +1,285 @@
+"""
+Synthetic campus load generator for load and analytics testing.
+
+Produces students and orders that look like real canteen traffic: a breakfast
+bump, a sharp lunch peak and a longer evening peak, quieter weekends, per-canteen
+item popularity (a few favourites and a long tail), students who mostly eat at
+one canteen, and status lifecycles with consistent timestamps
+(created -> requested -> READY -> COMPLETED, with some cancellations and the
+orders at the end of the window still in the kitchen).
+
+Generation is deterministic for a given seed and menu, so two runs with the
+same arguments produce the same dataset. Orders are streamed into Mongo in
+batches with several insert_many calls in flight. Everything generated is
+tagged `synthetic: true` so --clear can remove it again.
+
+Usage: python synthetic_data.py --students 5000 --orders-per-day 20000 --days 60 [--seed 7]
+       python synthetic_data.py --clear
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from line_items import normalize_line_item, items_total_paise
+
+ROOT_DIR = Path(__file__).parent
+
+SYNTHETIC_BATCH_SIZE = 2000
+SYNTHETIC_CONCURRENCY = 4
+
+# Share of a day's orders per peak: (centre hour, spread in hours, weight)
+DAY_PEAKS = [(8.5, 0.6, 0.15), (12.9, 0.55, 0.45), (17.6, 0.9, 0.30)]
+BACKGROUND_SHARE = 0.10
+OPEN_HOUR, CLOSE_HOUR = 7, 22
+
+WEEKEND_FACTOR = 0.55
+HOME_CANTEEN_SHARE = 0.7
+ITEM_POPULARITY_EXPONENT = 1.1
+STUDENT_ACTIVITY_EXPONENT = 0.8
+CANCEL_RATE = 0.03
+
+
+def _cumulative(weights: List[float]) -> List[float]:
+    return list(itertools.accumulate(weights))
+
+
+def _pick(rng: random.Random, values: List, cum_weights: List[float]):
+    """random.choices for a single value, without building a list"""
+    return values[bisect.bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def order_time_of_day(rng: random.Random) -> float:
+    """Hour of day (fractional) drawn from the peak mixture, clipped to opening hours"""
+    while True:
+        roll = rng.random()
+        if roll < BACKGROUND_SHARE:
+            hour = rng.uniform(OPEN_HOUR, CLOSE_HOUR)
+        else:
+            roll = (roll - BACKGROUND_SHARE) / (1 - BACKGROUND_SHARE)
+            total = sum(weight for _, _, weight in DAY_PEAKS)
+            for centre, spread, weight in DAY_PEAKS:
+                roll -= weight / total
+                if roll <= 0:
+                    break
+            hour = rng.gauss(centre, spread)
+        if OPEN_HOUR <= hour < CLOSE_HOUR:
+            return hour
+
+
+class CampusModel:
+    """Seeded popularity tables for canteens, items and students"""
+
+    def __init__(self, menus: Dict[str, List[Dict]], students: int, seed: int):
+        self.rng = random.Random(seed)
+        self.canteen_ids = sorted(canteen_id for canteen_id, items in menus.items() if items)
+        if not self.canteen_ids:
+            raise ValueError("No menu items to order from - run seed_data.py first")
+
+        # Each canteen gets its own favourites: shuffle the menu, then Zipf weights by rank
+        self.menus = {}
+        for canteen_id in self.canteen_ids:
+            items = sorted(menus[canteen_id], key=lambda item: item["item_id"])
+            self.rng.shuffle(items)
+            weights = [1 / (rank + 1) ** ITEM_POPULARITY_EXPONENT for rank in range(len(items))]
+            self.menus[canteen_id] = (items, _cumulative(weights))
+        self.prep = {item["item_id"]: item.get("prep_time") or 10 for items in menus.values() for item in items}
+
+        self.student_ids = [f"synth_student_{i:06d}" for i in range(students)]
+        self.home = {student_id: self.rng.choice(self.canteen_ids) for student_id in self.student_ids}
+        activity = [1 / (rank + 1) ** STUDENT_ACTIVITY_EXPONENT for rank in range(students)]
+        self.student_weights = _cumulative(activity)
+
+    def students(self, now: datetime) -> Iterator[Dict]:
+        for student_id in self.student_ids:
+            yield {
+                "user_id": student_id,
+                "roll_number": f"SYN{student_id[-6:]}",
+                "name": f"Student {student_id[-6:]}",
+                "role": "student",
+                "picture": None,
+                "created_at": now,
+                "synthetic": True
+            }
+
+    def _items(self, canteen_id: str) -> List[Dict]:
+        rng = self.rng
+        items, cum_weights = self.menus[canteen_id]
+        lines = {}
+        for _ in range(1 + int(rng.expovariate(1.2))):
+            item = _pick(rng, items, cum_weights)
+            quantity = 1 if rng.random() < 0.8 else 2
+            if item["item_id"] in lines:
+                lines[item["item_id"]]["quantity"] += quantity
+            else:
+                lines[item["item_id"]] = {
+                    "item_id": item["item_id"],
+                    "item_name": item["name"],
+                    "quantity": quantity,
+                    "price_at_order": item.get("price", 50.0)
+                }
+        return [normalize_line_item(line) for line in lines.values()]
+
+    def order(self, created_at: datetime, end: datetime) -> Dict:
+        """One order placed at `created_at`, with its lifecycle as of `end`"""
+        rng = self.rng
+        student_id = _pick(rng, self.student_ids, self.student_weights)
+        canteen_id = self.home[student_id] if rng.random() < HOME_CANTEEN_SHARE else rng.choice(self.canteen_ids)
+        items = self._items(canteen_id)
+        prep_minutes = max(self.prep[line["item_id"]] for line in items)
+
+        requested_at = created_at + timedelta(seconds=rng.uniform(15, 120))
+        ready_at = requested_at + timedelta(minutes=prep_minutes * rng.lognormvariate(0, 0.35) + rng.uniform(0, 6))
+        picked_up_at = ready_at + timedelta(minutes=rng.expovariate(1 / 4))
+        cancelled = rng.random() < CANCEL_RATE
+
+        order = {
+            "order_id": f"order_{rng.getrandbits(64):016x}",
+            "student_id": student_id,
+            "items": items,
+            "canteen_id": canteen_id,
+            "token_number": rng.randint(1000000, 9999999),
+            "payment_id": f"pay_{rng.getrandbits(32):08x}",
+            "razorpay_order_id": f"order_test_{rng.getrandbits(48):012x}",
+            "razorpay_payment_id": f"pay_{rng.getrandbits(32):08x}",
+            "total_amount": items_total_paise(items) / 100,
+            "total_paise": items_total_paise(items),
+            "created_at": created_at,
+            "expires_at": created_at + timedelta(minutes=15),
+            "synthetic": True
+        }
+        if requested_at > end:
+            order.update(status="PENDING_PAYMENT", updated_at=created_at)
+        elif cancelled:
+            order.update(status="CANCELLED", requested_at=requested_at,
+                         updated_at=min(end, requested_at + timedelta(minutes=rng.uniform(1, 5))))
+        elif ready_at > end:
+            preparing = end - requested_at > timedelta(minutes=2)
+            order.update(status="PREPARING" if preparing else "REQUESTED", requested_at=requested_at,
+                         updated_at=requested_at + timedelta(minutes=2) if preparing else requested_at)
+        elif picked_up_at > end:
+            order.update(status="READY", requested_at=requested_at, ready_at=ready_at, updated_at=ready_at)
+        else:
+            order.update(status="COMPLETED", requested_at=requested_at, ready_at=ready_at, updated_at=picked_up_at)
+        return order
+
+    def orders(self, orders_per_day: int, days: int, end: datetime) -> Iterator[Dict]:
+        """Orders for the `days` days up to `end`, oldest day first (times within a day are sorted)"""
+        rng = self.rng
+        first_day = (end - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        for day in range(days):
+            midnight = first_day + timedelta(days=day)
+            volume = orders_per_day * (WEEKEND_FACTOR if midnight.weekday() >= 5 else 1) * rng.gauss(1, 0.08)
+            hours = sorted(order_time_of_day(rng) for _ in range(max(0, int(volume))))
+            for hour in hours:
+                created_at = midnight + timedelta(seconds=int(hour * 3600))
+                if created_at > end:
+                    return
+                yield self.order(created_at, end)
+
+
+def batched(docs: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    while True:
+        batch = list(itertools.islice(docs, size))
+        if not batch:
+            return
+        yield batch
+
+
+async def insert_stream(collection, docs: Iterator[Dict], batch_size: int = SYNTHETIC_BATCH_SIZE,
+                        concurrency: int = SYNTHETIC_CONCURRENCY, progress: Optional[Callable[[int], None]] = None) -> int:
+    """insert_many batches with up to `concurrency` in flight while the next batch is generated"""
+    inserted = 0
+    pending = set()
+    for batch in batched(docs, batch_size):
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                inserted += task.result()
+            if progress:
+                progress(inserted)
+        pending.add(asyncio.ensure_future(_insert(collection, batch)))
+        # Give the in-flight inserts a chance to be sent before generating more
+        await asyncio.sleep(0)
+    for task in asyncio.as_completed(pending):
+        inserted += await task
+    return inserted
+
+
+async def _insert(collection, batch: List[Dict]) -> int:
+    result = await collection.insert_many(batch, ordered=False)
+    return len(result.inserted_ids)
+
+
+async def load_menus(db) -> Dict[str, List[Dict]]:
+    menus = {}
+    async for item in db.menu_items.find({}, {"_id": 0, "item_id": 1, "name": 1, "canteen_id": 1,
+                                               "price": 1, "prep_time": 1}):
+        menus.setdefault(item["canteen_id"], []).append(item)
+    return menus
+
+
+async def clear_synthetic(db) -> Tuple[int, int]:
+    orders = await db.orders.delete_many({"synthetic": True})
+    users = await db.users.delete_many({"synthetic": True})
+    return orders.deleted_count, users.deleted_count
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate synthetic campus orders")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--orders-per-day", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None,
+                        help="ISO timestamp the dataset ends at (default: now)")
+    parser.add_argument("--batch-size", type=int, default=SYNTHETIC_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=SYNTHETIC_CONCURRENCY)
+    parser.add_argument("--clear", action="store_true", help="Delete previously generated data and exit")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    args = parse_args(argv)
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        orders, users = await clear_synthetic(db)
+        print(f"🧹 Removed {orders} synthetic orders and {users} synthetic students")
+        if args.clear:
+            return
+
+        end = args.end or datetime.now(timezone.utc)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        model = CampusModel(await load_menus(db), args.students, args.seed)
+        await insert_stream(db.users, model.students(end), args.batch_size, args.concurrency)
+        print(f"✅ {args.students} students")
+
+        expected = args.orders_per_day * args.days
+        started = time.perf_counter()
+
+        def progress(count):
+            rate = count / max(time.perf_counter() - started, 1e-9)
+            print(f"   {count:>10,} / ~{expected:,} orders  ({rate:,.0f}/s)", end="\r")
+
+        count = await insert_stream(db.orders, model.orders(args.orders_per_day, args.days, end),
+                                    args.batch_size, args.concurrency, progress)
+        elapsed = time.perf_counter() - started
+        print(f"\n✅ {count:,} orders over {args.days} days in {elapsed:.1f} s ({count / max(elapsed, 1e-9):,.0f}/s)")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
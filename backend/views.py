@@ -0,0 +1,60 @@
+from typing import Any, Dict, List, Optional, Type, get_args, get_origin
+from pydantic import BaseModel, TypeAdapter
+from models import OrderCard, StudentOrderCard, MenuCard, BillCard
+from serialization import encode_models, to_python
+
+
+def _nested_model(annotation) -> Optional[Type[BaseModel]]:
+    """Return the model class behind `Model`, `List[Model]` or `Optional[Model]` annotations"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    if get_origin(annotation) is not None:
+        for arg in get_args(annotation):
+            model = _nested_model(arg)
+            if model is not None:
+                return model
+    return None
+
+
+def projection_for(model: Type[BaseModel], computed: Optional[Dict[str, Any]] = None, prefix: str = "") -> Dict[str, Any]:
+    """
+    Build an inclusion projection from a model's fields. Nested models expand to
+    dotted paths; `computed` maps fields to aggregation expressions evaluated by Mongo.
+    """
+    computed = computed or {}
+    projection = {"_id": 0} if not prefix else {}
+    for name, field in model.model_fields.items():
+        if not prefix and name in computed:
+            projection[name] = computed[name]
+            continue
+        nested = _nested_model(field.annotation)
+        if nested is not None:
+            projection.update(projection_for(nested, prefix=f"{prefix}{name}."))
+        else:
+            projection[f"{prefix}{name}"] = 1
+    return projection
+
+
+class ListView:
+    """A slim list model plus the Mongo projection and serializer derived from it"""
+
+    def __init__(self, model: Type[BaseModel], computed: Optional[Dict[str, Any]] = None):
+        self.model = model
+        self.projection = projection_for(model, computed)
+        self.adapter = TypeAdapter(List[model])
+
+    def encode(self, docs: List[Dict]) -> bytes:
+        """Serialize projected documents straight to JSON bytes"""
+        return encode_models(self.adapter, docs)
+
+    def dump(self, docs: List[Dict]) -> List[Dict]:
+        """Serialize projected documents to JSON-ready dicts (for envelope responses)"""
+        return to_python(self.adapter, docs)
+
+
+_ITEM_COUNT = {"$sum": "$items.quantity"}
+
+CREW_ORDER_VIEW = ListView(OrderCard, computed={"item_count": _ITEM_COUNT})
+STUDENT_ORDER_VIEW = ListView(StudentOrderCard, computed={"item_count": _ITEM_COUNT})
+MENU_VIEW = ListView(MenuCard)
+BILL_VIEW = ListView(BillCard)
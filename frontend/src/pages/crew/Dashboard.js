@@ -16,6 +16,7 @@ export default function CrewDashboard() {
   const { user } = getAuth();
   const [orders, setOrders] = useState([]);
   const [priorityOrders, setPriorityOrders] = useState([]);
+  const [board, setBoard] = useState(null);
   const [loading, setLoading] = useState(true);
   const [isConnected, setIsConnected] = useState(false);
   const [tokenSearch, setTokenSearch] = useState('');
@@ -49,6 +50,7 @@ export default function CrewDashboard() {
     fetchOrders();
     fetchPriorityOrders();
     fetchStats();
+    fetchBoard();
 
     const canteenId = selectedCanteen; // Use selected canteen
     const socket = getSocket();
@@ -71,16 +73,35 @@ export default function CrewDashboard() {
       }
     });
 
-    // Refresh priority orders every minute
-    const interval = setInterval(() => {
-      fetchPriorityOrders();
-      fetchStats();
-    }, 60000);
+    // Bulk status changes arrive as one batch per canteen
+    socket.on('order_updates', (data) => {
+      if (data.canteen_id === canteenId) {
+        fetchOrders();
+        fetchPriorityOrders();
+        fetchStats();
+      }
+    });
+
+    socket.on('production_board', (data) => {
+      if (data.canteen_id === canteenId) {
+        setBoard(data);
+      }
+    });
+
+    // Delays are pushed the moment an order passes its deadline - no polling
+    socket.on('order_delayed', (alert) => {
+      if (alert.canteen_id === canteenId) {
+        toast.warning(`Order #${alert.token_number || alert.order_id.slice(-6)} is running late`);
+        fetchPriorityOrders();
+      }
+    });
 
     return () => {
       leaveRoom(canteenId);
       socket.off('order_update');
-      clearInterval(interval);
+      socket.off('order_updates');
+      socket.off('production_board');
+      socket.off('order_delayed');
     };
   }, [user?.user_id, navigate, selectedCanteen]); // Added selectedCanteen dependency
 
@@ -118,6 +139,30 @@ export default function CrewDashboard() {
     }
   };
 
+  const fetchBoard = async () => {
+    try {
+      const response = await api.get(`/kitchen/${selectedCanteen}/board`);
+      setBoard(response.data);
+    } catch (error) {
+      console.error("Failed to load production board:", error);
+    }
+  };
+
+  const handleCompleteBatch = async (batch) => {
+    try {
+      const response = await api.post(`/kitchen/${selectedCanteen}/batches/complete`, {
+        item_id: batch.item_id,
+        quantity: batch.quantity
+      });
+      setBoard(response.data.board);
+      const ready = response.data.allocated.filter(a => a.status === 'READY').length;
+      toast.success(`${batch.quantity} x ${batch.item_name} done${ready ? ` - ${ready} order${ready > 1 ? 's' : ''} ready` : ''}`);
+      fetchOrders();
+    } catch (error) {
+      toast.error('Failed to complete batch');
+    }
+  };
+
   const handleUpdateStatus = async (orderId, newStatus) => {
     try {
       await api.patch(`/orders/${orderId}/status`, { status: newStatus });
@@ -130,6 +175,25 @@ export default function CrewDashboard() {
     }
   };
 
+  const handleBulkStatus = async (fromStatus, newStatus) => {
+    const updates = orders
+      .filter(order => order.status === fromStatus)
+      .map(order => ({ order_id: order.order_id, status: newStatus }));
+    if (updates.length === 0) return;
+    try {
+      const response = await api.post('/orders/status/bulk', { updates });
+      toast.success(`${response.data.updated.length} orders updated to ${newStatus}`);
+      if (response.data.rejected.length > 0) {
+        toast.error(`${response.data.rejected.length} orders had already moved on and were skipped`);
+      }
+      fetchOrders();
+      fetchPriorityOrders();
+      fetchStats();
+    } catch (error) {
+      toast.error('Failed to update orders');
+    }
+  };
+
   const handleVerifyToken = async (arg = null) => {
     // If arg is a string, use it. If it's an event (object) or null, use tokenSearch.
     const rawToken = (typeof arg === 'string' ? arg : tokenSearch);
@@ -322,6 +386,32 @@ export default function CrewDashboard() {
           </motion.div>
         )}
 
+        {/* Production Board: identical items batched across active orders */}
+        {board && board.batches.length > 0 && (
+          <div className="mb-6 bg-white rounded-3xl p-6 shadow-lg border border-blue-100">
+            <div className="flex items-center gap-2 mb-3">
+              <Utensils className="w-5 h-5 text-blue-600" />
+              <h3 className="font-bold text-lg">Production Board</h3>
+              <span className="text-sm text-gray-500">({board.active_orders} active orders)</span>
+            </div>
+            <div className="space-y-2">
+              {board.batches.slice(0, 8).map((batch) => (
+                <div key={`${batch.item_id}-${batch.position}`} className="flex items-center justify-between p-3 bg-blue-50 rounded-xl">
+                  <div>
+                    <p className="font-bold">{batch.quantity} x {batch.item_name}</p>
+                    <p className="text-xs text-gray-600">
+                      Tokens {batch.orders.map(o => `#${o.token_number}`).join(', ')} · {batch.prep_time} min prep · oldest waiting {batch.oldest_wait_minutes} min
+                    </p>
+                  </div>
+                  <Button size="sm" onClick={() => handleCompleteBatch(batch)} className="bg-green-600 hover:bg-green-700">
+                    <Check className="w-4 h-4 mr-1" /> Done
+                  </Button>
+                </div>
+              ))}
+            </div>
+          </div>
+        )}
+
         {/* Token Verification */}
         <div className="mb-6 bg-white rounded-3xl p-6 shadow-lg border border-blue-100">
           <h3 className="font-bold text-lg mb-3">Verify Token</h3>
@@ -399,6 +489,27 @@ export default function CrewDashboard() {
           >
             Ready ({orders.filter(o => o.status === 'READY').length})
           </Button>
+          {filter === 'preparing' && orders.some(o => o.status === 'PREPARING') && (
+            <Button
+              variant="outline"
+              onClick={() => handleBulkStatus('PREPARING', 'READY')}
+              className="ml-auto border-green-500 text-green-600"
+              data-testid="bulk-mark-ready"
+            >
+              <CheckCircle className="w-4 h-4 mr-2" />
+              Mark all ready
+            </Button>
+          )}
+          {filter === 'ready' && orders.some(o => o.status === 'READY') && (
+            <Button
+              variant="outline"
+              onClick={() => handleBulkStatus('READY', 'COMPLETED')}
+              className="ml-auto border-blue-500 text-blue-600"
+              data-testid="bulk-complete"
+            >
+              Complete all
+            </Button>
+          )}
         </div>
 
         {filteredOrders.length === 0 ? (
@@ -1,7 +1,7 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
-import { Utensils, Plus, Edit, Trash2, ArrowLeft, Loader2, AlertTriangle, TrendingUp, TrendingDown } from 'lucide-react';
+import { Utensils, Plus, Edit, Trash2, ArrowLeft, Loader2, AlertTriangle, TrendingUp, TrendingDown, Upload } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
@@ -20,6 +20,8 @@ export default function MenuManagement() {
   const [showAddModal, setShowAddModal] = useState(false);
   const [selectedCanteen, setSelectedCanteen] = useState('all');
   const [selectedCategory, setSelectedCategory] = useState('all');
+  const [importing, setImporting] = useState(false);
+  const importInput = useRef(null);
   const [formData, setFormData] = useState({
     name: '',
     canteen_id: 'sopanam',
@@ -151,6 +153,27 @@ export default function MenuManagement() {
     }
   };
 
+  // One request for a whole CSV of new items, prices, stock levels and availability
+  const handleImportCsv = async (event) => {
+    const file = event.target.files?.[0];
+    event.target.value = '';
+    if (!file) return;
+    setImporting(true);
+    try {
+      const response = await api.post('/menu/bulk', await file.text(), {
+        headers: { 'Content-Type': 'text/csv' }
+      });
+      const { created, updated, errors } = response.data;
+      toast.success(`Imported: ${created} added, ${updated} updated`);
+      errors.slice(0, 5).forEach(err => toast.error(`Row ${err.row + 1}: ${err.error}`));
+      fetchData();
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Failed to import menu');
+    } finally {
+      setImporting(false);
+    }
+  };
+
   let filteredItems = selectedCanteen === 'all'
     ? menuItems
     : menuItems.filter(item => item.canteen_id === selectedCanteen);
@@ -185,10 +208,23 @@ export default function MenuManagement() {
               <Utensils className="w-6 h-6 text-orange-500" />
               <span className="text-xl font-bold">Menu Management</span>
             </div>
-            <Button onClick={() => setShowAddModal(true)} className="bg-orange-500 hover:bg-orange-600" data-testid="add-item-btn">
-              <Plus className="w-4 h-4 mr-2" />
-              Add Item
-            </Button>
+            <div className="flex gap-2">
+              <input ref={importInput} type="file" accept=".csv,text/csv" className="hidden" onChange={handleImportCsv} />
+              <Button
+                variant="outline"
+                onClick={() => importInput.current?.click()}
+                disabled={importing}
+                className="border-gray-600 text-white bg-transparent"
+                data-testid="import-csv-btn"
+              >
+                {importing ? <Loader2 className="w-4 h-4 mr-2 animate-spin" /> : <Upload className="w-4 h-4 mr-2" />}
+                Import CSV
+              </Button>
+              <Button onClick={() => setShowAddModal(true)} className="bg-orange-500 hover:bg-orange-600" data-testid="add-item-btn">
+                <Plus className="w-4 h-4 mr-2" />
+                Add Item
+              </Button>
+            </div>
           </div>
         </div>
       </header>
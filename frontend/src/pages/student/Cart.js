@@ -17,6 +17,11 @@ export default function Cart() {
   const [loading, setLoading] = useState(false);
   const [showSuccess, setShowSuccess] = useState(false);
   const [orderToken, setOrderToken] = useState('');
+  const [orderEta, setOrderEta] = useState(null);
+  const [pickupSlots, setPickupSlots] = useState([]);
+  const [pickupSlot, setPickupSlot] = useState('');
+  const [orderPickup, setOrderPickup] = useState(null);
+  const [suggestion, setSuggestion] = useState(null);
 
   useEffect(() => {
     if (!user) {
@@ -26,6 +31,37 @@ export default function Cart() {
     setCart(getCart());
   }, [user?.user_id, navigate]);
 
+  const cartCanteenId = cart[0]?.canteen_id;
+
+  useEffect(() => {
+    if (!cartCanteenId) return;
+    api.get(`/canteens/${cartCanteenId}/pickup-slots`)
+      .then((response) => setPickupSlots(response.data.slots.filter((slot) => slot.available > 0)))
+      .catch(() => setPickupSlots([]));
+  }, [cartCanteenId]);
+
+  const cartKey = cart.map((item) => `${item.name}:${item.quantity}`).join('|');
+
+  useEffect(() => {
+    if (!cartCanteenId) return;
+    api.post('/canteens/suggest', {
+      items: cart.map((item) => ({ item_name: item.name, quantity: item.quantity }))
+    })
+      .then((response) => {
+        const ranked = response.data.canteens;
+        const current = ranked.find((c) => c.canteen_id === cartCanteenId);
+        const best = ranked[0];
+        // Only worth mentioning when another kitchen is clearly faster
+        if (best && current && best.can_serve && best.canteen_id !== cartCanteenId
+            && current.eta_minutes - best.eta_minutes >= 5) {
+          setSuggestion({ canteenId: best.canteen_id, minutesSaved: current.eta_minutes - best.eta_minutes });
+        } else {
+          setSuggestion(null);
+        }
+      })
+      .catch(() => setSuggestion(null));
+  }, [cartCanteenId, cartKey]);
+
   const handleUpdateQuantity = (itemId, newQuantity) => {
     const updatedCart = updateCartItemQuantity(itemId, newQuantity);
     setCart(updatedCart);
@@ -69,10 +105,11 @@ export default function Cart() {
       const orderResponse = await api.post('/orders', {
         items: orderItems,
         canteen_id: canteenId,
-        total_amount: total
+        total_amount: total,
+        ...(pickupSlot && { pickup_slot: pickupSlot })
       });
 
-      const { razorpay_order_id, razorpay_key_id, token_number, order_id, test_mode } = orderResponse.data;
+      const { razorpay_order_id, razorpay_key_id, token_number, order_id, test_mode, eta, pickup_slot } = orderResponse.data;
 
       // If test mode, simulate payment immediately
       if (test_mode) {
@@ -84,6 +121,8 @@ export default function Cart() {
         clearCart();
         setCart([]);
         setOrderToken(token_number);
+        setOrderEta(eta);
+        setOrderPickup(pickup_slot);
         setShowSuccess(true);
       } else {
         // Real Razorpay mode - load script only when needed
@@ -111,6 +150,8 @@ export default function Cart() {
               clearCart();
               setCart([]);
               setOrderToken(token_number);
+              setOrderEta(eta);
+              setOrderPickup(pickup_slot);
               setShowSuccess(true);
             } catch (error) {
               toast.error('Payment verification failed');
@@ -202,7 +243,11 @@ export default function Cart() {
           navigate('/student/orders/tracking');
         }}
         title="Order Placed Successfully!"
-        message="Show your token number at the counter"
+        message={orderPickup
+          ? `Pick up at ${new Date(orderPickup).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}. Show your token number at the counter`
+          : orderEta
+            ? `Ready in about ${orderEta.minutes} min. Show your token number at the counter`
+            : 'Show your token number at the counter'}
         tokenNumber={orderToken}
       />
 
@@ -323,6 +368,33 @@ export default function Cart() {
             </div>
           </div>
 
+          {suggestion && (
+            <div className="mt-6 rounded-xl bg-green-50 border border-green-200 p-4 text-sm text-green-800" data-testid="canteen-suggestion">
+              {`The ${suggestion.canteenId} canteen is less busy right now and could have this ready about ${suggestion.minutesSaved} min sooner.`}
+            </div>
+          )}
+
+          {pickupSlots.length > 0 && (
+            <div className="mt-6">
+              <label htmlFor="pickup-slot" className="block text-sm font-medium text-gray-700 mb-2">Pickup time</label>
+              <select
+                id="pickup-slot"
+                value={pickupSlot}
+                onChange={(e) => setPickupSlot(e.target.value)}
+                className="w-full rounded-xl border border-orange-200 px-4 py-3 bg-white"
+                data-testid="pickup-slot-select"
+              >
+                <option value="">As soon as possible</option>
+                {pickupSlots.map((slot) => (
+                  <option key={slot.slot_start} value={slot.slot_start}>
+                    {new Date(slot.slot_start).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}
+                    {` (${slot.available} left)`}
+                  </option>
+                ))}
+              </select>
+            </div>
+          )}
+
           <Button
             onClick={handleCheckout}
             disabled={loading}
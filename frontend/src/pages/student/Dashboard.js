@@ -6,6 +6,7 @@ import { Button } from '@/components/ui/button';
 import api from '@/utils/api';
 import { getAuth, clearAuth } from '@/utils/auth';
 import { getCartItemCount } from '@/utils/cart';
+import { getSocket } from '@/utils/socket';
 import { toast } from 'sonner';
 
 export default function StudentDashboard() {
@@ -22,8 +23,26 @@ export default function StudentDashboard() {
     }
     fetchCanteens();
     setCartCount(getCartItemCount());
+
+    // Live kitchen load, pushed on every order transition
+    const socket = getSocket();
+    socket.on('canteen_load', (load) => {
+      setCanteens((current) => current.map((canteen) => (
+        canteen.canteen_id === load.canteen_id ? { ...canteen, load } : canteen
+      )));
+    });
+
+    return () => {
+      socket.off('canteen_load');
+    };
   }, [user?.user_id, navigate]);
 
+  const loadStyles = {
+    quiet: 'bg-green-100 text-green-700',
+    busy: 'bg-amber-100 text-amber-700',
+    swamped: 'bg-red-100 text-red-700'
+  };
+
   const fetchCanteens = async () => {
     try {
       const response = await api.get('/canteens');
@@ -176,6 +195,16 @@ export default function StudentDashboard() {
                       <Clock className="w-4 h-4" />
                       <span>{canteen.operating_hours}</span>
                     </div>
+                    {canteen.load && (
+                      <div
+                        className={`mt-3 inline-block rounded-full px-3 py-1 text-xs font-medium ${loadStyles[canteen.load.level]}`}
+                        data-testid={`canteen-load-${canteen.canteen_id}`}
+                      >
+                        {canteen.load.level === 'quiet'
+                          ? 'Quiet now'
+                          : `${canteen.load.active_orders} orders ahead · ~${Math.ceil(canteen.load.queue_minutes)} min`}
+                      </div>
+                    )}
                   </div>
                 </div>
               </motion.div>
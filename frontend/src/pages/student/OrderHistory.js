@@ -13,6 +13,8 @@ export default function OrderHistory() {
   const { user } = getAuth();
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // Selection State
   const [isSelectionMode, setIsSelectionMode] = useState(false);
@@ -119,6 +121,7 @@ export default function OrderHistory() {
     try {
       const response = await api.get('/orders/my');
       setOrders(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       toast.error('Failed to load order history');
     } finally {
@@ -126,6 +129,20 @@ export default function OrderHistory() {
     }
   };
 
+  const fetchMoreOrders = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get('/orders/my', { params: { cursor: nextCursor } });
+      setOrders((prev) => [...prev, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      toast.error('Failed to load more orders');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const toggleSelectionMode = () => {
     setIsSelectionMode(!isSelectionMode);
     setSelectedIds(new Set());
@@ -335,6 +352,14 @@ export default function OrderHistory() {
                 </motion.div>
               ))}
             </AnimatePresence>
+
+            {nextCursor && (
+              <div className="flex justify-center pt-2">
+                <Button variant="outline" onClick={fetchMoreOrders} disabled={loadingMore} className="rounded-full">
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
           </div>
         )}
       </main>
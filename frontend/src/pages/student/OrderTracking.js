@@ -4,7 +4,7 @@ import { motion } from 'framer-motion';
 import { Clock, CheckCircle, Loader2, ArrowLeft, Wifi } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Badge } from '@/components/ui/badge';
-import api from '@/utils/api';
+import { fetchAllPages } from '@/utils/api';
 import { getAuth } from '@/utils/auth';
 import { getSocket, joinRoom, leaveRoom } from '@/utils/socket';
 import { toast } from 'sonner';
@@ -42,16 +42,36 @@ export default function OrderTracking() {
       }
     });
 
+    socket.on('order_updates', (data) => {
+      if (data.student_id === user.user_id) {
+        data.updates.forEach((update) => {
+          toast.success(`Order #${update.order_id.slice(-6)} updated to ${update.status}`);
+        });
+        fetchOrders();
+      }
+    });
+
+    // ETAs are pushed whenever the kitchen queue moves - no need to poll
+    socket.on('order_eta', (data) => {
+      if (data.student_id === user.user_id) {
+        setOrders((current) => current.map((order) => (
+          order.order_id === data.order_id ? { ...order, eta: data.eta } : order
+        )));
+      }
+    });
+
     return () => {
       leaveRoom(user.user_id);
       socket.off('order_update');
+      socket.off('order_updates');
+      socket.off('order_eta');
     };
   }, [user?.user_id, navigate]);
 
   const fetchOrders = async () => {
     try {
-      const response = await api.get('/orders/my');
-      const activeOrders = response.data.filter(
+      const myOrders = await fetchAllPages('/orders/my');
+      const activeOrders = myOrders.filter(
         (order) => order.status !== 'COMPLETED' && order.status !== 'CANCELLED'
       );
       setOrders(activeOrders);
@@ -66,6 +86,8 @@ export default function OrderTracking() {
     switch (status) {
       case 'PENDING_PAYMENT':
         return 'bg-yellow-500';
+      case 'SCHEDULED':
+        return 'bg-purple-500';
       case 'PREPARING':
         return 'bg-blue-500';
       case 'READY':
@@ -165,6 +187,23 @@ export default function OrderTracking() {
                   <p className="font-bold text-lg">Token Number</p>
                   <p className="text-3xl font-mono font-bold text-orange-600">{order.token_number}</p>
                 </div>
+                {order.eta && ['REQUESTED', 'PREPARING'].includes(order.status) && (
+                  <div className="ml-auto text-right" data-testid={`eta-${order.order_id}`}>
+                    <p className="text-sm text-gray-600">Ready around</p>
+                    <p className="text-2xl font-bold">
+                      {new Date(order.eta.ready_at).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}
+                    </p>
+                    <p className="text-xs text-gray-500">#{order.eta.queue_position} in queue</p>
+                  </div>
+                )}
+                {order.pickup_slot && order.status === 'SCHEDULED' && (
+                  <div className="ml-auto text-right" data-testid={`pickup-${order.order_id}`}>
+                    <p className="text-sm text-gray-600">Pickup at</p>
+                    <p className="text-2xl font-bold">
+                      {new Date(order.pickup_slot).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}
+                    </p>
+                  </div>
+                )}
               </div>
 
               <div className="space-y-2">
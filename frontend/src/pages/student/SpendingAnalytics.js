@@ -3,7 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { TrendingUp, ArrowLeft, DollarSign } from 'lucide-react';
 import { Button } from '@/components/ui/button';
-import api from '@/utils/api';
+import api, { fetchAllPages } from '@/utils/api';
 import { getAuth } from '@/utils/auth';
 import { toast } from 'sonner';
 
@@ -24,12 +24,12 @@ export default function SpendingAnalytics() {
 
   const fetchData = async () => {
     try {
-      const [analyticsRes, billsRes] = await Promise.all([
+      const [analyticsRes, allBills] = await Promise.all([
         api.get('/spending/analytics'),
-        api.get('/spending/bills')
+        fetchAllPages('/spending/bills')
       ]);
       setAnalytics(analyticsRes.data);
-      setBills(billsRes.data);
+      setBills(allBills);
     } catch (error) {
       toast.error('Failed to load spending data');
     } finally {
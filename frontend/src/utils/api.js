@@ -38,4 +38,21 @@ api.interceptors.response.use(
   }
 );
 
+// Cursor-paginated endpoints return the next page's cursor in X-Next-Cursor;
+// follow it until exhausted and return every row
+export const MAX_PAGE_SIZE = 100;
+
+export async function fetchAllPages(url, params = {}) {
+  const rows = [];
+  let cursor = null;
+  do {
+    const response = await api.get(url, {
+      params: { ...params, limit: MAX_PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+    });
+    rows.push(...response.data);
+    cursor = response.headers['x-next-cursor'] || null;
+  } while (cursor);
+  return rows;
+}
+
 export default api;
@@ -0,0 +1,25 @@
+"""
+Shared builders for the kitchen, ETA, canteen load and delay alert tests.
+"""
+from datetime import datetime, timedelta, timezone
+
+NOW = datetime(2026, 9, 16, 12, 30, tzinfo=timezone.utc)
+
+
+def active_order(n, minutes_ago, items, prepared=None, requested_minutes_ago=None):
+    """
+    A REQUESTED order created `minutes_ago` before NOW with `items` as
+    (item_id, quantity) pairs; `requested_minutes_ago` adds the paid-at stamp.
+    """
+    order = {
+        "order_id": f"order_{n:04d}",
+        "token_number": 1000 + n,
+        "student_id": f"user_{n}",
+        "status": "REQUESTED",
+        "created_at": NOW - timedelta(minutes=minutes_ago),
+        "items": [{"item_id": item_id, "item_name": item_id.title(), "quantity": qty} for item_id, qty in items],
+        "prepared": prepared or {}
+    }
+    if requested_minutes_ago is not None:
+        order["requested_at"] = NOW - timedelta(minutes=requested_minutes_ago)
+    return order
@@ -0,0 +1,209 @@
+"""
+In-memory stand-ins for the Motor collections, for endpoint and migration tests.
+
+Only the query and update operators the backend actually uses are implemented;
+anything else raises so a test cannot silently pass on an unsupported filter.
+Filters are evaluated here, so a test only sees the documents the query itself
+would have returned from Mongo.
+"""
+import copy
+import re
+from itertools import count
+
+_ids = count(1)
+_MISSING = object()
+
+
+def _compare(value, op, operand):
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if op == "$ne":
+        return value != operand
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op == "$type":
+        return operand == "string" and isinstance(value, str)
+    if op in ("$gte", "$gt", "$lte", "$lt"):
+        if value is _MISSING or value is None:
+            return False
+        return {"$gte": value >= operand, "$gt": value > operand,
+                "$lte": value <= operand, "$lt": value < operand}[op]
+    if op == "$elemMatch":
+        return isinstance(value, list) and any(matches(item, operand) for item in value)
+    raise NotImplementedError(f"fake_mongo: operator {op}")
+
+
+def _get(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def matches(doc, query) -> bool:
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+            continue
+        if field == "$and":
+            if not all(matches(doc, clause) for clause in condition):
+                return False
+            continue
+        value = _get(doc, field)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            operators = dict(condition)
+            if "$regex" in operators:
+                flags = re.IGNORECASE if "i" in operators.pop("$options", "") else 0
+                if not isinstance(value, str) or not re.search(operators.pop("$regex"), value, flags):
+                    return False
+            if not all(_compare(value, op, operand) for op, operand in operators.items()):
+                return False
+        elif (None if value is _MISSING else value) != condition:
+            return False
+    return True
+
+
+def project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    included = {k for k, v in projection.items() if v and k != "_id"}
+    if included:
+        result = {k: copy.deepcopy(v) for k, v in doc.items() if k in included}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k, 1)}
+
+
+def apply_update(doc, update, inserting=False):
+    for op, fields in update.items():
+        if op == "$set" or (op == "$setOnInsert" and inserting):
+            for path, value in fields.items():
+                target = doc
+                *parents, leaf = path.split(".")
+                for part in parents:
+                    target = target.setdefault(part, {})
+                target[leaf] = copy.deepcopy(value)
+        elif op == "$inc":
+            for path, value in fields.items():
+                doc[path] = doc.get(path, 0) + value
+        elif op != "$setOnInsert":
+            raise NotImplementedError(f"fake_mongo: update operator {op}")
+
+
+class UpdateResult:
+    def __init__(self, matched, modified=0, upserted_id=None):
+        self.matched_count = matched
+        self.modified_count = modified
+        self.upserted_id = upserted_id
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args, **kwargs):
+        if isinstance(args[0], str):
+            keys = [(args[0], args[1] if len(args) > 1 else 1)]
+        else:
+            keys = args[0]
+        for field, direction in reversed(keys):
+            self.docs.sort(key=lambda d: _get(d, field), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs[:length] if length else list(self.docs)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, name="collection", docs=()):
+        self.name = name
+        self.docs = [copy.deepcopy(doc) for doc in docs]
+        self.bulk_writes = 0
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([project(doc, projection) for doc in self.docs if matches(doc, query or {})])
+
+    async def find_one(self, query=None, projection=None):
+        docs = await self.find(query, projection).to_list(1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, query):
+        return sum(1 for doc in self.docs if matches(doc, query))
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", next(_ids))
+        self.docs.append(copy.deepcopy(doc))
+
+    async def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            await self.insert_one(doc)
+
+    async def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if matches(doc, query):
+                apply_update(doc, update)
+                return UpdateResult(1, 1)
+        if upsert:
+            doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            apply_update(doc, update, inserting=True)
+            await self.insert_one(doc)
+            return UpdateResult(0, 0, doc["_id"])
+        return UpdateResult(0)
+
+    async def update_many(self, query, update):
+        matched = [doc for doc in self.docs if matches(doc, query)]
+        for doc in matched:
+            apply_update(doc, update)
+        return UpdateResult(len(matched), len(matched))
+
+    async def replace_one(self, query, replacement, upsert=False):
+        for i, doc in enumerate(self.docs):
+            if matches(doc, query):
+                self.docs[i] = {"_id": doc["_id"], **copy.deepcopy(replacement)}
+                return UpdateResult(1, 1)
+        if upsert:
+            await self.insert_one(dict(replacement))
+        return UpdateResult(0)
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            await self.update_one(request._filter, request._doc, upsert=request._upsert)
+        self.bulk_writes += 1
+
+
+class FakeDb:
+    def __init__(self, **collections):
+        self._collections = {}
+        self.commands = []
+        for name, docs in collections.items():
+            self._collections[name] = FakeCollection(name, docs)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        return self._collections.setdefault(name, FakeCollection(name))
+
+    async def command(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+
@@ -0,0 +1,111 @@
+"""
+Columnar analytics store tests: vectorized group-bys must agree with the dict-based
+ai_service implementations they replace.
+"""
+import asyncio
+import random
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from analytics_store import OrderAnalyticsStore
+from ai_service import ai_service
+
+NOW = datetime(2026, 9, 15, 12, 0, tzinfo=timezone.utc)
+MENU = [(f"item_{i:03d}", f"Item {i}", 2000 + 500 * i) for i in range(12)]
+
+
+def completed_orders(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    orders = []
+    for i in range(n):
+        picks = rng.sample(MENU, rng.randint(1, 4))
+        items = [{"item_id": item_id, "item_name": name, "quantity": rng.randint(1, 3),
+                  "price_at_order": paise / 100, "unit_price_paise": paise} for item_id, name, paise in picks]
+        orders.append({
+            "order_id": f"order_{i:08d}",
+            "canteen_id": rng.choice(["sopanam", "mba", "samudra"]),
+            "items": items,
+            "total_paise": sum(it["unit_price_paise"] * it["quantity"] for it in items),
+            "created_at": NOW - timedelta(minutes=rng.randint(0, 10 * 24 * 60))
+        })
+    return orders
+
+
+def build(orders) -> OrderAnalyticsStore:
+    store = OrderAnalyticsStore(capacity=16)
+    store.add_many(orders)
+    return store
+
+
+def test_summary_and_dedupe():
+    orders = completed_orders(500)
+    store = build(orders)
+    assert store.add(orders[0]) is False
+    assert len(store) == 500
+
+    count, paise = store.summary("mba")
+    mba = [o for o in orders if o["canteen_id"] == "mba"]
+    assert count == len(mba)
+    assert paise == sum(o["total_paise"] for o in mba)
+    assert store.summary("unknown") == (0, 0)
+
+
+def test_peak_hours_match_dict_implementation():
+    orders = completed_orders(800)
+    store = build(orders)
+    histogram = store.hour_histogram()
+    vectorized = ai_service.summarize_peak_hours({h: int(c) for h, c in enumerate(histogram) if c})
+    assert vectorized == asyncio.run(ai_service.predict_peak_hours(orders))
+
+
+def test_combos_match_dict_implementation():
+    orders = completed_orders(800)
+    store = build(orders)
+    pair_counts, item_counts, total = store.item_pairs()
+    vectorized = ai_service.combos_from_counts(pair_counts, item_counts, total, min_support=0.01)
+    expected = asyncio.run(ai_service.analyze_order_combos(orders, min_support=0.01))
+    assert {(c["item1"], c["item2"], c["frequency"]) for c in vectorized} == \
+           {(c["item1"], c["item2"], c["frequency"]) for c in expected}
+
+
+def test_item_sales_and_daily_totals():
+    orders = completed_orders(600)
+    store = build(orders)
+    start = NOW - timedelta(days=3)
+
+    quantity, revenue = defaultdict(int), defaultdict(int)
+    daily = defaultdict(lambda: {"orders": 0, "revenue_paise": 0})
+    for o in orders:
+        if o["created_at"] < start:
+            continue
+        day = daily[o["created_at"].date().isoformat()]
+        day["orders"] += 1
+        day["revenue_paise"] += o["total_paise"]
+        for it in o["items"]:
+            quantity[it["item_id"]] += it["quantity"]
+            revenue[it["item_id"]] += it["quantity"] * it["unit_price_paise"]
+
+    top = store.item_sales(start=start, sort_by="revenue_paise", limit=3)
+    expected = sorted(revenue, key=revenue.get, reverse=True)[:3]
+    assert [t["item_id"] for t in top] == expected
+    assert top[0]["quantity"] == quantity[expected[0]]
+    assert store.daily_totals(start=start) == dict(daily)
+
+
+def test_evict_keeps_csr_consistent():
+    orders = completed_orders(400)
+    store = build(orders)
+    cutoff = NOW - timedelta(days=5)
+    kept = [o for o in orders if o["created_at"] >= cutoff]
+
+    assert store.evict(cutoff) == len(orders) - len(kept)
+    assert store.summary() == (len(kept), sum(o["total_paise"] for o in kept))
+    assert sum(t["quantity"] for t in store.item_sales(limit=len(MENU))) == \
+           sum(it["quantity"] for o in kept for it in o["items"])
+
+    # Evicted orders can be re-added, kept ones are still deduplicated
+    assert store.add_many(orders) == len(orders) - len(kept)
@@ -0,0 +1,85 @@
+"""
+Cold-storage tests: partition layout, predicate pruning and manifest aggregates.
+"""
+import gzip
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from archiver import OrderArchive
+
+DAY = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+
+def archived_order(n: int, created_at: datetime, canteen_id: str = "sopanam", status: str = "COMPLETED") -> dict:
+    return {
+        "order_id": f"order_{n:012x}",
+        "student_id": "user_3f9a2b1c4d5e",
+        "items": [{"item_id": "item_a1", "item_name": "Masala Dosa", "quantity": 2,
+                   "price_at_order": 60.0, "unit_price_paise": 6000}],
+        "canteen_id": canteen_id,
+        "token_number": 1000 + n,
+        "status": status,
+        "total_amount": 120.0,
+        "total_paise": 12000,
+        "created_at": created_at,
+        "updated_at": created_at + timedelta(minutes=5)
+    }
+
+
+def build_archive(root: Path) -> OrderArchive:
+    archive = OrderArchive(root)
+    for d in range(3):
+        day = DAY + timedelta(days=d)
+        for canteen_id in ("sopanam", "mba"):
+            orders = [archived_order(d * 100 + h, day + timedelta(hours=h), canteen_id) for h in range(24)]
+            orders.append(archived_order(d * 100 + 99, day + timedelta(hours=12), canteen_id, "CANCELLED"))
+            archive.write_part(day.date(), canteen_id, f"b{d}", orders)
+    return archive
+
+
+def test_write_part_layout_and_idempotence(tmp_path):
+    archive = build_archive(tmp_path)
+    partition = tmp_path / "date=2025-09-01" / "canteen_id=sopanam"
+    assert (partition / "part-b0.ndjson.gz").exists()
+    assert (partition / "_manifest.json").exists()
+    with gzip.open(partition / "part-b0.ndjson.gz", "rb") as f:
+        assert len(f.readlines()) == 25
+
+    # Re-running the same batch (a resumed archiver run) must not duplicate rows
+    assert archive.write_part(DAY.date(), "sopanam", "b0", [archived_order(1, DAY)]) is False
+    assert sum(1 for _ in archive.scan(canteen_id="sopanam", start=DAY, end=DAY + timedelta(days=1))) == 25
+
+
+def test_scan_prunes_partitions_and_filters_rows(tmp_path):
+    archive = build_archive(tmp_path)
+    start, end = DAY + timedelta(days=1, hours=6), DAY + timedelta(days=1, hours=10)
+
+    pruned = list(archive.partitions(start, end, "mba"))
+    assert [(d.isoformat(), c) for d, c, _ in pruned] == [("2025-09-02", "mba")]
+
+    rows = list(archive.scan(start, end, canteen_id="mba", statuses=["COMPLETED"], fields=["order_id", "created_at"]))
+    assert len(rows) == 4
+    assert set(rows[0]) == {"order_id", "created_at"}
+    assert all(start <= r["created_at"] < end for r in rows)
+
+
+def test_daily_totals_use_manifest_and_edge_scans(tmp_path):
+    archive = build_archive(tmp_path)
+
+    # Whole days: answered from manifest stats only
+    totals = archive.daily_totals(DAY, DAY + timedelta(days=3))
+    assert totals["2025-09-01"] == {"orders": 48, "revenue_paise": 48 * 12000}
+    assert len(totals) == 3
+
+    # A bound inside a day forces a row scan of the straddling parts only
+    totals = archive.daily_totals(DAY + timedelta(hours=20), DAY + timedelta(days=1), canteen_id="sopanam")
+    assert totals == {"2025-09-01": {"orders": 4, "revenue_paise": 4 * 12000}}
+
+
+def test_missing_archive_is_empty(tmp_path):
+    archive = OrderArchive(tmp_path / "nothing-here")
+    assert list(archive.scan()) == []
+    assert archive.daily_totals() == {}
@@ -0,0 +1,53 @@
+"""
+Canteen load tests: load snapshot figures and cart-based canteen ranking.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from canteen_load import measure_load, rank_canteens
+from tests.factories import NOW, active_order
+
+
+def menu_item(canteen_id, name, prep_time=5, stock_qty=50, available=True):
+    return {"item_id": f"{canteen_id}_{name.lower().replace(' ', '_')}", "name": name, "canteen_id": canteen_id,
+            "prep_time": prep_time, "stock_qty": stock_qty, "available": available}
+
+
+def test_measure_load_weights_outstanding_units_by_prep_time():
+    orders = [
+        active_order(1, 1, [("dosa", 2), ("coffee", 1)], prepared={"dosa": 1}),
+        active_order(2, 2, [("biryani", 1)]),
+    ]
+    throughput = np.zeros(24)
+    throughput[12] = 40
+    load = measure_load("sopanam", orders, {"dosa": 8, "coffee": 2, "biryani": 20}, throughput, 10, NOW)
+    assert load["active_orders"] == 2
+    assert load["outstanding_units"] == 3
+    assert load["outstanding_prep_minutes"] == 8 + 2 + 20
+    assert load["service_rate"] == 40 and load["queue_minutes"] == 3.0
+    assert load["level"] == "quiet"
+
+    # A recent burst above the historical rate is real capacity
+    busy = measure_load("sopanam", orders * 10, {}, throughput, 60, NOW)
+    assert busy["service_rate"] == 60 and busy["queue_minutes"] == 20.0 and busy["level"] == "busy"
+
+
+def test_rank_canteens_prefers_fastest_kitchen_that_can_serve():
+    menus = {
+        "sopanam": [menu_item("sopanam", "Masala Dosa"), menu_item("sopanam", "Filter Coffee", 2)],
+        "mba": [menu_item("mba", "masala  dosa"), menu_item("mba", "Filter Coffee", 2)],
+        "samudra": [menu_item("samudra", "Masala Dosa"), menu_item("samudra", "Filter Coffee", stock_qty=0)],
+    }
+    loads = {
+        "sopanam": {"active_orders": 30, "service_rate": 60.0},
+        "mba": {"active_orders": 2, "service_rate": 30.0},
+        "samudra": {"active_orders": 0, "service_rate": 30.0},
+    }
+    ranked = rank_canteens({"Masala Dosa": 2, "Filter Coffee": 1}, menus, loads, NOW)
+    assert [c["canteen_id"] for c in ranked] == ["mba", "sopanam", "samudra"]
+    assert ranked[0]["eta_minutes"] == 6 and ranked[1]["eta_minutes"] == 31
+    assert ranked[2]["can_serve"] is False and ranked[2]["missing_items"] == ["Filter Coffee"]
@@ -0,0 +1,62 @@
+"""
+POST /api/canteens/suggest against an in-memory stand-in for the Mongo collections.
+
+The fake collections evaluate the endpoint's `$regex` filter with Python's `re`, so
+a menu item is only returned when the query itself matches it - the ranking can no
+longer paper over a filter that misses differently-cased names.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:1")
+os.environ.setdefault("DB_NAME", "test")
+
+import server
+from tests.fake_mongo import FakeDb
+
+
+def menu_item(canteen_id, name, stock_qty=50):
+    return {"item_id": f"{canteen_id}_{len(name)}", "name": name, "canteen_id": canteen_id,
+            "available": True, "stock_qty": stock_qty, "prep_time": 5}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeDb(
+        canteens=[{"canteen_id": "sopanam"}, {"canteen_id": "mba"}],
+        menu_items=[
+            menu_item("sopanam", "Masala Dosa"), menu_item("sopanam", "Filter Coffee"),
+            menu_item("mba", "masala  dosa"), menu_item("mba", "FILTER COFFEE", stock_qty=0),
+            menu_item("mba", "Masala Dosa Combo"),
+        ],
+        canteen_load=[{"canteen_id": "sopanam", "active_orders": 10, "service_rate": 30.0},
+                      {"canteen_id": "mba", "active_orders": 0, "service_rate": 30.0}],
+    )
+    monkeypatch.setattr(server, "db", fake)
+    return TestClient(server.app)
+
+
+def test_suggest_matches_names_case_and_whitespace_insensitively(client):
+    response = client.post("/api/canteens/suggest", json={"items": [
+        {"item_name": "masala dosa", "quantity": 1},
+        {"item_name": " Filter  coffee", "quantity": 1},
+        {"item_name": "Masala Dosa", "quantity": 1},
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["suggested"] == "sopanam"
+    by_id = {c["canteen_id"]: c for c in body["canteens"]}
+    assert by_id["sopanam"]["can_serve"] and by_id["sopanam"]["missing_items"] == []
+    # mba has the dosa under another spelling, but its coffee is out of stock
+    assert by_id["mba"]["missing_items"] == [" Filter  coffee"]
+
+
+def test_suggest_escapes_regex_characters(client):
+    response = client.post("/api/canteens/suggest", json={"items": [{"item_name": "Masala.*", "quantity": 1}]})
+    assert response.status_code == 200
+    assert response.json()["suggested"] is None
@@ -0,0 +1,76 @@
+"""
+Delay alert tests: hierarchical timer wheel firing/cancellation and the per-order alert engine.
+"""
+import random
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from delay_alerts import TimerWheel, DelayAlertEngine, order_deadline
+from tests.factories import NOW, active_order
+
+
+def test_wheel_fires_each_timer_on_its_tick_across_levels():
+    rng = random.Random(7)
+    wheel = TimerWheel(start_tick=1000)
+    deadlines = {f"t{i}": 1000 + rng.randint(1, 64 ** 3 + 5000) for i in range(500)}
+    for key, deadline in deadlines.items():
+        wheel.add(key, deadline)
+
+    fired_at = {}
+    for tick in range(1001, max(deadlines.values()) + 1, 97):
+        target = min(tick, max(deadlines.values()))
+        for key in wheel.advance(target):
+            fired_at[key] = target
+    wheel_end = max(deadlines.values())
+    for key in wheel.advance(wheel_end):
+        fired_at[key] = wheel_end
+
+    assert len(wheel) == 0 and set(fired_at) == set(deadlines)
+    # Each timer fires in the advance() call that crosses its deadline
+    assert all(fired_at[key] - 97 < deadline <= fired_at[key] for key, deadline in deadlines.items())
+
+
+def test_wheel_cancel_and_past_deadlines():
+    wheel = TimerWheel(start_tick=0)
+    wheel.add("late", -30)
+    wheel.add("soon", 5)
+    wheel.add("later", 200)
+    assert wheel.cancel("soon") and not wheel.cancel("soon")
+    assert wheel.advance(1) == ["late"]
+    wheel.add("later", 10)  # re-arm moves the timer
+    assert wheel.advance(10) == ["later"]
+    assert wheel.advance(500) == []
+
+
+def test_deadline_uses_slowest_item_and_canteen_config():
+    order = active_order(1, 1, [("coffee", 1), ("biryani", 1)], requested_minutes_ago=0)
+    assert order_deadline(order, {"coffee": 2, "biryani": 20}, (1.5, 5)) == NOW + timedelta(minutes=35)
+    assert order_deadline(order, {"coffee": 2, "biryani": 20}, (1.0, 0)) == NOW + timedelta(minutes=20)
+
+
+def test_engine_fires_once_and_clears_when_order_leaves_kitchen():
+    clock = [NOW.timestamp()]
+    engine = DelayAlertEngine(clock=lambda: clock[0])
+    prep = {"dosa": 10}
+    orders = [active_order(1, 15, [("dosa", 1)], requested_minutes_ago=14),
+              active_order(2, 3, [("dosa", 1)], requested_minutes_ago=2)]
+    engine.sync("sopanam", orders, prep, (1.0, 5))  # deadline: requested_at + 15 min
+
+    assert engine.tick() == []
+    clock[0] += 61
+    alerts = engine.tick()
+    assert [a["order_id"] for a in alerts] == ["order_0001"] and alerts[0]["token_number"] == 1001
+
+    # Re-syncing with the same orders neither re-arms nor re-fires the alert
+    engine.sync("sopanam", orders, prep, (1.0, 5))
+    clock[0] += 60
+    assert engine.tick() == []
+    assert [a["order_id"] for a in engine.alerts("sopanam")] == ["order_0001"]
+
+    # Order 1 is READY and order 2 advanced out of the kitchen: alert and timer are dropped
+    engine.sync("sopanam", [], prep, (1.0, 5))
+    clock[0] += 3600
+    assert engine.tick() == [] and engine.alerts("sopanam") == []
@@ -0,0 +1,64 @@
+"""
+ETA tests: queue drain at historical throughput, prep-time floor and change detection.
+"""
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from analytics_store import OrderAnalyticsStore
+from eta import hourly_throughput, estimate_queue, changed_estimates
+from tests.factories import NOW, active_order
+
+
+def test_hourly_throughput_averages_over_trading_days():
+    store = OrderAnalyticsStore(window_days=60)
+    orders = []
+    for day in range(1, 3):
+        for k in range(30 * day):
+            orders.append({
+                "order_id": f"order_{day}_{k}",
+                "canteen_id": "sopanam",
+                "created_at": NOW.replace(minute=k % 60) - timedelta(days=day),
+                "total_paise": 5000,
+                "items": [{"item_id": "dosa", "item_name": "Dosa", "quantity": 1, "unit_price_paise": 5000}]
+            })
+    store.add_many(orders)
+    throughput = hourly_throughput(store, "sopanam")
+    assert throughput[12] == 45 and throughput.sum() == 45
+    assert not hourly_throughput(store, "mba").any()
+
+
+def test_queue_drains_at_throughput_with_prep_floor():
+    throughput = np.zeros(24)
+    throughput[12] = 60  # one order a minute at noon
+    orders = [active_order(n, 30 - n, [("coffee", 1)]) for n in range(1, 13)]
+    orders.append(active_order(13, 1, [("biryani", 1), ("coffee", 1)]))
+    etas = estimate_queue(orders, {"coffee": 2, "biryani": 25}, throughput, NOW)
+
+    # Head of the queue is bounded by the coffee prep time, the back by the drain rate
+    assert etas["order_0001"]["minutes"] == 2 and etas["order_0001"]["queue_position"] == 1
+    assert etas["order_0012"]["minutes"] == 12
+    assert etas["order_0013"]["minutes"] == 25
+    assert etas["order_0012"]["ready_at"] == NOW + timedelta(minutes=12)
+
+
+def test_quiet_hours_use_minimum_throughput_and_prepared_items_drop_out():
+    orders = [active_order(n, 10 - n, [("dosa", 1)]) for n in range(1, 7)]
+    orders[0] = active_order(1, 9, [("dosa", 1), ("biryani", 1)], prepared={"biryani": 1})
+    etas = estimate_queue(orders, {"dosa": 5, "biryani": 25}, np.zeros(24), NOW)
+    # 20 orders/hour floor: the 6th order waits 18 minutes, not forever
+    assert etas["order_0006"]["minutes"] == 18
+    # The cooked biryani no longer holds order 1 back
+    assert etas["order_0001"]["minutes"] == 5
+
+
+def test_changed_estimates_skips_small_moves():
+    orders = [active_order(1, 5, [("dosa", 1)]), active_order(2, 2, [("dosa", 1)])]
+    etas = estimate_queue(orders, {"dosa": 5}, np.zeros(24), NOW)
+    orders[0]["eta"] = {**etas["order_0001"], "ready_at": etas["order_0001"]["ready_at"] + timedelta(seconds=20)}
+    orders[1]["eta"] = {**etas["order_0002"], "queue_position": 3}
+    assert [o["order_id"] for o in changed_estimates(orders, etas)] == ["order_0002"]
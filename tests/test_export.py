@@ -0,0 +1,90 @@
+import asyncio
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from exporter import stream_ndjson, stream_csv, CSV_COLUMNS
+
+# Enough rows for several chunks; bounded memory means the peak does not grow with the count
+TOTAL_ORDERS = 10_000
+SCALE = 3
+# Allowed peak of memory traced while exporting, in MB (buffering 10k rows takes ~4.5 MB)
+PEAK_BUDGET_MB = 4
+# Allowed peak growth when the export is SCALE times larger
+PEAK_GROWTH = 1.25
+
+
+async def synthetic_orders(count):
+    """Async stand-in for a Motor cursor yielding `count` order documents"""
+    for n in range(count):
+        yield {
+            "order_id": f"order_{n:012d}",
+            "token_number": 1000000 + n % 9000000,
+            "canteen_id": ("sopanam", "mba", "samudra")[n % 3],
+            "student_id": f"user_{n % 5000:012d}",
+            "status": "COMPLETED",
+            "items": [
+                {"item_id": "item_dosa", "item_name": "Masala Dosa", "quantity": 2, "price_at_order": 60.0},
+                {"item_id": "item_coffee", "item_name": "Filter Coffee", "quantity": 1, "price_at_order": 20.0}
+            ],
+            "total_amount": 140.0,
+            "created_at": "2026-09-01T12:00:00+00:00",
+            "updated_at": "2026-09-01T12:15:00+00:00"
+        }
+
+
+def _export_peak_mb(stream):
+    """(chunks, lines, peak MB allocated while draining `stream`)"""
+    tracemalloc.start()
+    try:
+        chunks, lines = asyncio.run(_drain(stream))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return chunks, lines, peak / 2 ** 20
+
+
+async def _drain(stream):
+    chunks = 0
+    lines = 0
+    async for chunk in stream:
+        chunks += 1
+        lines += chunk.count(b"\n")
+    return chunks, lines
+
+
+def test_ndjson_export_streams_in_bounded_memory():
+    chunks, lines, peak = _export_peak_mb(stream_ndjson(synthetic_orders(TOTAL_ORDERS)))
+    assert lines == TOTAL_ORDERS
+    assert chunks > 1
+    assert peak < PEAK_BUDGET_MB
+
+    _, lines, larger_peak = _export_peak_mb(stream_ndjson(synthetic_orders(TOTAL_ORDERS * SCALE)))
+    assert lines == TOTAL_ORDERS * SCALE
+    assert larger_peak < peak * PEAK_GROWTH
+
+
+def test_csv_export_streams_in_bounded_memory():
+    chunks, lines, peak = _export_peak_mb(stream_csv(synthetic_orders(TOTAL_ORDERS)))
+    # Header row plus one row per order (csv uses \r\n line endings)
+    assert lines == TOTAL_ORDERS + 1
+    assert chunks > 1
+    assert peak < PEAK_BUDGET_MB
+
+    _, lines, larger_peak = _export_peak_mb(stream_csv(synthetic_orders(TOTAL_ORDERS * SCALE)))
+    assert lines == TOTAL_ORDERS * SCALE + 1
+    assert larger_peak < peak * PEAK_GROWTH
+
+
+def test_csv_header_and_row_shape():
+    async def collect():
+        out = b""
+        async for chunk in stream_csv(synthetic_orders(2)):
+            out += chunk
+        return out.decode("utf-8").splitlines()
+
+    rows = asyncio.run(collect())
+    assert rows[0] == ",".join(CSV_COLUMNS)
+    assert "Masala Dosa x2; Filter Coffee x1" in rows[1]
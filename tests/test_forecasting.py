@@ -0,0 +1,73 @@
+"""
+Demand forecast tests: hour-of-week bucketing and exponential smoothing across weeks.
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from analytics_store import OrderAnalyticsStore
+from forecasting import build_forecasts, seasonal_history, smooth
+
+NOW = datetime(2026, 9, 16, 11, 20, tzinfo=timezone.utc)
+HOUR = NOW.replace(minute=0)
+
+
+def order(n, created_at, item_id="item_dosa", quantity=1, canteen_id="sopanam"):
+    return {
+        "order_id": f"order_{n:06d}",
+        "canteen_id": canteen_id,
+        "created_at": created_at,
+        "total_paise": 6000 * quantity,
+        "items": [{"item_id": item_id, "item_name": item_id.split("_")[1].title(),
+                   "quantity": quantity, "unit_price_paise": 6000}]
+    }
+
+
+def test_seasonal_history_buckets_complete_weeks_only():
+    now_hour = int(NOW.timestamp()) // 3600
+    ts = np.array([
+        int((HOUR - timedelta(weeks=1)).timestamp()),                 # same slot, week 0
+        int((HOUR - timedelta(weeks=2)).timestamp()),                 # same slot, week 1
+        int(NOW.timestamp()),                                         # current partial hour: ignored
+        int((HOUR - timedelta(weeks=9)).timestamp()),                 # older than the window: ignored
+    ])
+    history = seasonal_history(np.zeros(4, dtype=np.int64), ts, np.array([3.0, 5.0, 7.0, 9.0]), 1, now_hour, weeks=4)
+    slot = now_hour % 168
+    assert history.shape == (4, 1, 168)
+    assert history[0, 0, slot] == 3 and history[1, 0, slot] == 5
+    assert history.sum() == 8
+
+
+def test_smooth_weights_recent_weeks_more():
+    history = np.array([[[8.0]], [[4.0]], [[0.0]]])  # week 0 is the most recent
+    # oldest first: 0 -> 0.5*4 + 0.5*0 = 2 -> 0.5*8 + 0.5*2 = 5
+    assert smooth(history, alpha=0.5)[0, 0] == 5.0
+
+
+def test_build_forecasts_predicts_weekly_pattern():
+    store = OrderAnalyticsStore(window_days=60)
+    orders, n = [], 0
+    for week, quantity in enumerate([6, 4, 2, 2], start=1):
+        # Dosa sells in the 12:00 slot every week, coffee at 15:00
+        orders.append(order(n, HOUR + timedelta(hours=1, minutes=10) - timedelta(weeks=week), quantity=quantity)); n += 1
+        orders.append(order(n, HOUR + timedelta(hours=4, minutes=5) - timedelta(weeks=week), "item_coffee", 1)); n += 1
+    orders.append(order(n, HOUR - timedelta(weeks=4, hours=2), "item_dosa", 1, canteen_id="mba"))
+    store.add_many(orders)
+
+    forecasts = {f["canteen_id"]: f for f in build_forecasts(store, now=NOW, horizon=6)}
+    assert set(forecasts) == {"sopanam", "mba"}
+    sopanam = forecasts["sopanam"]
+    assert sopanam["weeks_of_history"] == 4
+    assert [h["hour_start"] for h in sopanam["hours"]][:2] == [HOUR, HOUR + timedelta(hours=1)]
+
+    noon = sopanam["hours"][1]
+    # weeks oldest->newest 2, 2, 4, 6 with alpha 0.5: 2 -> 2 -> 3 -> 4.5
+    assert noon["items"] == [{"item_id": "item_dosa", "item_name": "Dosa", "quantity": 4.5}]
+    assert noon["expected_orders"] > 0.9
+    assert sopanam["hours"][4]["items"][0]["item_id"] == "item_coffee"
+    assert sopanam["hours"][0]["items"] == []
+    assert sopanam["horizon_totals"]["item_dosa"] == 4.5
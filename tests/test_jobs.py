@@ -0,0 +1,46 @@
+"""
+Per-key debouncing of background jobs.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from jobs import Debouncer
+
+
+def test_debouncer_coalesces_bursts_per_key_and_reruns_after_a_late_call():
+    runs = []
+
+    async def scenario():
+        async def job(key):
+            runs.append(key)
+            if runs.count(key) == 1 and key == "sopanam":
+                # A transition arriving while the publish runs gets its own run
+                debounced("sopanam")
+            await asyncio.sleep(0)
+
+        debounced = Debouncer("test", 0.01, job)
+        for _ in range(5):
+            debounced("sopanam")
+        debounced("mba")
+        await debounced.drain()
+
+    asyncio.run(scenario())
+    assert sorted(runs) == ["mba", "sopanam", "sopanam"]
+
+
+def test_debouncer_logs_and_survives_failing_jobs(caplog):
+    async def scenario():
+        async def job(key):
+            raise RuntimeError("boom")
+
+        debounced = Debouncer("failing", 0, job)
+        debounced("sopanam")
+        await debounced.drain()
+        debounced("sopanam")
+        await debounced.drain()
+
+    asyncio.run(scenario())
+    assert caplog.text.count("Debounced job 'failing' failed for sopanam: boom") == 2
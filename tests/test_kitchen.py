@@ -0,0 +1,48 @@
+"""
+Kitchen scheduler tests: outstanding units, batching and FIFO allocation of cooked units.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from kitchen import build_board, allocate_units, outstanding_units
+from tests.factories import NOW, active_order
+
+
+def test_outstanding_units_subtracts_prepared():
+    order = active_order(1, 5, [("dosa", 2), ("coffee", 1), ("dosa", 1)], prepared={"dosa": 1, "coffee": 1})
+    assert outstanding_units(order) == {"dosa": 2}
+
+
+def test_board_batches_identical_items_by_priority():
+    orders = [
+        active_order(1, 12, [("dosa", 3), ("coffee", 1)]),
+        active_order(2, 8, [("dosa", 4)]),
+        active_order(3, 2, [("dosa", 2), ("biryani", 1)]),
+    ]
+    board = build_board("sopanam", orders, {"dosa": 5, "coffee": 2, "biryani": 20}, NOW, max_batch=8)
+
+    assert board["active_orders"] == 3
+    assert {i["item_id"]: i["outstanding"] for i in board["items"]} == {"dosa": 9, "coffee": 1, "biryani": 1}
+
+    dosa = [b for b in board["batches"] if b["item_id"] == "dosa"]
+    assert [b["quantity"] for b in dosa] == [8, 1]
+    # FIFO: the oldest orders fill the first batch, order 3 is split across both
+    assert [(o["order_id"], o["quantity"]) for o in dosa[0]["orders"]] == \
+           [("order_0001", 3), ("order_0002", 4), ("order_0003", 1)]
+
+    # Biryani: 2 min wait + 20 min prep outranks coffee (12 + 2) and the second dosa batch (2 + 5)
+    assert [b["item_id"] for b in board["batches"]] == ["biryani", "dosa", "coffee", "dosa"]
+    assert [b["position"] for b in board["batches"]] == [1, 2, 3, 4]
+
+
+def test_allocate_units_oldest_first():
+    orders = [
+        active_order(2, 8, [("dosa", 4)], prepared={"dosa": 3}),
+        active_order(1, 12, [("dosa", 2)]),
+        active_order(3, 1, [("coffee", 1)]),
+    ]
+    allocations, left = allocate_units(orders, "dosa", 5)
+    assert [(o["order_id"], units) for o, units in allocations] == [("order_0001", 2), ("order_0002", 1)]
+    assert left == 2
@@ -0,0 +1,43 @@
+"""
+Protein knapsack tests: best subset under the goal, exclusions and the goal cap.
+"""
+import itertools
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from knapsack import MAX_PROTEIN_GOAL, protein_candidates, protein_combo
+
+
+def item(item_id, protein, name=None):
+    return {"item_id": item_id, "name": name or item_id, "canteen_id": "sopanam", "price": 50.0,
+            "image_url": None, "nutrition": {"protein": protein}}
+
+
+def test_picks_the_largest_total_not_above_the_goal():
+    menu = [item("eggs", 12), item("shake", 24.6), item("salad", 18), item("dal", 9), item("tea", 0)]
+    result = protein_combo(menu, 40)
+    assert result["totalProtein"] == 39 and result["status"] == "Nearest Possible"
+    assert sorted(result["selectedItems"]) == ["dal", "eggs", "salad"]
+
+    # 24.6 g rounds to 25
+    exact = protein_combo(menu, 37)
+    assert sorted(exact["selectedItems"]) == ["eggs", "shake"] and exact["status"] == "Exact Match"
+
+    without_salad = protein_combo(menu, 40, excluded={"salad"})
+    assert "salad" not in without_salad["selectedItems"] and without_salad["totalProtein"] == 37
+
+
+def test_matches_brute_force_and_caps_goal():
+    rng = random.Random(3)
+    menu = [item(f"i{n}", rng.randint(1, 30)) for n in range(12)]
+    proteins = [c["protein"] for c in protein_candidates(menu)]
+    for goal in (5, 33, 71, 140):
+        best = max(sum(combo) for r in range(len(proteins) + 1)
+                   for combo in itertools.combinations(proteins, r) if sum(combo) <= goal)
+        assert protein_combo(menu, goal)["totalProtein"] == best
+
+    assert protein_combo([item("x", None), {"item_id": "broken"}], 10)["selectedItems"] == []
+    assert protein_combo(menu, 10 ** 6)["target"] == MAX_PROTEIN_GOAL
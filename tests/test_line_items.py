@@ -0,0 +1,25 @@
+"""
+Line-item normalisation tests: legacy shapes, quantity defaults and paise totals.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from line_items import items_total_paise, normalize_line_item, to_paise
+
+
+def test_legacy_shapes_and_totals():
+    legacy = normalize_line_item({"name": "Masala Dosa", "price": 60.5, "qty": 2})
+    assert legacy["item_name"] == "Masala Dosa" and legacy["quantity"] == 2
+    assert legacy["unit_price_paise"] == 6050 and legacy["price_at_order"] == 60.5
+    coffee = normalize_line_item({"item_id": "coffee", "item_name": "Coffee", "price_at_order": 0.1})
+    assert coffee["quantity"] == 1
+    assert items_total_paise([legacy, coffee]) == 12110
+    assert to_paise(0.125) == 13
+
+
+def test_explicit_zero_quantity_is_kept_for_validation():
+    assert normalize_line_item({"item_name": "Tea", "price": 10, "quantity": 0})["quantity"] == 0
+    assert normalize_line_item({"item_name": "Tea", "price": 10, "qty": 0})["quantity"] == 0
+    assert normalize_line_item({"item_name": "Tea", "price": 10, "quantity": None})["quantity"] == 1
@@ -0,0 +1,121 @@
+"""
+Logging pipeline tests: sampling / rate limits, non-blocking queueing and JSON output with request ids.
+"""
+import io
+import json
+import logging
+import queue
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from metrics import LOG_RECORDS_DROPPED
+from log_pipeline import (
+    SamplingFilter, DroppingQueueHandler, JsonFormatter, RequestIdFilter, parse_rules, request_id_var,
+    setup_logging, shutdown_logging
+)
+
+
+def record(name, level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    rec = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    rec.__dict__.update(extra)
+    return rec
+
+
+def test_rules_and_rate_limit_by_longest_prefix():
+    assert parse_rules("access=0.1, server.crew=5", {"server.crew": 20}) == {"access": 0.1, "server.crew": 5.0}
+
+    clock = [0.0]
+    sampler = SamplingFilter({"access": 0.25}, {"server.crew": 2}, clock=lambda: clock[0], rng=random.Random(1))
+    passed = [sampler.filter(record("server.crew.orders")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert sampler.filter(record("server.crew", logging.WARNING))  # warnings always pass
+
+    clock[0] += 1.0
+    allowed = record("server.crew")
+    assert sampler.filter(allowed) and allowed.suppressed == 3
+    assert sampler.filter(record("server.other"))
+
+    kept = sum(sampler.filter(record("access")) for _ in range(4000))
+    assert 800 < kept < 1200
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(record("access"))
+    assert handler.queue.qsize() == 2 and handler.dropped == 3
+    queued = handler.queue.get_nowait()
+    assert queued.msg == "hello world" and queued.args is None
+
+    # Once there is room again the drops are reported ahead of the next record
+    handler.queue.get_nowait()
+    before = LOG_RECORDS_DROPPED.value()
+    handler.handle(record("access"))
+    report = handler.queue.get_nowait()
+    assert report.levelno == logging.WARNING and report.dropped == 3
+    assert report.getMessage() == "Log queue full: dropped 3 records"
+    assert handler.queue.get_nowait().msg == "hello world"
+    handler.handle(record("access"))
+    assert handler.queue.qsize() == 1
+
+    handler.handle(record("access"))
+    handler.handle(record("access"))
+    assert LOG_RECORDS_DROPPED.value() == before + 1
+
+
+def test_json_lines_carry_request_id_and_extra_fields():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    try:
+        setup_logging("INFO", "json", stream=stream, sample_rates={}, rate_limits={})
+        token = request_id_var.set("req-123")
+        logging.getLogger("access").info("GET /api/menu %s", 200, extra={"status": 200, "duration_ms": 1.5})
+        request_id_var.reset(token)
+        logging.getLogger("access").debug("not at this level")
+        shutdown_logging()
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 1
+    entry = lines[0]
+    assert entry["msg"] == "GET /api/menu 200" and entry["logger"] == "access" and entry["level"] == "INFO"
+    assert entry["request_id"] == "req-123" and entry["status"] == 200 and entry["duration_ms"] == 1.5
+
+
+def test_formatter_standalone():
+    rec = record("server", msg="plain", args=None)
+    RequestIdFilter().filter(rec)
+    assert json.loads(JsonFormatter().format(rec))["request_id"] == "-"
+
+
+def test_uvicorn_loggers_go_through_the_queue():
+    access = logging.getLogger("uvicorn.access")
+    access.addHandler(logging.StreamHandler(sys.stdout))
+    access.propagate = False
+    stream = io.StringIO()
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    try:
+        handler = setup_logging("INFO", "json", stream=stream, sample_rates={}, rate_limits={})
+        assert access.handlers == [] and access.propagate
+        access.info('%s - "%s %s HTTP/1.1" %d', "127.0.0.1:5000", "GET", "/api/menu", 200)
+        shutdown_logging()
+    finally:
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        for existing in saved_handlers:
+            root.addHandler(existing)
+        root.setLevel(saved_level)
+
+    assert isinstance(handler, DroppingQueueHandler)
+    entry = json.loads(stream.getvalue().splitlines()[0])
+    assert entry["logger"] == "uvicorn.access" and "GET /api/menu" in entry["msg"]
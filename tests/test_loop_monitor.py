@@ -0,0 +1,54 @@
+"""
+Loop monitor tests: lag histogram, watchdog stack capture during a stall and offender aggregation.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from loop_monitor import LoopMonitor
+from metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS, REGISTRY
+
+
+def hash_password_sync():
+    time.sleep(0.25)
+
+
+async def login_handler():
+    hash_password_sync()
+
+
+def test_watchdog_attributes_stall_to_running_handler():
+    monitor = LoopMonitor(interval_ms=10, threshold_ms=50, app_root=Path(__file__).resolve().parent)
+    before = EVENT_LOOP_LAG.count()
+
+    async def scenario():
+        heartbeat = monitor.start()
+        await asyncio.sleep(0.1)
+        await login_handler()
+        await asyncio.sleep(0.1)
+        heartbeat.cancel()
+
+    asyncio.run(scenario())
+
+    assert EVENT_LOOP_LAG.count() > before
+    report = monitor.report()
+    assert report["stalls"] == 1 and report["lag"]["max_ms"] >= 150
+    offender = report["offenders"][0]
+    assert offender["blocking_frame"].startswith("test_loop_monitor.hash_password_sync:")
+    assert offender["count"] == 1 and offender["max_ms"] >= 150
+    # The outermost test-module frame is the coroutine the loop was stepping
+    assert offender["handler"] == "test_loop_monitor.test_watchdog_attributes_stall_to_running_handler.<locals>.scenario"
+    assert "test_loop_monitor.login_handler" in " ".join(offender["stack"])
+    assert report["recent"][0]["blocked_ms"] == offender["max_ms"]
+    assert EVENT_LOOP_STALLS.value(offender["handler"]) >= 1
+    assert "event_loop_lag_seconds_bucket" in REGISTRY.render().decode()
+
+
+def test_no_capture_while_heartbeat_is_on_time():
+    monitor = LoopMonitor(interval_ms=10, threshold_ms=50)
+    monitor.beat(0.001, time.monotonic())
+    assert monitor.check(time.monotonic()) is None
+    assert monitor.report()["stalls"] == 0 and monitor.report()["lag"]["p50_ms"] == 1.0
@@ -0,0 +1,116 @@
+"""
+Bulk menu import tests: CSV/JSON parsing, per-row validation and write planning.
+"""
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from menu_import import parse_rows, validate_rows, existing_query, plan_writes, CREW_FIELDS
+
+NOW = datetime(2026, 9, 16, 6, 0, tzinfo=timezone.utc)
+
+NEW_ITEM = {
+    "name": "Ghee Roast", "canteen_id": "mba", "price": 70, "ingredients": "Rice, urad dal, ghee",
+    "allergens": "Dairy", "stock_qty": 40, "category": "Breakfast", "image_url": "", "veg_type": "veg",
+    "prep_time": 8, "nutrition": {"calories": 320, "carbs": 42, "protein": 7, "fat": 14, "fiber": 2,
+                                  "vitamins": "B1", "sodium": 300}
+}
+
+
+def test_csv_rows_skip_empty_cells_and_nest_nutrition():
+    body = ("item_id,canteen_id,name,stock_qty,available,nutrition.calories\n"
+            "item_dosa,,,120,,\n"
+            ",sopanam,Filter Coffee,,false,95\n").encode()
+    assert parse_rows(body, "text/csv; charset=utf-8") == [
+        {"item_id": "item_dosa", "stock_qty": "120"},
+        {"canteen_id": "sopanam", "name": "Filter Coffee", "available": "false", "nutrition": {"calories": "95"}},
+    ]
+    assert parse_rows(b'{"items": [{"item_id": "x"}]}', "application/json") == [{"item_id": "x"}]
+    with pytest.raises(ValueError):
+        parse_rows(b'{"item_id": "x"}', "application/json")
+    # csv.Error (here an oversized field) surfaces as ValueError like the other parse errors
+    with pytest.raises(ValueError, match="Malformed CSV"):
+        parse_rows(b"item_id\n" + b"x" * 200_000 + b"\n", "text/csv")
+
+
+def test_validation_reports_each_bad_row():
+    rows, errors = validate_rows([
+        {"item_id": "item_dosa", "stock_qty": "120"},
+        {"stock_qty": 5},
+        {"item_id": "item_vada", "price": -1},
+        {"item_id": "item_idli", "prep_time": 4},
+    ], allowed_fields=CREW_FIELDS)
+    assert [index for index, _ in rows] == [0]
+    assert rows[0][1].stock_qty == 120
+    assert [err["row"] for err in errors] == [1, 2, 3]
+    assert "prep_time" in errors[2]["error"]
+
+
+def test_plan_updates_existing_creates_complete_rows_and_flags_the_rest():
+    rows, _ = validate_rows([
+        {"item_id": "item_dosa", "price": 65},
+        NEW_ITEM,
+        {"canteen_id": "mba", "name": "Unknown", "stock_qty": 3},
+        {"item_id": "item_dosa", "available": False},
+        {"item_id": "item_idli"},
+    ])
+    existing = [{"item_id": "item_dosa", "canteen_id": "sopanam", "name": "Masala Dosa"},
+                {"item_id": "item_idli", "canteen_id": "sopanam", "name": "Idli"}]
+    query = existing_query(rows)
+    assert {"item_id": {"$in": ["item_dosa", "item_dosa", "item_idli"]}} in query["$or"]
+
+    requests, positions, errors = plan_writes(rows, existing, allow_create=True, now=NOW)
+    assert positions == [0, 1]
+    assert requests[0]._doc == {"$set": {"price": 65.0}} and not requests[0]._upsert
+    assert requests[1]._upsert and requests[1]._filter == {"canteen_id": "mba", "name": "Ghee Roast"}
+    assert requests[1]._doc["$setOnInsert"]["available"] is True
+    assert requests[1]._doc["$setOnInsert"]["item_id"].startswith("item_")
+    assert {err["row"]: err["error"].split(" (")[0] for err in errors} == {
+        2: "Item not found", 3: "Duplicate of row 0", 4: "Nothing to update"
+    }
+
+    _, _, crew_errors = plan_writes(rows[1:2], existing, allow_create=False, now=NOW)
+    assert crew_errors[0]["error"] == "Only management can add menu items"
+
+
+def test_partial_nutrition_updates_only_the_given_values():
+    body = ("item_id,nutrition.calories,nutrition.protein\n"
+            "item_dosa,180,\n"
+            "item_idli,,6.5\n").encode()
+    rows, errors = validate_rows(parse_rows(body, "text/csv"))
+    assert errors == []
+    existing = [{"item_id": "item_dosa", "canteen_id": "sopanam", "name": "Masala Dosa"},
+                {"item_id": "item_idli", "canteen_id": "sopanam", "name": "Idli"}]
+    requests, positions, _ = plan_writes(rows, existing, allow_create=True, now=NOW)
+    assert positions == [0, 1]
+    assert requests[0]._doc == {"$set": {"nutrition.calories": 180}}
+    assert requests[1]._doc == {"$set": {"nutrition.protein": 6.5}}
+
+    # A new item still needs every nutrition value
+    partial = {**NEW_ITEM, "nutrition": {"calories": 320}}
+    rows, _ = validate_rows([partial])
+    _, _, errors = plan_writes(rows, existing, allow_create=True, now=NOW)
+    assert errors[0]["error"].startswith("Item not found")
+
+
+def test_key_fields_never_rename_or_move_an_item():
+    crew_row = {"item_id": "item_dosa", "canteen_id": "mba", "name": "Renamed", "stock_qty": 5}
+    rows, errors = validate_rows([crew_row, {"canteen_id": "sopanam", "name": "Idli", "stock_qty": 5}],
+                                 allowed_fields=CREW_FIELDS)
+    assert [index for index, _ in rows] == [1]
+    assert errors[0]["row"] == 0 and errors[0]["error"] == "Not allowed to change: canteen_id, name"
+
+    existing = [{"item_id": "item_dosa", "canteen_id": "sopanam", "name": "Masala Dosa"}]
+    rows, _ = validate_rows([crew_row, {**NEW_ITEM, "item_id": "item_ghee"}])
+    requests, positions, errors = plan_writes(rows, existing, allow_create=True, now=NOW)
+    assert errors == [] and positions == [0, 1]
+    assert requests[0]._filter == {"item_id": "item_dosa"}
+    assert requests[0]._doc == {"$set": {"stock_qty": 5}}
+    # A new item keyed by item_id gets its canteen and name on insert only
+    assert "name" not in requests[1]._doc["$set"] and "canteen_id" not in requests[1]._doc["$set"]
+    assert requests[1]._doc["$setOnInsert"]["canteen_id"] == "mba"
+    assert requests[1]._doc["$setOnInsert"]["name"] == "Ghee Roast"
@@ -0,0 +1,71 @@
+"""
+Metrics tests: exposition format, route-templated request timing and Mongo command timing.
+"""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from metrics import (
+    Counter, Histogram, MetricsMiddleware, MongoCommandMetrics, HTTP_REQUEST_DURATION, HTTP_REQUESTS,
+    MONGO_COMMAND_DURATION, MONGO_COMMAND_FAILURES, REGISTRY, record_cache
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/menu/{canteen_id}")
+    assert histogram.render()[2:] == [
+        'demo_seconds_bucket{route="/menu/{canteen_id}",le="0.1"} 2',
+        'demo_seconds_bucket{route="/menu/{canteen_id}",le="1"} 3',
+        'demo_seconds_bucket{route="/menu/{canteen_id}",le="+Inf"} 4',
+        'demo_seconds_sum{route="/menu/{canteen_id}"} 3.65',
+        'demo_seconds_count{route="/menu/{canteen_id}"} 4',
+    ]
+    counter = Counter("demo_total", "Demo", ("name",))
+    counter.inc('say "hi"')
+    assert counter.render()[-1] == 'demo_total{name="say \\"hi\\""} 1'
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get("/api/menu/{canteen_id}")
+    async def menu(canteen_id: str):
+        if canteen_id == "closed":
+            raise HTTPException(status_code=404, detail="closed")
+        return []
+
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+    before = HTTP_REQUEST_DURATION.count("GET", "/api/menu/{canteen_id}")
+    for canteen_id in ("sopanam", "mba", "closed"):
+        client.get(f"/api/menu/{canteen_id}")
+    client.get("/nowhere")
+
+    assert HTTP_REQUEST_DURATION.count("GET", "/api/menu/{canteen_id}") == before + 3
+    assert HTTP_REQUESTS.value("GET", "/api/menu/{canteen_id}", "404") >= 1
+    assert HTTP_REQUESTS.value("GET", "unmatched", "404") >= 1
+
+
+def test_mongo_listener_and_cache_ratio():
+    listener = MongoCommandMetrics()
+    started = SimpleNamespace(command_name="find", command={"find": "orders"}, connection_id=("h", 1), request_id=7)
+    listener.started(started)
+    listener.succeeded(SimpleNamespace(command_name="find", connection_id=("h", 1), request_id=7, duration_micros=1500))
+    listener.started(SimpleNamespace(command_name="insert", command={"insert": "bills"}, connection_id=("h", 1), request_id=8))
+    listener.failed(SimpleNamespace(command_name="insert", connection_id=("h", 1), request_id=8, duration_micros=900))
+    assert MONGO_COMMAND_DURATION.count("orders", "find") >= 1
+    assert MONGO_COMMAND_FAILURES.value("bills", "insert") >= 1
+
+    record_cache("test_cache", True)
+    record_cache("test_cache", True)
+    record_cache("test_cache", False)
+    text = REGISTRY.render().decode()
+    assert 'cache_hit_ratio{cache="test_cache"} 0.6666666666666666' in text
+    assert "# TYPE http_request_duration_seconds histogram" in text
@@ -0,0 +1,68 @@
+"""
+Data migration tests against in-memory collections: string timestamps to UTC
+dates, line-item normalisation and the applied-version bookkeeping.
+"""
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from migrations import applied_versions, convert_string_dates, pending_migrations, run_migrations, MIGRATIONS_COLLECTION
+from tests.fake_mongo import FakeCollection, FakeDb
+
+NATIVE = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def test_convert_string_dates_to_utc_and_drops_unparseable_values():
+    orders = FakeCollection("orders", [
+        {"_id": 1, "created_at": "2026-09-16T12:00:00+05:30", "updated_at": "2026-09-16T06:45:00Z"},
+        {"_id": 2, "created_at": "2026-09-16T06:30:00", "updated_at": NATIVE},
+        {"_id": 3, "created_at": "not a date", "updated_at": None},
+        {"_id": 4, "created_at": NATIVE},
+    ])
+    converted = asyncio.run(convert_string_dates(orders, ["created_at", "updated_at"], batch_size=2))
+    assert converted == 3
+
+    docs = {doc["_id"]: doc for doc in orders.docs}
+    assert docs[1]["created_at"] == datetime(2026, 9, 16, 6, 30, tzinfo=timezone.utc)
+    assert docs[1]["updated_at"] == datetime(2026, 9, 16, 6, 45, tzinfo=timezone.utc)
+    assert docs[1]["created_at"].utcoffset().total_seconds() == 0
+    assert docs[2]["created_at"] == datetime(2026, 9, 16, 6, 30, tzinfo=timezone.utc)
+    assert docs[2]["updated_at"] == NATIVE
+    assert docs[3]["created_at"] is None and docs[3]["updated_at"] is None
+    assert docs[4] == {"_id": 4, "created_at": NATIVE}
+
+    before = [dict(doc) for doc in orders.docs]
+    assert asyncio.run(convert_string_dates(orders, ["created_at", "updated_at"], batch_size=2)) == 0
+    assert orders.docs == before
+
+
+def test_run_migrations_applies_each_version_once():
+    db = FakeDb(
+        orders=[{"_id": 1, "order_id": "order_1", "created_at": "2026-09-16T06:30:00Z",
+                 "items": [{"item_id": "dosa", "name": "Masala Dosa", "price": 60.5, "qty": 2}]}],
+        bills=[{"_id": 2, "bill_id": "bill_1", "timestamp": "2026-09-16T06:31:00+00:00",
+                "items": [{"item_id": "dosa", "item_name": "Masala Dosa", "price_at_order": 60.5, "quantity": 2}]}],
+        users=[{"_id": 3, "user_id": "user_1", "created_at": "2026-01-01T00:00:00+00:00"}],
+    )
+
+    async def run():
+        pending = [version for version, _ in await pending_migrations(db)]
+        first = await run_migrations(db)
+        second = await run_migrations(db)
+        return pending, first, second, await applied_versions(db)
+
+    pending, first, second, applied = asyncio.run(run())
+    assert first == pending and pending == sorted(pending) and len(pending) >= 2
+    assert second == []
+    assert applied == first
+    assert [doc["version"] for doc in db[MIGRATIONS_COLLECTION].docs] == first
+
+    order = db.orders.docs[0]
+    assert order["created_at"] == datetime(2026, 9, 16, 6, 30, tzinfo=timezone.utc)
+    assert order["items"][0]["unit_price_paise"] == 6050 and order["total_paise"] == 12100
+    assert db.bills.docs[0]["timestamp"] == datetime(2026, 9, 16, 6, 31, tzinfo=timezone.utc)
+    assert isinstance(db.users.docs[0]["created_at"], datetime)
+    assert {args[1] for args, _ in db.commands} == {"orders", "bills"}
@@ -0,0 +1,79 @@
+"""
+Order book tests: created_at ordering, status moves, delayed lookups, daily counters and drift detection.
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from order_book import OrderBook
+
+NOW = datetime(2026, 9, 16, 12, 30, tzinfo=timezone.utc)
+
+
+def card(n, minutes_ago, status="REQUESTED", canteen_id="sopanam", **extra):
+    created = NOW - timedelta(minutes=minutes_ago)
+    return {
+        "order_id": f"order_{n:04d}",
+        "token_number": 1000 + n,
+        "canteen_id": canteen_id,
+        "status": status,
+        "items": [{"item_id": "dosa", "item_name": "Dosa", "quantity": 2, "price_at_order": 60.0}],
+        "total_amount": 120.0,
+        "created_at": created,
+        "updated_at": extra.pop("updated_at", created),
+        **extra
+    }
+
+
+def test_book_keeps_active_orders_sorted_and_indexed():
+    book = OrderBook()
+    for n, age in [(1, 5), (2, 20), (3, 12)]:
+        book.apply(card(n, age), NOW)
+    book.apply(card(4, 30, canteen_id="mba"), NOW)
+    assert [o["order_id"] for o in book.pending("sopanam")] == ["order_0002", "order_0003", "order_0001"]
+    assert book.pending("sopanam")[0]["item_count"] == 2
+
+    book.apply(card(3, 12, "PREPARING", updated_at=NOW), NOW)
+    book.apply(card(2, 20, "CANCELLED", updated_at=NOW), NOW)
+    assert [o["order_id"] for o in book.pending("sopanam")] == ["order_0003", "order_0001"]
+    assert book.stats("sopanam", NOW)["active"] == {"REQUESTED": 1, "PREPARING": 1, "READY": 0}
+
+    # A stale read (older updated_at) does not undo a newer transition
+    book.apply(card(3, 12, "REQUESTED"), NOW)
+    assert book.pending("sopanam")[0]["status"] == "PREPARING"
+
+
+def test_delayed_uses_created_at_bound_and_status_filter():
+    book = OrderBook()
+    book.apply(card(1, 40, "READY"), NOW)
+    book.apply(card(2, 25, "PREPARING"), NOW)
+    book.apply(card(3, 16), NOW)
+    book.apply(card(4, 3), NOW)
+    delayed = book.delayed("sopanam", NOW - timedelta(minutes=15), ["REQUESTED", "PREPARING"])
+    assert [o["order_id"] for o in delayed] == ["order_0002", "order_0003"]
+
+
+def test_completed_counters_roll_over_daily():
+    book = OrderBook()
+    done = NOW + timedelta(minutes=1)
+    book.apply(card(1, 20, "READY"), NOW)
+    book.apply(card(1, 20, "COMPLETED", requested_at=NOW - timedelta(minutes=19),
+                    ready_at=NOW - timedelta(minutes=7), updated_at=done), NOW)
+    book.apply(card(2, 30, "COMPLETED", updated_at=done), NOW)  # no stamps: created -> updated (31 min)
+    book.apply(card(2, 30, "COMPLETED", updated_at=done), NOW)  # re-read by the poll: counted once
+    stats = book.stats("sopanam", NOW)
+    assert stats["completed_today"] == 2 and stats["avg_prep_time"] == 21
+    assert not book.pending("sopanam")
+
+    tomorrow = NOW + timedelta(days=1)
+    assert book.book("sopanam", tomorrow).completed_today == 0
+
+
+def test_diff_reports_drift():
+    book = OrderBook()
+    book.apply(card(1, 5), NOW)
+    book.apply(card(2, 4), NOW)
+    missing, stale = book.diff("sopanam", {"order_0002", "order_0009"})
+    assert missing == {"order_0009"} and stale == {"order_0001"}
@@ -0,0 +1,107 @@
+"""
+POST /api/orders/status/bulk against in-memory collections: the transition guard,
+the updated / rejected / not_found split, last-entry-wins deduplication and one
+socket message per room.
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:1")
+os.environ.setdefault("DB_NAME", "test")
+
+import server
+from auth_utils import get_current_user
+from tests.fake_mongo import FakeDb
+
+EARLIER = datetime(2026, 9, 16, 12, 0, tzinfo=timezone.utc)
+
+
+def stored_order(order_id, status, canteen_id="sopanam", student_id="user_a", updated_at=EARLIER):
+    return {"order_id": order_id, "status": status, "canteen_id": canteen_id, "student_id": student_id,
+            "token_number": int(order_id[-1]), "items": [], "created_at": EARLIER - timedelta(minutes=5),
+            "updated_at": updated_at}
+
+
+@pytest.fixture
+def crew(monkeypatch):
+    fake = FakeDb(orders=[
+        stored_order("order_1", "REQUESTED"),
+        stored_order("order_2", "PREPARING", student_id="user_b"),
+        stored_order("order_3", "COMPLETED"),
+        stored_order("order_4", "READY", canteen_id="mba"),
+        stored_order("order_5", "PENDING_PAYMENT"),
+    ])
+    emitted, applied, kitchens = [], [], []
+
+    async def emit(event, data, room=None):
+        emitted.append((event, room, data))
+
+    async def apply_status_change(order):
+        applied.append(order["order_id"])
+
+    def kitchen_updates(canteen_id):
+        kitchens.append(canteen_id)
+
+    monkeypatch.setattr(server, "db", fake)
+    monkeypatch.setattr(server.sio, "emit", emit)
+    monkeypatch.setattr(server, "apply_status_change", apply_status_change)
+    monkeypatch.setattr(server, "kitchen_updates", kitchen_updates)
+    server.app.dependency_overrides[get_current_user] = lambda: {"user_id": "crew_1", "role": "crew"}
+    yield TestClient(server.app), fake, emitted, applied, kitchens
+    server.app.dependency_overrides.clear()
+
+
+def post(client, *changes):
+    return client.post("/api/orders/status/bulk",
+                       json={"updates": [{"order_id": order_id, "status": status} for order_id, status in changes]})
+
+
+def test_bulk_status_splits_updated_rejected_and_not_found(crew):
+    client, fake, emitted, applied, kitchens = crew
+    response = post(client,
+                    ("order_1", "READY"),
+                    ("order_2", "READY"),
+                    ("order_1", "PREPARING"),      # later entry for the same order wins
+                    ("order_3", "PREPARING"),      # COMPLETED -> PREPARING is not a kitchen transition
+                    ("order_4", "READY"),          # already READY: status matches, but this batch did not change it
+                    ("order_5", "PREPARING"),      # unpaid orders are never touched
+                    ("order_missing", "READY"))
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(body["updated"], key=lambda u: u["order_id"]) == [
+        {"order_id": "order_1", "status": "PREPARING"}, {"order_id": "order_2", "status": "READY"}]
+    assert sorted(body["rejected"], key=lambda r: r["order_id"]) == [
+        {"order_id": "order_3", "status": "COMPLETED", "requested": "PREPARING"},
+        {"order_id": "order_4", "status": "READY", "requested": "READY"},
+        {"order_id": "order_5", "status": "PENDING_PAYMENT", "requested": "PREPARING"},
+    ]
+    assert body["not_found"] == ["order_missing"]
+
+    stored = {order["order_id"]: order for order in fake.orders.docs}
+    assert stored["order_3"]["status"] == "COMPLETED" and stored["order_3"]["updated_at"] == EARLIER
+    assert stored["order_4"]["updated_at"] == EARLIER
+    assert stored["order_2"]["ready_at"] == stored["order_2"]["updated_at"]
+    assert stored["order_1"]["updated_at"].microsecond % 1000 == 0
+    assert fake.orders.bulk_writes == 1
+    assert sorted(applied) == ["order_1", "order_2"]
+
+    # One message per room: both changed orders share the canteen; each student gets their own
+    rooms = sorted((event, room, len(data["updates"])) for event, room, data in emitted)
+    assert rooms == [("order_updates", "sopanam", 2), ("order_updates", "user_a", 1), ("order_updates", "user_b", 1)]
+    assert kitchens == ["sopanam"]
+
+
+def test_bulk_status_rejects_unknown_statuses_and_other_roles(crew):
+    client, fake, emitted, _, _ = crew
+    response = post(client, ("order_1", "PREPARING"), ("order_2", "SHIPPED"))
+    assert response.status_code == 400
+    assert fake.orders.bulk_writes == 0 and emitted == []
+
+    server.app.dependency_overrides[get_current_user] = lambda: {"user_id": "user_a", "role": "student"}
+    assert post(client, ("order_1", "PREPARING")).status_code == 403
@@ -0,0 +1,74 @@
+"""
+Keyset pagination tests: cursor round-trips, rejecting bad cursors and paging
+across rows that tie on the sort field.
+"""
+import asyncio
+import base64
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from pagination import clamp_page_size, decode_cursor, encode_cursor, fetch_page, keyset_filter, MAX_PAGE_SIZE
+from tests.fake_mongo import FakeCollection
+
+NOW = datetime(2026, 9, 16, 12, 0, 0, 123000, tzinfo=timezone.utc)
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor(NOW, "order_42")) == (NOW, "order_42")
+    assert decode_cursor(encode_cursor(1737, "bill_7")) == (1737, "bill_7")
+    assert decode_cursor(encode_cursor("2026-09-16", "bill_8")) == ("2026-09-16", "bill_8")
+    assert "=" not in encode_cursor(NOW, "order_42")
+    assert clamp_page_size(None) == 20 and clamp_page_size(0) == 20 and clamp_page_size(10 ** 6) == MAX_PAGE_SIZE
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    encode_cursor(NOW, "order_42")[:-6],
+    raw_cursor({"t": "dt", "v": "yesterday", "id": "order_1"}),
+    raw_cursor({"t": "s", "v": 5}),
+    raw_cursor({"t": "s", "v": {"$gt": ""}, "id": "order_1"}),
+    raw_cursor({"t": "s", "v": 5, "id": {"$ne": None}}),
+    raw_cursor(["order_1"]),
+])
+def test_tampered_or_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        keyset_filter("created_at", "order_id", cursor)
+    assert exc.value.status_code == 400
+
+
+def test_pages_across_ties_without_skipping_or_repeating():
+    # Three rows per timestamp so every page boundary falls inside a tie
+    orders = [{"order_id": f"order_{n:02d}", "student_id": "user_a", "created_at": NOW - timedelta(seconds=n // 3)}
+              for n in range(20)]
+    orders.append({"order_id": "order_other", "student_id": "user_b", "created_at": NOW})
+    collection = FakeCollection("orders", orders)
+
+    async def walk(direction):
+        seen, cursor, pages = [], None, 0
+        while True:
+            docs, cursor = await fetch_page(collection, {"student_id": "user_a"}, "created_at", "order_id",
+                                            {"_id": 0, "order_id": 1}, limit=4, cursor=cursor, direction=direction)
+            seen.extend(doc["order_id"] for doc in docs)
+            pages += 1
+            if cursor is None:
+                return seen, pages
+
+    newest_first, pages = asyncio.run(walk(-1))
+    expected = sorted((o for o in orders if o["student_id"] == "user_a"),
+                      key=lambda o: (o["created_at"], o["order_id"]), reverse=True)
+    assert newest_first == [o["order_id"] for o in expected]
+    assert pages == 5
+
+    oldest_first, _ = asyncio.run(walk(1))
+    assert oldest_first == list(reversed(newest_first))
@@ -0,0 +1,146 @@
+"""
+Payload size regression tests for the slim list views.
+
+Each endpoint's list view is applied to representative stored documents the same
+way Mongo applies the projection, then encoded with the view's serializer. The
+byte budgets are pinned so that a field silently added to a card shows up here.
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import orjson
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from views import CREW_ORDER_VIEW, STUDENT_ORDER_VIEW, MENU_VIEW, BILL_VIEW
+
+NOW = datetime(2026, 9, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def stored_order(n: int = 0) -> dict:
+    return {
+        "_id": f"66f1c0ffee{n:014d}",
+        "order_id": f"order_{n:012x}",
+        "student_id": "user_3f9a2b1c4d5e",
+        "items": [
+            {"item_id": "item_a1b2c3d4e5f6", "item_name": "Masala Dosa", "quantity": 2,
+             "price_at_order": 60.0, "unit_price_paise": 6000},
+            {"item_id": "item_f6e5d4c3b2a1", "item_name": "Filter Coffee", "quantity": 1,
+             "price_at_order": 20.0, "unit_price_paise": 2000},
+            {"item_id": "item_0a1b2c3d4e5f", "item_name": "Uzhunnu Vada", "quantity": 2,
+             "price_at_order": 15.0, "unit_price_paise": 1500}
+        ],
+        "canteen_id": "sopanam",
+        "token_number": 4827193,
+        "status": "PREPARING",
+        "payment_id": None,
+        "razorpay_order_id": "order_test_9c8b7a6d5e4f",
+        "razorpay_payment_id": "pay_test_1a2b3c4d5e6f",
+        "total_amount": 170.0,
+        "total_paise": 17000,
+        "created_at": NOW,
+        "updated_at": NOW + timedelta(minutes=3),
+        "expires_at": NOW + timedelta(minutes=10)
+    }
+
+
+def stored_menu_item(n: int = 0) -> dict:
+    return {
+        "_id": f"66f1beef00{n:014d}",
+        "item_id": f"item_{n:012x}",
+        "name": "Ghee Roast Dosa",
+        "canteen_id": "sopanam",
+        "price": 70.0,
+        "nutrition": {"calories": 420, "carbs": 52.0, "protein": 9.0, "fat": 18.0,
+                      "fiber": 3.0, "vitamins": "A, B, C", "sodium": 380.0},
+        "ingredients": "Secret Chef's Ingredients",
+        "allergens": "None",
+        "stock_qty": 120,
+        "category": "Breakfast",
+        "image_url": "https://images.unsplash.com/photo-1668236543090-82eba5ee5976?w=500&q=80",
+        "veg_type": "veg",
+        "prep_time": 12,
+        "available": True,
+        "created_at": NOW
+    }
+
+
+def stored_bill(n: int = 0) -> dict:
+    order = stored_order(n)
+    return {
+        "_id": f"66f1b111{n:016d}",
+        "bill_id": f"bill_{n:012x}",
+        "student_id": order["student_id"],
+        "order_id": order["order_id"],
+        "amount": order["total_amount"],
+        "items": order["items"],
+        "timestamp": NOW
+    }
+
+
+def _pick(value, path):
+    head, _, rest = path.partition(".")
+    if isinstance(value, list):
+        return [_pick(v, path) for v in value]
+    if head not in value:
+        return None
+    return value[head] if not rest else _pick(value[head], rest)
+
+
+def _merge(target: dict, path: str, value):
+    head, _, rest = path.partition(".")
+    if not rest:
+        target[head] = value
+    elif isinstance(value, list):
+        existing = target.setdefault(head, [{} for _ in value])
+        for slot, v in zip(existing, value):
+            _merge(slot, rest, v)
+    else:
+        _merge(target.setdefault(head, {}), rest, value)
+
+
+def project(doc: dict, projection: dict) -> dict:
+    """Python equivalent of the view projections (inclusion paths + $sum over an array path)"""
+    out = {}
+    for path, spec in projection.items():
+        if path == "_id":
+            continue
+        if isinstance(spec, dict):
+            out[path] = sum(_pick(doc, spec["$sum"].lstrip("$")))
+            continue
+        value = _pick(doc, path.split(".")[0])
+        if value is not None:
+            _merge(out, path, _pick(doc, path))
+    return out
+
+
+def sizes(view, docs):
+    full = len(orjson.dumps([{k: v for k, v in d.items() if k != "_id"} for d in docs]))
+    slim = len(view.encode([project(d, view.projection) for d in docs]))
+    return full, slim
+
+
+# (view, documents, max slim bytes) per list endpoint
+CASES = {
+    "GET /orders/pending/{canteen_id}": (CREW_ORDER_VIEW, [stored_order(n) for n in range(20)], 9000),
+    "GET /orders/recent/{canteen_id}": (CREW_ORDER_VIEW, [stored_order(n) for n in range(20)], 9000),
+    "GET /orders/alerts/{canteen_id}": (CREW_ORDER_VIEW, [stored_order(n) for n in range(20)], 9000),
+    "GET /orders/my": (STUDENT_ORDER_VIEW, [stored_order(n) for n in range(20)], 10200),  # + eta, pickup_slot
+    "GET /spending/bills": (BILL_VIEW, [stored_bill(n) for n in range(20)], 6700),
+    "GET /menu/{canteen_id}": (MENU_VIEW, [stored_menu_item(n) for n in range(20)], 8550),
+}
+
+
+def test_projection_matches_card_fields():
+    card = project(stored_order(), CREW_ORDER_VIEW.projection)
+    assert card["item_count"] == 5
+    assert "razorpay_payment_id" not in card and "expires_at" not in card
+    assert set(card["items"][0]) == {"item_name", "quantity", "price_at_order"}
+
+
+def test_list_payload_byte_budgets():
+    for endpoint, (view, docs, budget) in CASES.items():
+        full, slim = sizes(view, docs)
+        assert slim <= budget, f"{endpoint}: {slim} bytes exceeds budget of {budget}"
+        assert slim < full, f"{endpoint}: slim payload ({slim}) is not smaller than full ({full})"
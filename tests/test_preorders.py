@@ -0,0 +1,52 @@
+"""
+Pre-order tests: slot grid and capacity, release times and the timer heap.
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from preorders import (
+    OrderScheduler, slot_start, slot_capacity, release_time, upcoming_slots, RELEASE, EXPIRE, SLOT_MINUTES
+)
+
+NOW = datetime(2026, 9, 16, 12, 38, 20, tzinfo=timezone.utc)
+
+
+def test_slot_grid_and_release_time():
+    assert SLOT_MINUTES == 15
+    assert slot_start(NOW) == datetime(2026, 9, 16, 12, 30, tzinfo=timezone.utc)
+    slot = datetime(2026, 9, 16, 13, 0, tzinfo=timezone.utc)
+    assert release_time(slot, 20) == datetime(2026, 9, 16, 12, 40, tzinfo=timezone.utc)
+
+
+def test_capacity_follows_hourly_throughput():
+    throughput = np.zeros(24)
+    throughput[13] = 120
+    lunch = datetime(2026, 9, 16, 13, 15, tzinfo=timezone.utc)
+    assert slot_capacity(throughput, lunch) == 30
+    # Quiet hours fall back to the minimum throughput (20 orders/hour -> 5 per slot)
+    assert slot_capacity(throughput, lunch.replace(hour=16)) == 5
+
+    slots = upcoming_slots(NOW, 1, throughput, {datetime(2026, 9, 16, 13, 0, tzinfo=timezone.utc): 28})
+    assert [s["slot_start"].strftime("%H:%M") for s in slots] == ["12:45", "13:00", "13:15", "13:30"]
+    assert [(s["capacity"], s["available"]) for s in slots] == [(5, 5), (30, 2), (30, 30), (30, 30)]
+
+
+def test_scheduler_pops_due_timers_in_order():
+    scheduler = OrderScheduler({})
+    scheduler.schedule(NOW + timedelta(minutes=5), RELEASE, "order_b")
+    scheduler.schedule(NOW - timedelta(minutes=1), EXPIRE, "order_c")
+    scheduler.schedule(NOW, RELEASE, "order_a")
+    scheduler.schedule(NOW, RELEASE, "order_a")  # duplicate: ignored
+    assert len(scheduler) == 3
+
+    assert scheduler.pop_due(NOW) == [(EXPIRE, "order_c"), (RELEASE, "order_a")]
+    assert scheduler.next_due() == NOW + timedelta(minutes=5)
+    # A fired timer can be scheduled again (e.g. after a failed release and a resync)
+    scheduler.schedule(NOW, RELEASE, "order_a")
+    assert scheduler.pop_due(NOW + timedelta(minutes=10)) == [(RELEASE, "order_a"), (RELEASE, "order_b")]
+    assert scheduler.next_due() is None
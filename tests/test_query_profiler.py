@@ -0,0 +1,93 @@
+"""
+Query profiler tests: shape normalisation, per-request attribution and N+1 / budget flags, plan summaries.
+"""
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:1")
+os.environ.setdefault("DB_NAME", "test")
+
+import server
+from auth_utils import create_jwt_token
+from query_profiler import (
+    PROFILE_HEADER, QueryProfiler, command_shape, current_profile, explainable_command, plan_summary
+)
+
+
+def run_command(profiler, request_id, name, command, micros=1000):
+    event = dict(command_name=name, connection_id=("h", 1), request_id=request_id)
+    profiler.listener.started(SimpleNamespace(command=command, **event))
+    profiler.listener.succeeded(SimpleNamespace(duration_micros=micros, **event))
+
+
+def test_shapes_ignore_values():
+    assert command_shape("find", {"find": "orders", "filter": {"order_id": "A1"}}) == \
+        command_shape("find", {"find": "orders", "filter": {"order_id": "B2"}}) == "find orders {order_id:?}"
+    assert command_shape("aggregate", {"aggregate": "orders", "pipeline": [
+        {"$match": {"canteen_id": "x", "status": {"$in": ["PAID", "READY"]}}}, {"$group": {"_id": "$status"}}
+    ]}) == "aggregate orders [$match{canteen_id:?,status:{$in:[?]}},$group]"
+    assert command_shape("update", {"update": "menu_items", "updates": [{"q": {"item_id": 1}}, {"q": {"item_id": 2}}]}) == \
+        "update menu_items {item_id:?} x2"
+    sample = explainable_command("find", {"find": "orders", "filter": {}, "lsid": {}, "$db": "x", "$clusterTime": {}})
+    assert sample == {"find": "orders", "filter": {}}
+    assert explainable_command("insert", {"insert": "orders"}) is None
+
+
+def test_request_attribution_and_flags():
+    profiler = QueryProfiler()
+
+    # Outside a request nothing is recorded
+    run_command(profiler, 1, "find", {"find": "menu_items", "filter": {}})
+    assert profiler.report()["shapes"] == []
+
+    token = profiler.begin()
+    run_command(profiler, 2, "find", {"find": "users", "filter": {"user_id": "u"}})
+    for i in range(4):
+        run_command(profiler, 10 + i, "find", {"find": "menu_items", "filter": {"item_id": f"i{i}"}}, micros=2000)
+    run_command(profiler, 20, "getMore", {"getMore": 1, "collection": "orders"})
+    profile = profiler.end(token, "/api/orders")
+    assert current_profile.get() is None
+
+    assert profile.round_trips == 6
+    assert profile.repeated() == {"find menu_items {item_id:?}": 4}
+    assert profile.flags() == ["round_trips", "repeated_shape"]
+    assert profile.header() == "rt=6; db_ms=10.0; flags=round_trips,repeated_shape"
+
+    token = profiler.begin()
+    run_command(profiler, 30, "find", {"find": "users", "filter": {"user_id": "v"}})
+    quiet = profiler.end(token, "/api/menu/{canteen_id}")
+    assert quiet.flags() == [] and quiet.header() == "rt=1; db_ms=1.0"
+
+    report = profiler.report()
+    assert [r["route"] for r in report["routes"]] == ["/api/orders", "/api/menu/{canteen_id}"]
+    assert report["routes"][0]["flagged"] == 1 and report["routes"][0]["max_round_trips"] == 6
+    top = report["shapes"][0]
+    assert top["shape"] == "find menu_items {item_id:?}" and top["count"] == 4 and top["repeated_in_requests"] == 1
+    assert next(s for s in report["shapes"] if s["shape"] == "find users {user_id:?}")["routes"] == \
+        {"/api/orders": 1, "/api/menu/{canteen_id}": 1}
+
+
+def test_plan_summary_walks_winning_plan():
+    explain = {"queryPlanner": {"winningPlan": {
+        "stage": "PROJECTION_SIMPLE", "inputStage": {
+            "stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "canteen_id_1_status_1"}}}}}
+    assert plan_summary(explain) == "PROJECTION_SIMPLE <- FETCH <- IXSCAN(canteen_id_1_status_1)"
+    aggregate = {"stages": [{"$cursor": {"queryPlanner": {"winningPlan": {"queryPlan": {"stage": "COLLSCAN"}}}}}]}
+    assert plan_summary(aggregate) == "COLLSCAN"
+
+
+def test_profile_header_is_returned_to_management_only():
+    client = TestClient(server.app)
+    assert PROFILE_HEADER not in client.get("/metrics", headers={PROFILE_HEADER: "1"}).headers
+    crew = {PROFILE_HEADER: "1", "Authorization": f"Bearer {create_jwt_token('c1', 'crew')}"}
+    assert PROFILE_HEADER not in client.get("/metrics", headers=crew).headers
+
+    admin = {PROFILE_HEADER: "1", "Authorization": f"Bearer {create_jwt_token('m1', 'management')}"}
+    assert "rt=" in client.get("/metrics", headers=admin).headers[PROFILE_HEADER]
+    client.cookies.set("session_token", create_jwt_token("m1", "management"))
+    assert PROFILE_HEADER in client.get("/metrics", headers={PROFILE_HEADER: "1"}).headers
@@ -0,0 +1,88 @@
+"""
+Request profiler tests: admin-only trigger, on-loop vs awaiting samples, collapsed output and the bounded store.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from auth_utils import create_jwt_token
+from request_profiler import (
+    AWAITING, PROFILE_ID_HEADER, ProfileStore, ProfilerMiddleware, RequestProfile, Sampler
+)
+
+
+def burn(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def build_app(store, sample_rate=0.0, min_duration_ms=0.0):
+    app = FastAPI()
+
+    @app.get("/api/knapsack/{goal}")
+    async def knapsack(goal: int):
+        burn(0.08)
+        return {"goal": goal}
+
+    @app.get("/api/insights")
+    async def insights():
+        await asyncio.sleep(0.08)
+        return {}
+
+    app.add_middleware(ProfilerMiddleware, sample_rate=sample_rate, min_duration_ms=min_duration_ms,
+                       store=store, profiler=Sampler(interval_ms=2))
+    return app
+
+
+def test_header_trigger_requires_management():
+    store = ProfileStore()
+    client = TestClient(build_app(store))
+
+    response = client.get("/api/knapsack/40", headers={"X-Profile": "1"})
+    assert PROFILE_ID_HEADER not in response.headers
+    crew = {"X-Profile": "1", "Authorization": f"Bearer {create_jwt_token('c1', 'crew')}"}
+    assert PROFILE_ID_HEADER not in client.get("/api/knapsack/40", headers=crew).headers
+    assert store.list() == []
+
+    admin = {"X-Profile": "1", "Authorization": f"Bearer {create_jwt_token('m1', 'management')}"}
+    response = client.get("/api/knapsack/40", headers=admin)
+    profile = store.get(response.headers[PROFILE_ID_HEADER])
+    assert profile.route == "/api/knapsack/{goal}" and profile.trigger == "header" and profile.status == 200
+    assert profile.samples > 5
+    # Time on the loop is attributed to the handler and the function it called
+    assert profile.hottest(1)[0]["frame"] == "test_request_profiler.burn"
+    assert any("test_request_profiler.build_app.<locals>.knapsack;test_request_profiler.burn" in line
+               for line in profile.collapsed().splitlines())
+
+    response = client.get("/api/insights", headers=admin)
+    waiting = store.get(response.headers[PROFILE_ID_HEADER])
+    assert waiting.hottest(1)[0]["frame"] == AWAITING
+    assert list(store.by_route()) == ["/api/insights", "/api/knapsack/{goal}"]
+
+
+def test_sampled_profiles_keep_only_slow_requests():
+    store = ProfileStore()
+    client = TestClient(build_app(store, sample_rate=1.0, min_duration_ms=50))
+    client.get("/api/knapsack/10")
+    client.get("/nowhere")
+    assert [p.route for p in store.list()] == ["/api/knapsack/{goal}"]
+    assert store.list()[0].trigger == "sampled"
+
+
+def test_store_evicts_oldest():
+    store = ProfileStore(max_stored=2)
+    profiles = [RequestProfile("GET", f"/p{i}", "sampled") for i in range(3)]
+    for profile in profiles:
+        store.add(profile)
+    assert store.get(profiles[0].profile_id) is None
+    assert [p.path for p in store.list()] == ["/p2", "/p1"]
+    profiles[2].stacks[("a", "b")] += 3
+    profiles[2].stacks[("a",)] += 1
+    assert profiles[2].collapsed() == "a;b 3\na 1\n"
@@ -0,0 +1,78 @@
+"""
+Synthetic data tests: determinism, daily peaks, item popularity and lifecycle timestamps.
+"""
+import asyncio
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from synthetic_data import CampusModel, insert_stream
+
+END = datetime(2026, 9, 16, 13, 0, tzinfo=timezone.utc)  # a Wednesday, mid lunch rush
+
+
+def menus():
+    return {
+        canteen_id: [{"item_id": f"{canteen_id}_{i:02d}", "name": f"Item {i}", "canteen_id": canteen_id,
+                      "price": 20 + 5 * i, "prep_time": 2 + i % 12} for i in range(30)]
+        for canteen_id in ["sopanam", "mba", "samudra"]
+    }
+
+
+def generate(seed=7, days=7):
+    return list(CampusModel(menus(), 500, seed).orders(2000, days, END))
+
+
+def test_same_seed_same_dataset():
+    assert generate(seed=3, days=2) == generate(seed=3, days=2)
+    assert generate(seed=3, days=2)[0]["order_id"] != generate(seed=4, days=2)[0]["order_id"]
+
+
+def test_peaks_popularity_and_lifecycles():
+    orders = generate()
+    hours = Counter(order["created_at"].hour for order in orders)
+    assert hours[12] > 3 * hours[10] and hours[17] > 2 * hours[15]
+    assert all(7 <= hour < 22 for hour in hours)
+
+    # The weekend (12-13 Sep) is quieter than the weekdays
+    per_day = Counter(order["created_at"].date() for order in orders)
+    assert per_day[datetime(2026, 9, 12).date()] < 0.7 * per_day[datetime(2026, 9, 14).date()]
+
+    # Each canteen has a few clear favourites
+    sales = Counter(line["item_id"] for order in orders if order["canteen_id"] == "mba" for line in order["items"])
+    top = sales.most_common()
+    assert top[0][1] > 5 * top[-1][1]
+
+    statuses = Counter(order["status"] for order in orders)
+    assert statuses["COMPLETED"] > 0.9 * len(orders) and statuses["CANCELLED"] > 0
+    assert statuses["REQUESTED"] + statuses["PREPARING"] + statuses["READY"] > 0
+    for order in orders:
+        assert order["created_at"] <= order["updated_at"] <= END
+        if order["status"] == "COMPLETED":
+            assert order["created_at"] < order["requested_at"] < order["ready_at"] <= order["updated_at"]
+        assert order["total_paise"] == sum(line["unit_price_paise"] * line["quantity"] for line in order["items"])
+
+
+class FakeCollection:
+    def __init__(self):
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def insert_many(self, docs, ordered=True):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        self.batches.append(docs)
+        return type("Result", (), {"inserted_ids": [None] * len(docs)})()
+
+
+def test_insert_stream_batches_with_bounded_concurrency():
+    collection = FakeCollection()
+    count = asyncio.run(insert_stream(collection, iter(range(10_500)), batch_size=1000, concurrency=3))
+    assert count == 10_500 and len(collection.batches) == 11
+    assert 1 < collection.max_in_flight <= 3